@@ -0,0 +1,156 @@
+"""Compares the vectorized TurfjeAnalytics with the loop over Turfje objects the year-end report used to do, on a generated year of turfjes. Needs numpy.
+
+Usage:
+    python -m benchmarks.analytics [--count 1000000] [--people 40]
+"""
+import argparse
+import math
+import random
+import time
+from collections import Counter
+from src.db.turfje import Turfje
+from src.db.person import Person
+from src.db.turfjecolumns import TurfjeColumns
+from src.db.analytics import TurfjeAnalytics
+
+REASONS = ['B', 'LAAT', 'BORREL', 'VERGADERING']
+REMOVAL_REASONS = ['KRAT', 'TAART']
+POSITIONS = ['Voorzitter', 'Secretaris', 'Penningmeester', 'Lid']
+
+
+def generate(count: int, personCount: int):
+    """Generates a year of turfjes, handed out in the evening, of which most have been removed a few days later.
+
+    Args:
+        count (int): Amount of turfjes.
+        personCount (int): Amount of people.
+
+    Returns:
+        (List(Turfje), List(Person)): The turfjes and people.
+    """
+    people = [Person(id, f'Person {id}', POSITIONS[min(id, len(POSITIONS) - 1)]) for id in range(personCount)]
+    turfjes = []
+
+    for id in range(count):
+        creationDate = 1.6e9 + random.uniform(0, 365 * 86400)
+        removed = random.random() < 0.7
+
+        turfjes.append(Turfje(
+            id,
+            random.randrange(personCount),
+            random.choice(REASONS),
+            random.choice(REMOVAL_REASONS) if removed else '',
+            creationDate,
+            removed,
+            creationDate + random.uniform(0, 14 * 86400) if removed else None))
+
+    return turfjes, people
+
+
+def naive(turfjes, people):
+    """Answers the analytics questions with loops over the Turfje objects.
+
+    Args:
+        turfjes (List(Turfje)): The turfjes.
+        people (List(Person)): The people.
+
+    Returns:
+        tuple: per_position, removal_ratios, average_removal_times and hour_histogram, as TurfjeAnalytics returns them.
+    """
+    positions = {person.id: person.position for person in people}
+    given = Counter()
+    active = Counter()
+    reasonGiven = Counter()
+    reasonRemoved = Counter()
+    removalTimes = Counter()
+    removalCounts = Counter()
+    hours = [0] * 24
+
+    for turfje in turfjes:
+        position = positions.get(turfje.personId)
+
+        if position is not None:
+            given[position] += 1
+            active[position] += not turfje.removed
+
+        reasonGiven[turfje.reasonAbbreviation] += 1
+        reasonRemoved[turfje.reasonAbbreviation] += turfje.removed
+
+        if turfje.removed and turfje.removalDate is not None:
+            removalTimes[turfje.reasonAbbreviation] += turfje.removalDate - turfje.creationDate
+            removalCounts[turfje.reasonAbbreviation] += 1
+
+        hours[time.localtime(turfje.creationDate).tm_hour] += 1
+
+    return (
+        {position: (given[position], active[position]) for position in sorted(set(positions.values()))},
+        {reason: reasonRemoved[reason] / reasonGiven[reason] for reason in reasonGiven},
+        {reason: removalTimes[reason] / removalCounts[reason] for reason in removalCounts},
+        hours)
+
+
+def vectorized(turfjes, people):
+    """Answers the analytics questions with TurfjeAnalytics, including building its columns.
+
+    Args:
+        turfjes (List(Turfje)): The turfjes.
+        people (List(Person)): The people.
+
+    Returns:
+        tuple: See naive.
+    """
+    columns = TurfjeColumns()
+
+    for turfje in turfjes:
+        columns.append(turfje)
+
+    analytics = TurfjeAnalytics(columns, people)
+
+    return (analytics.per_position(), analytics.removal_ratios(), analytics.average_removal_times(), analytics.hour_histogram())
+
+
+def same(first, second):
+    """Checks whether two answers are equal, allowing for rounding differences in the averages.
+    """
+    if isinstance(first, dict):
+        return first.keys() == second.keys() and all(same(first[key], second[key]) for key in first)
+
+    if isinstance(first, float):
+        return math.isclose(first, second, rel_tol = 1e-9)
+
+    return first == second
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type = int, default = 1000000, help = 'amount of turfjes')
+    parser.add_argument('--people', type = int, default = 40, help = 'amount of people')
+    args = parser.parse_args()
+
+    random.seed(0)
+    turfjes, people = generate(args.count, args.people)
+
+    naiveResult, naiveTime = timed(naive, turfjes, people)
+    vectorizedResult, vectorizedTime = timed(vectorized, turfjes, people)
+
+    # answering again on the same snapshot, which is what a report asking several questions does
+    columns = TurfjeColumns()
+
+    for turfje in turfjes:
+        columns.append(turfje)
+
+    analytics = TurfjeAnalytics(columns, people)
+    _, queryTime = timed(lambda: (analytics.per_position(), analytics.removal_ratios(), analytics.average_removal_times(), analytics.hour_histogram()))
+
+    assert same(naiveResult, vectorizedResult), "vectorized answers differ from the loop"
+
+    print(f'naive loop                      {naiveTime:8.3f} s')
+    print(f'vectorized, building columns    {vectorizedTime:8.3f} s')
+    print(f'vectorized, on a built snapshot {queryTime:8.3f} s  ({naiveTime / queryTime:.0f}x faster)')
@@ -0,0 +1,82 @@
+"""Compares the file size and load and save times of turfjes.json with every codec, on a generated history of turfjes.
+
+Usage:
+    python -m benchmarks.codecs [--count 1000000] [--people 40]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from src.db.codecs import CODECS
+from src.db.turfje import TurfjeManager
+
+REASONS = ['B', 'LAAT', 'BORREL', 'VERGADERING']
+REMOVAL_REASONS = ['KRAT', 'TAART']
+
+
+def generate(count: int, personCount: int):
+    """Generates turfjes as they are stored on disk, of which most have been removed a few days later.
+
+    Args:
+        count (int): Amount of turfjes.
+        personCount (int): Amount of people.
+
+    Returns:
+        List(dict): The serialized turfjes.
+    """
+    turfjes = []
+
+    for id in range(count):
+        creationDate = 1.6e9 + id * 30 + random.uniform(0, 30)
+        removed = random.random() < 0.7
+
+        turfjes.append({
+            'id': id,
+            'personId': random.randrange(personCount),
+            'reasonAbbreviation': random.choice(REASONS),
+            'remReasonAbbreviation': random.choice(REMOVAL_REASONS) if removed else '',
+            'creationDate': creationDate,
+            'removed': removed,
+            'removalDate': creationDate + random.uniform(0, 14 * 86400) if removed else None
+        })
+
+    return turfjes
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type = int, default = 1000000, help = 'amount of turfjes')
+    parser.add_argument('--people', type = int, default = 40, help = 'amount of people')
+    args = parser.parse_args()
+
+    random.seed(0)
+    turfjes = generate(args.count, args.people)
+
+    print(f'{"codec":12} {"size":>10} {"encode":>9} {"decode":>9} {"load":>9} {"save":>9}')
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        os.mkdir('./data')
+
+        for name, codec in CODECS.items():
+            content, encodeTime = timed(codec.encode, turfjes)
+            decoded, decodeTime = timed(codec.decode, content)
+
+            assert decoded == turfjes, f"{name} does not give back what it stored"
+
+            with open('./data/turfjes.json', 'wb') as file:
+                file.write(content)
+
+            # loading includes building the Turfje objects and indexes, which is the same for every codec
+            manager, loadTime = timed(TurfjeManager, False, False, False, 'none', './data/turfjes.json', name)
+            _, saveTime = timed(manager.save_file)
+
+            print(f'{name:12} {len(content) / 2 ** 20:8.1f} MB {encodeTime:7.3f} s {decodeTime:7.3f} s {loadTime:7.3f} s {saveTime:7.3f} s')
@@ -0,0 +1,167 @@
+"""Generates a synthetic committee: people, reasons and a year of turfjes with realistic timestamps, written into ./data for either backend.
+"""
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from src.db.sqlitebackend import SqliteStore
+
+REASON_NAMES = ['B', 'LAAT', 'BORREL', 'VERGADERING', 'VERGETEN', 'TELAAT', 'KAPOT', 'AFWEZIG']
+REMOVAL_REASONS = [('AD', 'Adtje', 1), ('KRAT', 'Krat', 24), ('TAART', 'Taart', 10)]
+POSITIONS = ['Voorzitter', 'Secretaris', 'Penningmeester', 'Lid']
+
+# turfjes are mostly handed out at the weekly drinks on thursday, and hardly during the summer break
+WEEKDAY_WEIGHTS = [0.6, 0.8, 1.0, 3.0, 1.5, 0.4, 0.2]
+SUMMER_WEIGHT = 0.1
+
+# days after which a turfje is removed on average, and the part of the turfjes that is never removed
+REMOVAL_DAYS = 5
+NEVER_REMOVED = 0.2
+
+
+def reason_names(count: int):
+    """Gets the abbreviations of count reasons, the common ones first.
+
+    Args:
+        count (int): Amount of reasons.
+
+    Returns:
+        List(str): The abbreviations.
+    """
+    return (REASON_NAMES + [f'REDEN{i}' for i in range(len(REASON_NAMES), count)])[:count]
+
+
+def zipf_weights(count: int, rng: random.Random):
+    """Gets weights that give a few items most of the turfjes, like in a real committee, in a random order.
+
+    Args:
+        count (int): Amount of items.
+        rng (random.Random): Source of randomness.
+
+    Returns:
+        List(float): A weight per item.
+    """
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(count)]
+    rng.shuffle(weights)
+
+    return weights
+
+
+def generate_creation_dates(count: int, end: float, rng: random.Random):
+    """Generates creation dates over the year before end: weighted by weekday, quiet in the summer and mostly in the evening, in local time.
+
+    Args:
+        count (int): Amount of dates.
+        end (float): Timestamp of the end of the year.
+        rng (random.Random): Source of randomness.
+
+    Returns:
+        List(float): The dates, sorted.
+    """
+    lastDay = datetime.fromtimestamp(end).replace(hour = 0, minute = 0, second = 0, microsecond = 0)
+    days = [lastDay - timedelta(days = i) for i in range(1, 366)]
+    weights = [WEEKDAY_WEIGHTS[day.weekday()] * (SUMMER_WEIGHT if day.month in (7, 8) else 1) for day in days]
+    midnights = [day.timestamp() for day in days]
+
+    dates = []
+
+    for midnight in rng.choices(midnights, weights, k = count):
+        # centered on half past nine in the evening, running on past midnight
+        hour = min(max(rng.gauss(21.5, 2.5), 12), 27.9)
+        dates.append(midnight + hour * 3600)
+
+    dates.sort()
+
+    return dates
+
+
+def generate(turfjeCount: int, personCount: int, reasonCount: int, seed: int = 0, end: float = None):
+    """Generates a committee.
+
+    Args:
+        turfjeCount (int): Amount of turfjes.
+        personCount (int): Amount of people.
+        reasonCount (int): Amount of reasons.
+        seed (int, optional): Seed, the same seed gives the same committee. Defaults to 0.
+        end (float, optional): Time the last turfje can be handed out. Defaults to None, which is 1 September 2024.
+
+    Returns:
+        dict: 'people', 'reasons', 'removalReasons' and 'turfjes', as stored in the json files.
+    """
+    rng = random.Random(seed)
+    end = datetime(2024, 9, 1).timestamp() if end is None else end
+
+    people = [{'id': id, 'name': f'Person {id}', 'position': POSITIONS[min(id, len(POSITIONS) - 1)]} for id in range(personCount)]
+    reasons = reason_names(reasonCount)
+
+    personIds = rng.choices(range(personCount), zipf_weights(personCount, rng), k = turfjeCount)
+    reasonAbbreviations = rng.choices(reasons, zipf_weights(reasonCount, rng), k = turfjeCount)
+
+    turfjes = []
+
+    for id, creationDate in enumerate(generate_creation_dates(turfjeCount, end, rng)):
+        removalDate = creationDate + rng.expovariate(1 / (REMOVAL_DAYS * 86400))
+        removed = removalDate < end and rng.random() >= NEVER_REMOVED
+
+        turfjes.append({
+            'id': id,
+            'personId': personIds[id],
+            'reasonAbbreviation': reasonAbbreviations[id],
+            'remReasonAbbreviation': rng.choice(REMOVAL_REASONS)[0] if removed else '',
+            'creationDate': creationDate,
+            'removed': removed,
+            'removalDate': removalDate if removed else None
+        })
+
+    return {
+        'people': people,
+        'reasons': [{'abbreviation': abbreviation, 'description': abbreviation.capitalize()} for abbreviation in reasons],
+        'removalReasons': [{'abbreviation': abbreviation, 'description': description, 'turfjeCount': turfjeCount}
+            for abbreviation, description, turfjeCount in REMOVAL_REASONS],
+        'turfjes': turfjes
+    }
+
+
+def write_json(committee: dict):
+    """Writes a committee into ./data as json files. Rollups are left empty, DataBase rebuilds them when they are first used.
+
+    Args:
+        committee (dict): The result of generate.
+    """
+    os.makedirs('./data', exist_ok = True)
+
+    files = {
+        'settings': {'currentTurfjeID': len(committee['turfjes']) - 1, 'currentPersonID': len(committee['people']) - 1},
+        'usersettings': {'reasons': committee['reasons'], 'removalReasons': committee['removalReasons']},
+        'people': committee['people'],
+        'turfjes': committee['turfjes'],
+        'rollups': []
+    }
+
+    for name, data in files.items():
+        with open(f'./data/{name}.json', 'w') as file:
+            json.dump(data, file)
+
+
+def write_sqlite(committee: dict):
+    """Writes a committee into the SQLite database in ./data. Rollups are left empty, DataBase rebuilds them when they are first used.
+
+    Args:
+        committee (dict): The result of generate.
+    """
+    os.makedirs('./data', exist_ok = True)
+
+    store = SqliteStore(durability = 'none')
+
+    with store.transaction():
+        connection = store.connection
+
+        connection.execute("INSERT OR REPLACE INTO counters VALUES ('currentTurfjeID', ?), ('currentPersonID', ?)",
+            (len(committee['turfjes']) - 1, len(committee['people']) - 1))
+        connection.executemany('INSERT INTO people VALUES (:id, :name, :position)', committee['people'])
+        connection.executemany('INSERT INTO reasons VALUES (:abbreviation, :description)', committee['reasons'])
+        connection.executemany('INSERT INTO removal_reasons VALUES (:abbreviation, :description, :turfjeCount)', committee['removalReasons'])
+        connection.executemany('INSERT INTO turfjes VALUES (:id, :personId, :reasonAbbreviation, :remReasonAbbreviation, :creationDate, :removed, :removalDate)',
+            committee['turfjes'])
+
+    store.connection.close()
@@ -0,0 +1,95 @@
+"""Compares the resident memory of the different in memory turfje representations.
+
+Usage:
+    python -m benchmarks.memory [--count 1000000]
+"""
+import argparse
+import random
+import tracemalloc
+from src.db.turfje import Turfje
+from src.db.turfjecolumns import TurfjeColumns
+
+
+class DictTurfje:
+    """The turfje model as it was before it got __slots__, for comparison.
+    """
+    def __init__(self, id, personId, reasonAbbreviation, remReasonAbbreviation, creationDate, removed = False):
+        self.id = id
+        self.personId = personId
+        self.reasonAbbreviation = reasonAbbreviation
+        self.remReasonAbbreviation = remReasonAbbreviation
+        self.creationDate = creationDate
+        self.removed = removed
+
+
+def generate(count: int):
+    """Generates turfje fields the way they come out of the json parser, every string being its own copy.
+
+    Args:
+        count (int): Amount of turfjes to generate.
+
+    Yields:
+        tuple: The fields of a single turfje.
+    """
+    reasons = ['B', 'LAAT', 'BORREL', 'VERGADERING']
+    removalReasons = ['KRAT', 'TAART']
+
+    for id in range(count):
+        removed = random.random() < 0.7
+
+        yield (
+            id,
+            random.randrange(40),
+            ''.join(list(random.choice(reasons))),
+            ''.join(list(random.choice(removalReasons))) if removed else '',
+            1.6e9 + id * 60.0,
+            removed)
+
+
+def measure(build, count: int):
+    """Measures the memory that is still allocated after building a turfje store.
+
+    Args:
+        build (function): Builds the store from an iterable of turfje fields.
+        count (int): Amount of turfjes to store.
+
+    Returns:
+        int: Allocated bytes.
+    """
+    tracemalloc.start()
+    store = build(generate(count))
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del store
+
+    return allocated
+
+
+def build_columns(turfjes):
+    columns = TurfjeColumns()
+
+    for fields in turfjes:
+        columns.append(Turfje(*fields))
+
+    return columns
+
+
+STORES = {
+    'list of objects with __dict__': lambda turfjes: [DictTurfje(*fields) for fields in turfjes],
+    'list of slotted Turfje objects': lambda turfjes: [Turfje(*fields) for fields in turfjes],
+    'TurfjeColumns': build_columns,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type = int, default = 1000000, help = 'amount of turfjes to store')
+    args = parser.parse_args()
+
+    random.seed(0)
+
+    for name, build in STORES.items():
+        allocated = measure(build, args.count)
+
+        print(f'{name:32} {allocated / 2 ** 20:8.1f} MiB  {allocated / args.count:6.1f} bytes/turfje')
@@ -0,0 +1,95 @@
+"""Times DataBase startup on a generated data directory, with and without lazy loading and the binary cache.
+
+Usage:
+    python -m benchmarks.startup [--turfjes 1000000] [--people 40]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from src.db.database import DataBase
+
+
+def write_data(turfjeCount: int, personCount: int):
+    """Writes json files for a committee with the given amount of turfjes into ./data, dated in the past so they can be cached.
+
+    Args:
+        turfjeCount (int): Amount of turfjes.
+        personCount (int): Amount of people.
+    """
+    os.mkdir('./data')
+
+    files = {
+        'settings': {'currentTurfjeID': turfjeCount - 1, 'currentPersonID': personCount - 1},
+        'usersettings': {
+            'reasons': [{'abbreviation': 'B', 'description': 'Bier'}],
+            'removalReasons': [{'abbreviation': 'KRAT', 'description': 'Krat', 'turfjeCount': 24}]
+        },
+        'people': [{'id': id, 'name': f'Person {id}', 'position': 'Lid'} for id in range(personCount)],
+        'turfjes': [{
+            'id': id,
+            'personId': random.randrange(personCount),
+            'reasonAbbreviation': 'B',
+            'remReasonAbbreviation': '',
+            'creationDate': 1.6e9 + id * 60.0,
+            'removed': False
+        } for id in range(turfjeCount)]
+    }
+
+    past = time.time() - 60
+
+    for name, data in files.items():
+        path = f'./data/{name}.json'
+
+        with open(path, 'w') as file:
+            json.dump(data, file)
+
+        os.utime(path, (past, past))
+
+
+def time_startup(touch, **options):
+    """Times creating a DataBase and doing the first call on it.
+
+    Args:
+        touch (function): The first call, gets the DataBase.
+        **options: Passed to DataBase.
+
+    Returns:
+        float: Seconds taken.
+    """
+    start = time.perf_counter()
+    touch(DataBase(**options))
+
+    return time.perf_counter() - start
+
+
+def touch_everything(db):
+    for name in db.managerFactories:
+        db.get_manager(name)
+
+
+SCENARIOS = [
+    ('load every manager', touch_everything, {}),
+    ('only get_person', lambda db: db.get_person(0), {}),
+    ('get_turfje, cache cold', lambda db: db.get_turfje(0), {'cache': True}),
+    ('get_turfje, cache warm', lambda db: db.get_turfje(0), {'cache': True}),
+    ('get_turfje, cache warm, columnar', lambda db: db.get_turfje(0), {'cache': True, 'columnar': True}),
+]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--turfjes', type = int, default = 1000000, help = 'amount of turfjes in the data directory')
+    parser.add_argument('--people', type = int, default = 40, help = 'amount of people in the data directory')
+    args = parser.parse_args()
+
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        write_data(args.turfjes, args.people)
+
+        for name, touch, options in SCENARIOS:
+            print(f'{name:34} {time_startup(touch, **options):8.3f} s')
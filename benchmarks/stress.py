@@ -0,0 +1,100 @@
+"""Hammers a single DataBase from a thread pool and checks that no turfjes or IDs got lost or handed out twice.
+
+Usage:
+    python -m benchmarks.stress [--threads 16] [--operations 2000] [--backend json]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.db.database import DataBase
+
+
+def worker(db, seed: int, operations: int, personCount: int):
+    """Does a random mix of reads and writes.
+
+    Args:
+        db (DataBase): The shared db.
+        seed (int): Seed for this workers random choices.
+        operations (int): Amount of calls to make.
+        personCount (int): Amount of people in the db.
+
+    Returns:
+        (int, int): Amount of turfjes created and amount of removal calls made.
+    """
+    random.seed(seed)
+    created = 0
+    removals = 0
+
+    for i in range(operations):
+        personId = random.randrange(personCount)
+        choice = random.random()
+
+        if choice < 0.4:
+            db.create_turfje(personId, 'B', time.time())
+            created += 1
+        elif choice < 0.45:
+            db.remove_turfjes(personId, db.get_removal_reason('AD'))
+            removals += 1
+        elif choice < 0.7:
+            db.get_turfjes(personId)
+        elif choice < 0.85:
+            db.get_person(personId)
+        else:
+            db.get_reason('B')
+
+    return created, removals
+
+
+def check(condition: bool, message: str):
+    if not condition:
+        print(f'FAILED: {message}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type = int, default = 16, help = 'amount of threads')
+    parser.add_argument('--operations', type = int, default = 2000, help = 'amount of calls per thread')
+    parser.add_argument('--backend', default = 'json', help = 'backend to test')
+    parser.add_argument('--people', type = int, default = 10, help = 'amount of people')
+    args = parser.parse_args()
+
+    # switch threads as often as possible, so races show up within a short run
+    sys.setswitchinterval(1e-6)
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+
+        db = DataBase(backend = args.backend, journal = True)
+        db.reset()
+        db.create_reason('B', 'Bier')
+        db.create_removal_reason('AD', 'Adtje', 1)
+
+        for i in range(args.people):
+            db.create_person(f'Person {i}', 'Lid')
+
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(args.threads) as pool:
+            results = list(pool.map(worker, [db] * args.threads, range(args.threads), [args.operations] * args.threads, [args.people] * args.threads))
+
+        duration = time.perf_counter() - start
+        created = sum(result[0] for result in results)
+
+        turfjes = [turfje for personId in range(args.people) for turfje in db.get_turfjes(personId)]
+        ids = [turfje.id for turfje in turfjes]
+
+        check(len(turfjes) == created, f'{created} turfjes created but {len(turfjes)} stored')
+        check(len(set(ids)) == len(ids), 'a turfje ID was handed out twice')
+        check(sorted(ids) == list(range(created)), 'turfje IDs have gaps')
+
+        reloaded = DataBase(backend = args.backend, journal = True)
+        reloadedTurfjes = [turfje for personId in range(args.people) for turfje in reloaded.get_turfjes(personId)]
+
+        check(sorted((turfje.id, turfje.removed) for turfje in reloadedTurfjes) == sorted((turfje.id, turfje.removed) for turfje in turfjes), 'the data on disk differs from the data in memory')
+
+        print(f'{args.threads * args.operations} calls from {args.threads} threads in {duration:.2f} s, {created} turfjes created, all checks passed')
@@ -0,0 +1,228 @@
+"""Times every common DataBase operation on generated committees of several sizes and writes the results to a json file, so runs on different commits can be compared.
+
+Every size gets a fresh data directory. Operations are called up to --repeat times, or until --max-time seconds are spent on them, and run in the order below, reset last.
+
+Usage:
+    python -m benchmarks.suite [--sizes 1000 100000 1000000] [--people 40] [--reasons 8] [--options '{"journal": true}'] [--output benchmark-results.json] [--compare old-results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from src.db.database import DataBase
+from benchmarks.dataset import generate, write_json, write_sqlite, REMOVAL_REASONS
+
+
+def summarize(times):
+    """Summarizes the durations of the calls to an operation.
+
+    Args:
+        times (List(float)): Seconds taken by every call.
+
+    Returns:
+        dict: Amount of calls, and the total, mean, median, 95th percentile, min and max in seconds.
+    """
+    ordered = sorted(times)
+
+    return {
+        'calls': len(times),
+        'total': sum(times),
+        'mean': statistics.mean(times),
+        'median': statistics.median(times),
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'min': ordered[0],
+        'max': ordered[-1]
+    }
+
+
+def time_calls(call, repeat: int, maxTime: float):
+    """Calls an operation repeatedly, timing every call.
+
+    Args:
+        call (function): The operation, gets the number of the call.
+        repeat (int): Maximum amount of calls.
+        maxTime (float): Stop after the call that goes past this many seconds. There is always at least one call.
+
+    Returns:
+        dict: See summarize.
+    """
+    times = []
+    deadline = time.perf_counter() + maxTime
+
+    for i in range(repeat):
+        start = time.perf_counter()
+        call(i)
+        times.append(time.perf_counter() - start)
+
+        if time.perf_counter() > deadline:
+            break
+
+    return summarize(times)
+
+
+def open_db(options: dict):
+    """Opens a DataBase and loads every manager, which is what startup costs before the first screen is shown.
+
+    Args:
+        options (dict): Passed to DataBase.
+
+    Returns:
+        DataBase: The opened db.
+    """
+    db = DataBase(**options)
+
+    for name in db.managerFactories:
+        db.get_manager(name)
+
+    return db
+
+
+def prepare(size: int, personCount: int, reasonCount: int, options: dict):
+    """Fills ./data with a generated committee, in the format the options ask for, with the rollups built.
+
+    Args:
+        size (int): Amount of turfjes.
+        personCount (int): Amount of people.
+        reasonCount (int): Amount of reasons.
+        options (dict): Passed to DataBase.
+    """
+    committee = generate(size, personCount, reasonCount)
+
+    if options.get('backend', 'json') == 'sqlite':
+        write_sqlite(committee)
+    else:
+        write_json(committee)
+
+    db = open_db(options)
+    db.migrate_files()
+    db.close()
+
+
+def run(size: int, personCount: int, reasonCount: int, options: dict, repeat: int, maxTime: float):
+    """Times every operation on a committee with size turfjes.
+
+    Args:
+        size (int): Amount of turfjes.
+        personCount (int): Amount of people.
+        reasonCount (int): Amount of reasons.
+        options (dict): Passed to DataBase.
+        repeat (int): See time_calls.
+        maxTime (float): See time_calls.
+
+    Returns:
+        List(dict): A result per operation, see summarize, with the size and name of the operation added.
+    """
+    prepare(size, personCount, reasonCount, options)
+
+    rng = random.Random(size)
+    now = time.time()
+    results = {}
+
+    def startup(i):
+        open_db(options).close()
+
+    results['startup'] = time_calls(startup, repeat, maxTime)
+
+    db = open_db(options)
+    removalReason = db.get_removal_reason(REMOVAL_REASONS[0][0])
+
+    operations = [
+        ('create_turfje', lambda i: db.create_turfje(rng.randrange(personCount), 'B', now + i)),
+        ('remove_turfjes', lambda i: db.remove_turfjes(rng.randrange(personCount), removalReason)),
+        ('get_turfjes', lambda i: db.get_turfjes(rng.randrange(personCount))),
+        ('create_person', lambda i: db.create_person(f'New person {i}', 'Lid')),
+        ('update_person', lambda i: db.update_person(rng.randrange(personCount), name = f'Renamed {i}')),
+        ('reset', lambda i: db.reset())
+    ]
+
+    for name, call in operations:
+        # reset empties the db, so every call after the first would time an empty reset
+        results[name] = time_calls(call, 1 if name == 'reset' else repeat, maxTime)
+
+    db.close()
+
+    return [{'turfjes': size, 'operation': name, **summary} for name, summary in results.items()]
+
+
+def git_commit():
+    """Gets the commit the benchmarked code is at.
+
+    Returns:
+        str: The commit hash, None when it can't be found.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output = True, text = True, check = True,
+            cwd = os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previousPath: str):
+    """Prints how the medians changed since an earlier run.
+
+    Args:
+        results (List(dict)): The results of this run.
+        previousPath (str): Path of the output of the earlier run.
+    """
+    with open(previousPath) as file:
+        previous = {(result['turfjes'], result['operation']): result for result in json.load(file)['results']}
+
+    print(f'\ncompared to {previousPath}:')
+
+    for result in results:
+        old = previous.get((result['turfjes'], result['operation']))
+
+        if old is not None and old['median'] > 0:
+            print(f'{result["turfjes"]:>9} {result["operation"]:16} {result["median"] / old["median"]:6.2f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type = int, nargs = '+', default = [1000, 100000, 1000000], help = 'amounts of turfjes to benchmark')
+    parser.add_argument('--people', type = int, default = 40, help = 'amount of people')
+    parser.add_argument('--reasons', type = int, default = 8, help = 'amount of reasons')
+    parser.add_argument('--options', type = json.loads, default = {}, help = 'DataBase options as a json object')
+    parser.add_argument('--repeat', type = int, default = 50, help = 'maximum amount of calls per operation')
+    parser.add_argument('--max-time', type = float, default = 10, help = 'seconds after which an operation is not called again')
+    parser.add_argument('--output', default = 'benchmark-results.json', help = 'file the results are written to')
+    parser.add_argument('--compare', help = 'results of an earlier run to compare with')
+    args = parser.parse_args()
+
+    # the data directories are temporary, the result files are not
+    output = os.path.abspath(args.output)
+    previousPath = os.path.abspath(args.compare) if args.compare else None
+
+    results = []
+
+    print(f'{"turfjes":>9} {"operation":16} {"calls":>5} {"median":>10} {"p95":>10} {"max":>10}')
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+
+            for result in run(size, args.people, args.reasons, args.options, args.repeat, args.max_time):
+                results.append(result)
+                print(f'{size:>9} {result["operation"]:16} {result["calls"]:>5} {result["median"] * 1000:8.2f}ms {result["p95"] * 1000:8.2f}ms {result["max"] * 1000:8.2f}ms')
+
+    with open(output, 'w') as file:
+        json.dump({
+            'commit': git_commit(),
+            'date': datetime.now().isoformat(timespec = 'seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'people': args.people,
+            'reasons': args.reasons,
+            'options': args.options,
+            'results': results
+        }, file, indent = 2)
+
+    print(f'\nresults written to {output}')
+
+    if previousPath is not None:
+        compare(results, previousPath)
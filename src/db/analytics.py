@@ -0,0 +1,129 @@
+import time
+from src.db.reasoncodes import reasonCodes
+
+try:
+    import numpy
+except ImportError:
+    # analytics are optional, the rest of the db works without numpy
+    numpy = None
+
+
+def local_hours(timestamps):
+    """Gets the hour of the day in local time of every timestamp.
+
+    Args:
+        timestamps (numpy.ndarray): The timestamps.
+
+    Returns:
+        numpy.ndarray: The hours, from 0 to 23.
+    """
+    days, inverse = numpy.unique(timestamps // 86400, return_inverse = True)
+
+    # the offset from UTC only changes with daylight saving time, so it is looked up at the start and end of every (UTC) day instead of per timestamp
+    starts = numpy.array([time.localtime(day * 86400).tm_gmtoff for day in days.tolist()], dtype = numpy.float64)
+    ends = numpy.array([time.localtime(day * 86400 + 86399).tm_gmtoff for day in days.tolist()], dtype = numpy.float64)
+
+    offsets = starts[inverse]
+
+    # on days the clocks change, the offset is looked up per timestamp
+    rows = numpy.flatnonzero((starts != ends)[inverse])
+    offsets[rows] = [time.localtime(timestamp).tm_gmtoff for timestamp in timestamps[rows].tolist()]
+
+    return ((timestamps + offsets) // 3600 % 24).astype(numpy.int64)
+
+
+class TurfjeAnalytics:
+    """Snapshot of the turfje history in NumPy columns, for aggregate questions over all turfjes such as the year-end report. The columns are built once, after which every question is a vectorized group-by instead of a loop over turfjes. Changes made to the db afterwards are not seen, get a new snapshot with DataBase.get_analytics.
+
+    Args:
+        columns (TurfjeColumns): The turfjes. The snapshot shares their memory, so they must not change anymore.
+        people (iterable of Person): The people, for their committee positions.
+
+    Raises:
+        RuntimeError: Raised when numpy is not installed.
+    """
+    def __init__(self, columns, people):
+        if numpy is None:
+            raise RuntimeError("Analytics need numpy, install it with pip install numpy.")
+
+        self.personIds = numpy.frombuffer(columns.personIds, dtype = numpy.int64)
+        self.reasonCodes = numpy.frombuffer(columns.reasonCodes, dtype = numpy.uint16)
+        self.remReasonCodes = numpy.frombuffer(columns.remReasonCodes, dtype = numpy.uint16)
+        self.creationDates = numpy.frombuffer(columns.creationDates, dtype = numpy.float64)
+        self.removed = numpy.frombuffer(columns.removed, dtype = numpy.int8).astype(bool)
+        self.removalDates = numpy.frombuffer(columns.removalDates, dtype = numpy.float64)
+
+        # the position of every turfjes person as an index into self.positions, -1 for people that were deleted
+        people = sorted(people, key = lambda person: person.id)
+        self.positions = sorted({person.position for person in people})
+
+        self.positionCodes = numpy.full(len(self.personIds), -1, dtype = numpy.int64)
+
+        if len(people) > 0:
+            knownIds = numpy.array([person.id for person in people], dtype = numpy.int64)
+            positionOfPerson = numpy.array([self.positions.index(person.position) for person in people], dtype = numpy.int64)
+
+            rows = numpy.searchsorted(knownIds, self.personIds).clip(max = len(knownIds) - 1)
+            known = knownIds[rows] == self.personIds
+
+            self.positionCodes[known] = positionOfPerson[rows[known]]
+
+
+    def per_position(self):
+        """Gets how many turfjes the people of every committee position got, and how many of those are still active. Turfjes of deleted people are left out.
+
+        Returns:
+            dict: (given, active) by position.
+        """
+        known = self.positionCodes >= 0
+        given = numpy.bincount(self.positionCodes[known], minlength = len(self.positions))
+        active = numpy.bincount(self.positionCodes[known & ~self.removed], minlength = len(self.positions))
+
+        return {position: (int(given[code]), int(active[code])) for code, position in enumerate(self.positions)}
+
+
+    def removal_ratios(self):
+        """Gets the part of the turfjes given for every reason that has been removed.
+
+        Returns:
+            dict: The ratio from 0 to 1 by reason abbreviation, for reasons with any turfjes.
+        """
+        given = numpy.bincount(self.reasonCodes)
+        removed = numpy.bincount(self.reasonCodes, weights = self.removed)
+
+        return {reasonCodes.decode(code): float(removed[code] / given[code]) for code in numpy.flatnonzero(given).tolist()}
+
+
+    def average_removal_times(self, removal: bool = False):
+        """Gets the average time between a turfje being given and removed, per reason. Turfjes removed before removal dates were kept are left out.
+
+        Args:
+            removal (bool, optional): Group by removal reason instead of by the reason the turfje was given. Defaults to False.
+
+        Returns:
+            dict: The average in seconds by reason abbreviation, for reasons with any removed turfjes.
+        """
+        timed = self.removed & ~numpy.isnan(self.removalDates)
+        codes = (self.remReasonCodes if removal else self.reasonCodes)[timed]
+
+        counts = numpy.bincount(codes)
+        totals = numpy.bincount(codes, weights = self.removalDates[timed] - self.creationDates[timed])
+
+        return {reasonCodes.decode(code): float(totals[code] / counts[code]) for code in numpy.flatnonzero(counts).tolist()}
+
+
+    def hour_histogram(self, removal: bool = False):
+        """Gets how many turfjes were given in every hour of the day, in local time.
+
+        Args:
+            removal (bool, optional): Count turfjes by the hour they were removed instead. Defaults to False.
+
+        Returns:
+            List(int): 24 counts, starting at midnight.
+        """
+        if removal:
+            timestamps = self.removalDates[~numpy.isnan(self.removalDates)]
+        else:
+            timestamps = self.creationDates
+
+        return numpy.bincount(local_hours(timestamps), minlength = 24).tolist()
@@ -0,0 +1,212 @@
+import asyncio
+import functools
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from src.db.database import DataBase
+
+
+def mirror(name: str, writes: bool):
+    """Creates a coroutine method for AsyncDataBase that calls the DataBase method with the same name.
+
+    Args:
+        name (str): Name of the DataBase method.
+        writes (bool): Whether the method changes the db, in which case a flush is scheduled after it.
+
+    Returns:
+        function: The coroutine method.
+    """
+    method = getattr(DataBase, name)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        await self.wait_for_batch()
+
+        result = method(self.db, *args, **kwargs)
+
+        if writes:
+            self.schedule_flush()
+
+        return result
+
+    return wrapper
+
+
+class AsyncDataBase:
+    """Asyncio version of DataBase, with the same methods as coroutines. Everything is done in memory on the event loop, so calls return right away. Writing to disk is deferred to a single background thread: after a change a flush is scheduled, and all changes made before that flush starts are written together, in order.
+
+    Use await flush() to wait until everything done so far is on disk, and close() (or async with) when done. batch() groups changes so they are rolled back together; while a task runs a batch, calls from other tasks wait for it to end. Running in journal mode keeps the background writes small; without it every flush serializes the full turfje list, during which turfjes can't be read.
+
+    Usage:
+        async with AsyncDataBase(journal = True) as db:
+            await db.create_turfje(personId, 'B')
+
+    Args:
+        **options: Passed to DataBase.
+    """
+    def __init__(self, **options):
+        self.db = DataBase(**options)
+        self.db.defer_writes()
+
+        # a single thread, so flushes run one after the other in the order they were scheduled
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix = 'AsyncDataBase-flush')
+        self.flushScheduled = False
+        self.lastFlush = None
+
+        # the locks of the db belong to the thread of the event loop, so they can't keep other tasks out of a batch
+        self.batchLock = asyncio.Lock()
+        self.batchTask = None
+
+
+    def schedule_flush(self):
+        """Schedules a flush in the background, unless a scheduled flush has not started yet. That one will pick up the latest changes as well, so a burst of changes leads to a single write.
+        """
+        if self.flushScheduled:
+            return
+
+        self.flushScheduled = True
+        self.lastFlush = asyncio.get_running_loop().run_in_executor(self.executor, self.run_flush)
+
+
+    def run_flush(self):
+        """Flushes the db, runs on the background thread.
+        """
+        # cleared before collecting the changes, so changes made during this flush schedule a new one
+        self.flushScheduled = False
+
+        self.db.flush()
+
+
+    async def wait_for_batch(self):
+        """Waits until a batch run by another task has ended, so that task can't roll back changes made outside of it or show them its own.
+        """
+        if self.batchTask is not None and self.batchTask is not asyncio.current_task():
+            async with self.batchLock:
+                pass
+
+
+    @asynccontextmanager
+    async def batch(self):
+        """Async version of DataBase.batch: if the block raises an exception all changes made inside it are rolled back. Writes are deferred anyway, so the changes are written by a single flush after the block either way. Other tasks using the db wait until the block ends. Don't await flush or close inside the block, the flush waits for the batch to end.
+
+        Usage:
+            async with db.batch():
+                await db.create_turfje(personId, 'B')
+                await db.create_turfje(personId, 'B')
+
+        Yields:
+            AsyncDataBase: This db.
+        """
+        # nested batches are part of the outermost one
+        if self.batchTask is asyncio.current_task():
+            with self.db.batch():
+                yield self
+
+            return
+
+        async with self.batchLock:
+            self.batchTask = asyncio.current_task()
+
+            try:
+                with self.db.batch():
+                    yield self
+            finally:
+                self.batchTask = None
+                self.schedule_flush()
+
+
+    transaction = batch
+
+
+    async def iter_turfjes(self, *args, **kwargs):
+        """Async generator version of DataBase.iter_turfjes, see there for the arguments.
+
+        Usage:
+            async for turfje in db.iter_turfjes(personId):
+                ...
+
+        Yields:
+            Turfje: The turfjes, in order.
+        """
+        await self.wait_for_batch()
+
+        for turfje in self.db.iter_turfjes(*args, **kwargs):
+            yield turfje
+
+
+    async def flush(self):
+        """Waits until all changes made so far are written to disk.
+
+        Raises:
+            ValueError: Raised inside a batch, which the flush would wait for forever.
+        """
+        if self.batchTask is not None and self.batchTask is asyncio.current_task():
+            raise ValueError("Can't flush inside a batch")
+
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.run_flush)
+
+
+    async def close(self):
+        """Writes all changes to disk and stops the background thread.
+        """
+        await self.flush()
+
+        self.executor.shutdown()
+
+
+    async def __aenter__(self):
+        return self
+
+
+    async def __aexit__(self, *exception):
+        await self.close()
+
+
+    # ----------- UserSettings -----------
+    get_reason = mirror('get_reason', writes = False)
+    create_reason = mirror('create_reason', writes = True)
+    delete_reason = mirror('delete_reason', writes = True)
+    get_removal_reason = mirror('get_removal_reason', writes = False)
+    create_removal_reason = mirror('create_removal_reason', writes = True)
+    delete_removal_reason = mirror('delete_removal_reason', writes = True)
+
+    # ----------- Turfje -----------
+    get_turfje = mirror('get_turfje', writes = False)
+    get_turfjes = mirror('get_turfjes', writes = False)
+    get_turfjes_between = mirror('get_turfjes_between', writes = False)
+    get_turfje_counts = mirror('get_turfje_counts', writes = False)
+    get_reason_counts = mirror('get_reason_counts', writes = False)
+    leaderboard = mirror('leaderboard', writes = False)
+    get_turfje_page = mirror('get_turfje_page', writes = False)
+    create_turfje = mirror('create_turfje', writes = True)
+    remove_turfjes = mirror('remove_turfjes', writes = True)
+
+    # ----------- Person -----------
+    get_person = mirror('get_person', writes = False)
+    create_person = mirror('create_person', writes = True)
+    update_person = mirror('update_person', writes = True)
+    delete_person = mirror('delete_person', writes = True)
+
+    # ----------- Rollups -----------
+    get_rollups = mirror('get_rollups', writes = False)
+    rebuild_rollups = mirror('rebuild_rollups', writes = True)
+
+    # ----------- Analytics -----------
+    get_analytics = mirror('get_analytics', writes = False)
+
+    # ----------- Import -----------
+    import_people = mirror('import_people', writes = True)
+    import_turfjes = mirror('import_turfjes', writes = True)
+    import_people_csv = mirror('import_people_csv', writes = True)
+    import_turfjes_csv = mirror('import_turfjes_csv', writes = True)
+
+    # ----------- History -----------
+    as_of = mirror('as_of', writes = False)
+    checkpoint_history = mirror('checkpoint_history', writes = True)
+
+    # ----------- General -----------
+    reset = mirror('reset', writes = True)
+    compact = mirror('compact', writes = True)
+    compact_partitions = mirror('compact_partitions', writes = True)
+    migrate_files = mirror('migrate_files', writes = True)
+    stats = mirror('stats', writes = False)
+    query_cache_stats = mirror('query_cache_stats', writes = False)
@@ -0,0 +1,373 @@
+import json
+import math
+import struct
+import sys
+import zlib
+from array import array
+
+# binary files start with this, json files never do
+MAGIC = b'TGMB'
+VERSION = 1
+
+# flags in the header of binary files
+COMPRESSED = 1
+
+# column types of the binary table format, with the array typecode they are stored as
+INT = b'q'
+FLOAT = b'd'
+OPTIONAL_FLOAT = b'n'
+BOOL = b'b'
+STRING = b's'
+
+
+class JsonCodec:
+    """Stores data as json, readable by anything but verbose: every record repeats its keys.
+    """
+    name = 'json'
+
+    def encode(self, data):
+        """Converts data into the bytes of a file.
+
+        Args:
+            data (dict or List): The data to be stored.
+
+        Returns:
+            bytes: The file contents.
+        """
+        return json.dumps(data).encode()
+
+
+    def decode(self, content: bytes):
+        """Converts the bytes of a file back into data.
+
+        Args:
+            content (bytes): The file contents.
+
+        Returns:
+            dict or List: The stored data.
+        """
+        return json.loads(content)
+
+
+class BinaryCodec:
+    """Stores a list of records (dicts with the same keys, or lists of the same length) as a table: the keys once, followed by every column as a typed array. Strings are stored once per column, with an index per record, which suits abbreviations. A dict holding such lists stores every value on its own, so the lists become tables. Anything else is stored as json inside the binary file.
+
+    Args:
+        compress (bool, optional): Compress the file with zlib. Defaults to False.
+    """
+    def __init__(self, compress: bool = False):
+        self.compress = compress
+        self.name = 'binary-zlib' if compress else 'binary'
+
+
+    def encode(self, data):
+        """Converts data into the bytes of a file.
+
+        Args:
+            data (dict or List): The data to be stored.
+
+        Returns:
+            bytes: The file contents.
+        """
+        payload = encode_payload(data)
+        flags = 0
+
+        if self.compress:
+            payload = zlib.compress(payload, 1)
+            flags |= COMPRESSED
+
+        return MAGIC + bytes((VERSION, flags)) + payload
+
+
+    def decode(self, content: bytes):
+        """Converts the bytes of a file back into data.
+
+        Args:
+            content (bytes): The file contents.
+
+        Raises:
+            ValueError: Raised when the file was written by a newer version.
+
+        Returns:
+            dict or List: The stored data.
+        """
+        version, flags = content[len(MAGIC)], content[len(MAGIC) + 1]
+
+        if version != VERSION:
+            raise ValueError(f"Unknown binary file version: {version}")
+
+        payload = content[len(MAGIC) + 2:]
+
+        if flags & COMPRESSED:
+            payload = zlib.decompress(payload)
+
+        return decode_payload(payload)
+
+
+CODECS = {codec.name: codec for codec in (JsonCodec(), BinaryCodec(), BinaryCodec(compress = True))}
+
+
+def get_codec(name: str):
+    """Gets a codec by its name.
+
+    Args:
+        name (str): One of CODECS.
+
+    Raises:
+        ValueError: Raised when an unknown codec is given.
+
+    Returns:
+        JsonCodec or BinaryCodec: The codec.
+    """
+    if name not in CODECS:
+        raise ValueError(f"Unknown codec: {name}")
+
+    return CODECS[name]
+
+
+def detect_codec(content: bytes):
+    """Finds out which codec wrote a file.
+
+    Args:
+        content (bytes): The file contents.
+
+    Returns:
+        JsonCodec or BinaryCodec: The codec.
+    """
+    if not content.startswith(MAGIC):
+        return CODECS['json']
+
+    return CODECS['binary-zlib' if content[len(MAGIC) + 1] & COMPRESSED else 'binary']
+
+
+def column_type(values):
+    """Finds the column type all values of a column fit in.
+
+    Args:
+        values (List): The values.
+
+    Returns:
+        bytes: One of the column types, None when the values don't fit any.
+    """
+    types = set(map(type, values))
+
+    if types <= {bool}:
+        return BOOL
+    elif types <= {int} and all(-2 ** 63 <= value < 2 ** 63 for value in values):
+        return INT
+    elif types <= {int, float}:
+        return FLOAT
+    elif types <= {int, float, type(None)}:
+        return OPTIONAL_FLOAT
+    elif types <= {str}:
+        return STRING
+
+    return None
+
+
+def little_endian(values: array):
+    """Makes sure an array is stored little endian, so files can be moved between machines. Swaps in place.
+
+    Args:
+        values (array): The array.
+
+    Returns:
+        array: The same array.
+    """
+    if sys.byteorder == 'big':
+        values.byteswap()
+
+    return values
+
+
+def encode_payload(data):
+    """Encodes data as a table, a dict of payloads or json, whichever fits.
+
+    Args:
+        data (dict or List): The data to be stored.
+
+    Returns:
+        bytes: The payload.
+    """
+    if isinstance(data, dict) and any(isinstance(value, list) for value in data.values()) and all(isinstance(key, str) for key in data):
+        parts = [b'D', struct.pack('<I', len(data))]
+
+        for key, value in data.items():
+            encodedKey = key.encode()
+            payload = encode_payload(value)
+            parts.append(struct.pack('<H', len(encodedKey)) + encodedKey + struct.pack('<Q', len(payload)) + payload)
+
+        return b''.join(parts)
+
+    table = encode_table(data)
+
+    if table is not None:
+        return table
+
+    return b'J' + json.dumps(data).encode()
+
+
+def decode_payload(payload: bytes):
+    """Decodes a payload written by encode_payload.
+
+    Args:
+        payload (bytes): The payload.
+
+    Returns:
+        dict or List: The data.
+    """
+    kind = payload[:1]
+
+    if kind == b'J':
+        return json.loads(payload[1:])
+    elif kind != b'D':
+        return decode_table(payload)
+
+    count, = struct.unpack_from('<I', payload, 1)
+    position = 5
+    data = {}
+
+    for i in range(count):
+        keyLength, = struct.unpack_from('<H', payload, position)
+        position += 2
+        key = payload[position:position + keyLength].decode()
+        position += keyLength
+
+        valueLength, = struct.unpack_from('<Q', payload, position)
+        position += 8
+        data[key] = decode_payload(payload[position:position + valueLength])
+        position += valueLength
+
+    return data
+
+
+def encode_table(data):
+    """Encodes a list of records as a table.
+
+    Args:
+        data (dict or List): The data to be stored.
+
+    Returns:
+        bytes: The table, None when the data isn't a list of records that fit the column types.
+    """
+    if not isinstance(data, list):
+        return None
+
+    if len(data) == 0:
+        return b'T' + struct.pack('<IH', 0, 0)
+
+    first = data[0]
+
+    if isinstance(first, dict):
+        kind = b'T'
+        names = list(first)
+
+        # every record needs the same keys, in the same order
+        if any(list(record) != names for record in data):
+            return None
+
+        columns = [[record[name] for record in data] for name in names]
+    elif isinstance(first, list):
+        kind = b'L'
+        names = [''] * len(first)
+
+        if any(not isinstance(record, list) or len(record) != len(names) for record in data):
+            return None
+
+        columns = [list(column) for column in zip(*data)]
+    else:
+        return None
+
+    parts = [kind, struct.pack('<IH', len(data), len(names))]
+
+    for name, values in zip(names, columns):
+        type = column_type(values)
+
+        if type is None:
+            return None
+
+        encodedName = name.encode()
+        parts.append(struct.pack('<H', len(encodedName)) + encodedName + type)
+
+        if type == STRING:
+            strings = list(dict.fromkeys(values))
+            indexes = {string: index for index, string in enumerate(strings)}
+
+            parts.append(struct.pack('<I', len(strings)))
+
+            for string in strings:
+                encodedString = string.encode()
+                parts.append(struct.pack('<I', len(encodedString)) + encodedString)
+
+            parts.append(little_endian(array('I', [indexes[value] for value in values])).tobytes())
+        elif type == OPTIONAL_FLOAT:
+            parts.append(little_endian(array('d', [math.nan if value is None else value for value in values])).tobytes())
+        else:
+            parts.append(little_endian(array(type.decode(), values)).tobytes())
+
+    return b''.join(parts)
+
+
+def decode_table(payload: bytes):
+    """Decodes a table written by encode_table.
+
+    Args:
+        payload (bytes): The table.
+
+    Returns:
+        List: The records.
+    """
+    kind = payload[:1]
+    rowCount, columnCount = struct.unpack_from('<IH', payload, 1)
+    position = 1 + struct.calcsize('<IH')
+
+    names = []
+    columns = []
+
+    for i in range(columnCount):
+        nameLength, = struct.unpack_from('<H', payload, position)
+        position += 2
+        names.append(payload[position:position + nameLength].decode())
+        position += nameLength
+
+        type = payload[position:position + 1]
+        position += 1
+
+        if type == STRING:
+            stringCount, = struct.unpack_from('<I', payload, position)
+            position += 4
+            strings = []
+
+            for j in range(stringCount):
+                stringLength, = struct.unpack_from('<I', payload, position)
+                position += 4
+                strings.append(payload[position:position + stringLength].decode())
+                position += stringLength
+
+            indexes = little_endian(array('I', payload[position:position + rowCount * 4]))
+            position += rowCount * 4
+
+            columns.append([strings[index] for index in indexes])
+        else:
+            typecode = 'd' if type == OPTIONAL_FLOAT else type.decode()
+            values = array(typecode)
+            size = rowCount * values.itemsize
+
+            values.frombytes(payload[position:position + size])
+            position += size
+            little_endian(values)
+
+            if type == OPTIONAL_FLOAT:
+                columns.append([None if math.isnan(value) else value for value in values])
+            elif type == BOOL:
+                columns.append([bool(value) for value in values])
+            else:
+                columns.append(values.tolist())
+
+    if rowCount == 0:
+        return []
+
+    if kind == b'L':
+        return [list(record) for record in zip(*columns)]
+
+    return [dict(zip(names, record)) for record in zip(*columns)]
@@ -1,25 +1,417 @@
+import atexit
+import csv
+import functools
 import os
+import threading
 import time
+from contextlib import contextmanager, ExitStack
 from src.db.settings import Settings
 from src.db.usersettings import UserSettings
-from src.db.turfje import TurfjeManager
+from src.db.turfje import TurfjeManager, TURFJE_ORDERS, turfje_key
+from src.db.partitions import PartitionedTurfjeManager
 from src.db.person import PersonManager
+from src.db.rollups import RollupManager, check_timestamp
+from src.db.history import HistoryManager, HistoryState, serialize_turfje, serialize_person, serialize_reason
+from src.db.analytics import TurfjeAnalytics
+from src.db.codecs import get_codec
+from src.db.metrics import Metrics, MetricsDumper, measured
+from src.db.querycache import QueryCache
 from src.db.reasons import RemovalReason
+from src.db.locks import ReadWriteLock, FileLock
+from src.db.flusher import GroupCommitFlusher
+from src.exceptions import PersonDoesNotExistError, ReasonError, ImportRowError
+from src.db.sqlitebackend import SqliteStore, SqliteSettings, SqliteUserSettings, SqliteTurfjeManager, SqlitePersonManager, SqliteRollupManager
+
+# every manager, in the order their locks are taken and their changes are flushed
+MANAGER_NAMES = ('settings', 'userSettings', 'turfjes', 'people', 'rollups', 'history')
+
+
+def locked(reads = (), writes = (), cached = False):
+    """Decorator for DataBase methods that holds the locks of the managers the method uses while it runs, see DataBase.lock_managers. Calls are measured, including the time spent waiting for the locks. The versions of the managers in writes are bumped afterwards.
+
+    Args:
+        reads (tuple(str), optional): Names of the managers that are only read. Defaults to ().
+        writes (tuple(str), optional): Names of the managers that are changed. Defaults to ().
+        cached (bool, optional): Keep the results in the query cache, when the db has one, see DataBase.cached_query. Only for methods without writes. Defaults to False.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.lock_managers(reads, writes):
+                if cached and self.queryCache is not None:
+                    return self.cached_query(method, reads, args, kwargs)
+
+                try:
+                    return method(self, *args, **kwargs)
+                finally:
+                    if writes:
+                        self.bump_versions(writes)
+
+        return measured(wrapper)
+
+    return decorator
+
+
+def import_column(row, name: str):
+    """Gets a required column of an import row. csv.DictReader fills the columns a short line is missing with None, so None and empty values count as missing.
+
+    Args:
+        row (dict): The row.
+        name (str): Name of the column.
+
+    Raises:
+        TypeError: Raised when the row isn't a dict.
+        KeyError: Raised when the column is missing or empty.
+
+    Returns:
+        object: The value of the column.
+    """
+    if not isinstance(row, dict):
+        raise TypeError(f"expected a dict of columns, got {type(row).__name__}")
+
+    value = row.get(name)
+
+    if value is None or value == '':
+        raise KeyError(name)
+
+    return value
 
 
 class DataBase():
-    """Central db controller that manages all the other db managers. Used as a central point to interface with the db from the frontend.
+    """Central db controller that manages all the other db managers. Used as a central point to interface with the db from the frontend. Managers are only loaded when they are first used.
+
+    A DataBase can be shared between threads. Every manager has its own ReadWriteLock, so reads run in parallel and writes to the same manager are done one at a time. The SQLite managers share a single connection and therefore a single lock.
+
+    To let several processes use the same json files, pass shared = True. Every call then holds an advisory file lock per manager it uses (shared for reads, exclusive for writes) and first picks up changes other processes made, reloading a file only when it changed and reading only the new part of the turfje journal. Within a process calls are then done one at a time. SQLite does its own locking between processes, so shared is ignored there.
+
+    Args:
+        journal (bool, optional): Append turfje and rollup changes to a journal instead of rewriting turfjes.json and rollups.json on every change. Only used by the json backend. Defaults to False.
+        backend (str, optional): Storage backend, either 'json' for the json files in ./data or 'sqlite' for a single SQLite database in ./data. Defaults to 'json'.
+        columnar (bool, optional): Keep turfjes in memory in a compact column store, which uses far less memory for large histories. Only used by the json backend. Defaults to False.
+        cache (bool, optional): Keep a binary cache of every parsed json file, so startup can skip json decoding for files that did not change. Only used by the json backend. Defaults to False.
+        idBlockSize (int, optional): Amount of IDs reserved in settings.json at once, see Settings. Only used by the json backend. Defaults to 1.
+        flushInterval (float, optional): When given, writes are no longer done by the call making a change but by a background thread, at most once every flushInterval milliseconds. Changes from the last interval are lost when the program crashes, call close (or use a with block) to write them on exit. Only used by the json backend. Defaults to None.
+        durability (str, optional): How sure writes have to be to survive a crash of the machine: 'none', 'fsync' or 'full', see ManagerBase. Defaults to 'fsync'.
+        shared (bool, optional): Let other processes use the same json files at the same time. Can't be combined with flushInterval, since a change has to be on disk before the file lock is released. Only used by the json backend. Defaults to False.
+        partitioned (bool, optional): Keep removed turfjes out of turfjes.json, in archives per academic year that are only loaded when needed, see compact_partitions. Only used by the json backend. Defaults to False.
+        codec (str, optional): Format the files are written in: 'json', 'binary' for a compact table of typed columns or 'binary-zlib' to compress that as well, see codecs. Files keep their names and are read in whatever format they are in, so existing files are migrated as they are written, or all at once with migrate_files. Only used by the json backend. Defaults to 'json'.
+        metrics (bool, optional): Record call counts and latencies of every DataBase method, and timings, bytes read and written and records scanned of every json file, see stats. Defaults to False, which costs next to nothing.
+        metricsFile (str, optional): Dump the metrics to this file every metricsInterval milliseconds and on close, as json or, for files ending in .prom, in the Prometheus text format. Turns on metrics. Defaults to None.
+        metricsInterval (float, optional): Time between two dumps to metricsFile, in milliseconds. Defaults to 10000.
+        history (bool, optional): Keep every change as an event, with a checkpoint of the whole db every now and then, so the db can be looked at as it was at any moment since, see as_of. Reading the db itself is not slowed down, every change appends one line to history.journal. Defaults to False.
+        checkpointInterval (int, optional): Minimum amount of changes between two history checkpoints, see HistoryManager. Defaults to 10000.
+        queryCacheSize (int, optional): Keep the results of up to this many queries (get_person, get_turfjes, counts and the like) and return them again for the same arguments until a manager they read changes, see query_cache_stats. Defaults to 0, which caches nothing.
+
+    Raises:
+        ValueError: Raised when an unknown backend, durability level or codec is given, or when shared is combined with flushInterval.
     """
-    def __init__(self):
+    def __init__(self, journal: bool = False, backend: str = 'json', columnar: bool = False, cache: bool = False, idBlockSize: int = 1, flushInterval: float = None, durability: str = 'fsync', shared: bool = False, partitioned: bool = False, codec: str = 'json', metrics: bool = False, metricsFile: str = None, metricsInterval: float = 10000, history: bool = False, checkpointInterval: int = 10000, queryCacheSize: int = 0):
+        if shared and flushInterval is not None:
+            raise ValueError("A shared db can't defer writes to a flush interval")
+
         if not os.path.isdir('./data'):
             os.mkdir('./data')
 
-        self.settings = Settings()
-        self.userSettings = UserSettings()
-        self.turfjes = TurfjeManager()
-        self.people = PersonManager()
+        self.metrics = Metrics() if metrics or metricsFile is not None else None
+        self.queryCache = QueryCache(queryCacheSize) if queryCacheSize > 0 else None
+        self.metricsPrefix = ''
+        metrics = self.metrics
+
+        if backend == 'json':
+            # fails on an unknown codec now instead of when a manager is first used
+            get_codec(codec)
+
+            self.managerFactories = {
+                'settings': lambda: Settings(cache, idBlockSize, durability, codec, metrics),
+                'userSettings': lambda: UserSettings(cache, durability, codec, metrics),
+                'turfjes': lambda: (PartitionedTurfjeManager if partitioned else TurfjeManager)(journal, columnar, cache, durability, codec = codec, metrics = metrics),
+                'people': lambda: PersonManager(cache, durability, codec, metrics),
+                'rollups': lambda: self.open_rollups(RollupManager(journal, cache, durability, codec, metrics))
+            }
+        elif backend == 'sqlite':
+            store = SqliteStore(durability = durability)
+
+            self.managerFactories = {
+                'settings': lambda: SqliteSettings(store),
+                'userSettings': lambda: SqliteUserSettings(store),
+                'turfjes': lambda: SqliteTurfjeManager(store),
+                'people': lambda: SqlitePersonManager(store),
+                'rollups': lambda: self.open_rollups(SqliteRollupManager(store))
+            }
+        else:
+            raise ValueError(f"Unknown backend: {backend}")
+
+        if history:
+            # the history is kept in files for both backends, in the format of the codec
+            self.managerFactories['history'] = lambda: HistoryManager(checkpointInterval, cache, durability, codec, metrics)
+
+        if backend == 'sqlite':
+            lock = ReadWriteLock()
+            self.locks = {name: lock for name in self.managerFactories}
+        else:
+            self.locks = {name: ReadWriteLock() for name in self.managerFactories}
+
+        self.shared = shared and backend == 'json'
+        self.fileLocks = {name: FileLock(f'./data/{name}.lock') for name in self.managerFactories} if self.shared else {}
+
+        self.managers = {}
+        # reentrant, since opening the rollups can load the turfjes
+        self.managersLock = threading.RLock()
+        self.batchDepth = 0
+        self.writesDeferred = False
+        self.flusher = None
+
+        if flushInterval is not None and backend == 'json':
+            self.defer_writes()
+
+            self.flusher = GroupCommitFlusher(self, flushInterval)
+            self.flusher.start()
+
+            atexit.register(self.close)
+
+        self.metricsDumper = None
+
+        if metricsFile is not None:
+            self.metricsDumper = MetricsDumper(self.metrics, metricsFile, metricsInterval)
+            self.metricsDumper.start()
+
+            atexit.register(self.close)
+
+        if history:
+            self.open_history()
+
+
+    def get_manager(self, name: str):
+        """Gets a manager, loading it first if this is the first time it is used. A manager loaded during a batch joins that batch.
+
+        Args:
+            name (str): Name of the manager, one of MANAGER_NAMES.
+
+        Returns:
+            ManagerBase: The manager.
+        """
+        manager = self.managers.get(name)
+
+        if manager is None:
+            with self.managersLock:
+                manager = self.managers.get(name)
+
+                # another thread might have loaded it while this one waited
+                if manager is None:
+                    manager = self.managerFactories[name]()
+
+                    if self.writesDeferred:
+                        manager.defer_writes()
+
+                    for i in range(self.batchDepth):
+                        manager.begin_batch()
+
+                    self.managers[name] = manager
+
+        return manager
+
+
+    def loaded_managers(self):
+        """Gets all managers that have been loaded so far. Settings always comes first, so reserved IDs reach the disk before anything that uses them.
+
+        Returns:
+            List(ManagerBase): The loaded managers.
+        """
+        return [self.managers[name] for name in self.managerFactories if name in self.managers]
+
+
+    @contextmanager
+    def lock_managers(self, reads = (), writes = ()):
+        """Context manager that holds the read locks of the managers in reads and the write locks of the managers in writes. Locks are always taken in the same order, so two threads (or processes) can't deadlock on them.
+
+        When the db is shared between processes the file locks are taken as well, and loaded managers are refreshed with the changes of other processes. A refresh changes the manager, so within the process every lock is then taken for writing.
+
+        Args:
+            reads (tuple(str), optional): Names of the managers that are only read. Defaults to ().
+            writes (tuple(str), optional): Names of the managers that are changed. Defaults to ().
+        """
+        # managers sharing a lock need it in the strongest mode any of them asks for
+        modes = {}
+
+        for name in self.managerFactories:
+            lock = self.locks[name]
+
+            if name in writes or (self.shared and name in reads):
+                modes[lock] = 'write'
+            elif name in reads:
+                modes.setdefault(lock, 'read')
+
+        with ExitStack() as stack:
+            for lock, mode in modes.items():
+                stack.enter_context(lock.write() if mode == 'write' else lock.read())
+
+            for name in self.fileLocks:
+                if name in writes or name in reads:
+                    self.lock_file(name, name in writes, stack)
+
+            yield
+
+
+    def lock_file(self, name: str, exclusive: bool, stack: ExitStack):
+        """Takes the file lock of a manager for as long as the stack is open, refreshing the manager if this process did not hold the lock yet. Expects the caller to hold the write lock of the manager.
+
+        Args:
+            name (str): Name of the manager.
+            exclusive (bool): Take the lock exclusive, for changing the manager.
+            stack (ExitStack): Stack that releases the lock.
+        """
+        fileLock = self.fileLocks[name]
+        firstHold = fileLock.acquire(exclusive)
+
+        stack.callback(fileLock.release)
+
+        manager = self.managers.get(name)
+
+        # managers that are not loaded yet will read the current files anyway
+        if firstHold and manager is not None and manager.refresh():
+            manager.version += 1
+
+
+    def bump_versions(self, names):
+        """Bumps the versions of the managers that were changed, so results cached for their old state are no longer used. Expects the caller to hold their write locks.
+
+        Args:
+            names (tuple(str)): Names of the changed managers.
+        """
+        for name in names:
+            manager = self.managers.get(name)
+
+            # managers that are not loaded yet can't have cached results
+            if manager is not None:
+                manager.version += 1
+
+
+    def cached_query(self, method, reads, args, kwargs):
+        """Calls a query method through the query cache. Results are stored under the name of the method, its arguments and the versions of the managers in reads, so a result is only reused while none of those managers changed. Expects the caller to hold the read locks, so no change can happen between looking up the versions and storing the result.
+
+        Args:
+            method (function): The query method.
+            reads (tuple(str)): Names of the managers the method reads.
+            args (tuple): Positional arguments of the call.
+            kwargs (dict): Keyword arguments of the call.
+
+        Returns:
+            object: The result of the method. Lists and dicts are copied, so callers can change them without changing the cached result.
+        """
+        key = (method.__name__, args, tuple(sorted(kwargs.items())) if kwargs else (), tuple(self.get_manager(name).get_version() for name in reads))
+
+        try:
+            found, result = self.queryCache.get(key)
+        except TypeError:
+            # arguments that can't be hashed, e.g. a list
+            return method(self, *args, **kwargs)
+
+        if not found:
+            result = method(self, *args, **kwargs)
+            self.queryCache.put(key, result)
+
+        if isinstance(result, (list, dict)):
+            return result.copy()
+
+        return result
+
+
+    @property
+    def settings(self):
+        return self.get_manager('settings')
+
+    @property
+    def userSettings(self):
+        return self.get_manager('userSettings')
+
+    @property
+    def turfjes(self):
+        return self.get_manager('turfjes')
+
+    @property
+    def people(self):
+        return self.get_manager('people')
+
+    @property
+    def rollups(self):
+        return self.get_manager('rollups')
+
+    @property
+    def history(self):
+        return self.get_manager('history')
+
+
+    def open_rollups(self, rollups):
+        """Rebuilds newly opened rollups when they are empty while there are turfjes, e.g. for data from before rollups were kept. Expects the caller to hold the turfjes lock.
+
+        Args:
+            rollups (RollupManager): The opened rollups.
+
+        Returns:
+            RollupManager: The same rollups.
+        """
+        if rollups.is_empty():
+            turfjes = self.turfjes.get_all_turfjes()
+
+            if len(turfjes) > 0:
+                rollups.rebuild(turfjes)
+
+        return rollups
+
+
+    @locked(reads = ('userSettings', 'turfjes', 'people'), writes = ('history',))
+    def open_history(self):
+        """Starts the history with a checkpoint of the db as it is now, when there is no history yet, e.g. the first time the db is opened with history = True.
+        """
+        if not self.history.is_empty():
+            return
+
+        state = HistoryState(time.time())
+        state.restore({
+            'turfjes': [serialize_turfje(turfje) for turfje in self.turfjes.get_all_turfjes()],
+            'people': [serialize_person(person) for person in self.people.get_people()],
+            'reasons': [serialize_reason(reason) for reason in self.userSettings.get_reasons()],
+            'removalReasons': [serialize_reason(reason) for reason in self.userSettings.get_removal_reasons()]
+        })
+
+        self.history.checkpoint(state)
+
+
+    def record_history(self, *events):
+        """Appends events to the history, when the db keeps one. Expects the caller to hold the history lock. The events are:
+
+        - {'op': 'turfje', 'turfje': dict}, for a created turfje
+        - {'op': 'removeTurfjes', 'ids': List(int), 'remReasonAbbreviation': str, 'removalDate': float}
+        - {'op': 'person', 'person': dict}, for a created or updated person
+        - {'op': 'deletePerson', 'id': int}
+        - {'op': 'reason', 'reason': dict} and {'op': 'deleteReason', 'abbreviation': str}
+        - {'op': 'removalReason', 'reason': dict} and {'op': 'deleteRemovalReason', 'abbreviation': str}
+        - {'op': 'reset'}
+
+        Args:
+            *events (dict): The events.
+        """
+        if 'history' in self.managerFactories:
+            self.history.record(events)
+
+
+    def record_removal(self, turfjes):
+        """Appends the removal of turfjes to the history, when the db keeps one and anything was removed.
+
+        Args:
+            turfjes (List(Turfje)): The removed turfjes, all removed at once.
+        """
+        if len(turfjes) == 0:
+            return
+
+        # the removed turfjes can be copies from before the removal, depending on the manager
+        turfje = self.turfjes.get_turfje(turfjes[0].id)
+
+        self.record_history({'op': 'removeTurfjes', 'ids': [turfje.id for turfje in turfjes], 'remReasonAbbreviation': turfje.remReasonAbbreviation, 'removalDate': turfje.removalDate})
+
 
     # ----------- UserSettings -----------
+    @locked(reads = ('userSettings',), cached = True)
     def get_reason(self, abbreviation: str):
         """Gets a reason from the db.
 
@@ -32,6 +424,7 @@ class DataBase():
         return self.userSettings.get_reason(abbreviation)
 
     
+    @locked(writes = ('userSettings', 'history'))
     def create_reason(self, abbreviation: str, description: str):
         """Creates a new reason in the db.
 
@@ -41,7 +434,10 @@ class DataBase():
         """
         self.userSettings.create_reason(abbreviation, description)
 
+        self.record_history({'op': 'reason', 'reason': serialize_reason(self.userSettings.get_reason(abbreviation))})
+
     
+    @locked(writes = ('userSettings', 'history'))
     def delete_reason(self, abbreviation: str):
         """Deletes a reason from the db.
 
@@ -50,7 +446,10 @@ class DataBase():
         """
         self.userSettings.delete_reason(abbreviation)
 
+        self.record_history({'op': 'deleteReason', 'abbreviation': abbreviation})
+
 
+    @locked(reads = ('userSettings',), cached = True)
     def get_removal_reason(self, abbreviation: str):
         """Gets a removal reason from the db.
 
@@ -63,6 +462,7 @@ class DataBase():
         return self.userSettings.get_removal_reason(abbreviation)
 
 
+    @locked(writes = ('userSettings', 'history'))
     def create_removal_reason(self, abbreviation: str, description: str, turfjeCount: int = 1):
         """Creates a removal reason in the db.
 
@@ -73,7 +473,10 @@ class DataBase():
         """
         self.userSettings.create_removal_reason(abbreviation, description, turfjeCount)
 
+        self.record_history({'op': 'removalReason', 'reason': serialize_reason(self.userSettings.get_removal_reason(abbreviation))})
+
 
+    @locked(writes = ('userSettings', 'history'))
     def delete_removal_reason(self, abbreviation: str):
         """Delete a removal reason from the db.
 
@@ -82,8 +485,11 @@ class DataBase():
         """
         self.userSettings.delete_removal_reason(abbreviation)
 
+        self.record_history({'op': 'deleteRemovalReason', 'abbreviation': abbreviation})
+
     
     # ----------- Turfje -----------
+    @locked(reads = ('turfjes',), cached = True)
     def get_turfje(self, id: int):
         """Gets a turfje based on its ID from the db.
 
@@ -96,6 +502,7 @@ class DataBase():
         return self.turfjes.get_turfje(id)
 
     
+    @locked(reads = ('turfjes',), cached = True)
     def get_turfjes(self, personId: int):
         """Gets all turfjes collected by a person, both active and removed ones.
 
@@ -108,6 +515,133 @@ class DataBase():
         return self.turfjes.get_turfjes(personId)
 
     
+    @locked(reads = ('turfjes',), cached = True)
+    def get_turfjes_between(self, start: float, end: float, personId: int = None, reasonAbbreviation: str = None, activeOnly: bool = False):
+        """Gets all turfjes handed out in a time range, e.g. during a single borrel, without going through every turfje.
+
+        Args:
+            start (float): Start of the range as a timestamp, included.
+            end (float): End of the range as a timestamp, excluded.
+            personId (int, optional): Only get the turfjes of this person. Defaults to None, which gets them for everyone.
+            reasonAbbreviation (str, optional): Only get the turfjes given for this reason. Defaults to None, which gets them for every reason.
+            activeOnly (bool, optional): Leave out removed turfjes. Defaults to False.
+
+        Returns:
+            List(Turfje): The turfjes, ordered by creationDate and then by id.
+        """
+        return self.turfjes.get_turfjes_between(start, end, personId, reasonAbbreviation, activeOnly)
+
+    
+    @locked(reads = ('turfjes',), cached = True)
+    def get_turfje_counts(self, personId: int):
+        """Gets how many active and removed turfjes a person has, without going through their turfjes.
+
+        Args:
+            personId (int): ID of the person.
+
+        Returns:
+            (int, int): The amount of active and of removed turfjes.
+        """
+        return self.turfjes.get_turfje_counts(personId)
+
+
+    @locked(reads = ('turfjes',), cached = True)
+    def get_reason_counts(self, removal: bool = False):
+        """Gets how many turfjes were given for every reason, or removed for every removal reason.
+
+        Args:
+            removal (bool, optional): Count removed turfjes per removal reason instead. Defaults to False.
+
+        Returns:
+            dict: The counts by reason abbreviation.
+        """
+        return self.turfjes.get_reason_counts(removal)
+
+
+    @locked(reads = ('turfjes',), cached = True)
+    def leaderboard(self, top: int = 10):
+        """Gets the people with the most active turfjes, without going through the turfjes.
+
+        Args:
+            top (int, optional): Amount of people to get. Defaults to 10.
+
+        Returns:
+            List((int, int)): (personId, active count) of the top people, most turfjes first. Ties are ordered by personId.
+        """
+        return self.turfjes.leaderboard(top)
+
+
+    @locked(reads = ('turfjes',))
+    def get_turfje_page(self, personId: int = None, reasonAbbreviation: str = None, removed: bool = None, since: float = None, until: float = None, order: str = 'id', after = None, offset: int = 0, limit: int = 100):
+        """Gets a page of the turfjes matching the filters, e.g. for a screen paging through the history. Pass the returned cursor as after to get the next page: unlike an offset it stays right when turfjes are created in between, and finding where the page starts doesn't get slower further on.
+
+        Args:
+            personId (int, optional): Only get the turfjes of this person. Defaults to None.
+            reasonAbbreviation (str, optional): Only get the turfjes given for this reason. Defaults to None.
+            removed (bool, optional): Only get removed turfjes if True, only active ones if False. Defaults to None, which gets both.
+            since (float, optional): Only get turfjes created at or after this time. Defaults to None.
+            until (float, optional): Only get turfjes created before this time. Defaults to None.
+            order (str, optional): 'id' or 'creationDate', or '-id' or '-creationDate' for newest first. Defaults to 'id'.
+            after (optional): Cursor returned with the previous page. Defaults to None, which gets the first page.
+            offset (int, optional): Amount of matching turfjes to skip first. Defaults to 0.
+            limit (int, optional): Maximum amount of turfjes to get. Defaults to 100.
+
+        Raises:
+            ValueError: Raised when an unknown order is given.
+
+        Returns:
+            (List(Turfje), cursor): The turfjes, and the cursor of the next page, which can be stored as json. The cursor is None when there are no more turfjes.
+        """
+        if order not in TURFJE_ORDERS:
+            raise ValueError(f"Unknown order: {order}")
+
+        if isinstance(after, list):
+            # a cursor that went through json
+            after = tuple(after)
+
+        turfjes = self.turfjes.get_turfje_page(personId, reasonAbbreviation, removed, since, until, order, after, offset, limit)
+        cursor = turfje_key(turfjes[-1], order) if len(turfjes) == limit and limit > 0 else None
+
+        return turfjes, cursor
+
+
+    def iter_turfjes(self, personId: int = None, reasonAbbreviation: str = None, removed: bool = None, since: float = None, until: float = None, order: str = 'id', after = None, offset: int = 0, limit: int = None, pageSize: int = 1000):
+        """Goes through the turfjes matching the filters one by one, e.g. for an export, without copying all of them. Turfjes are read a page at a time with get_turfje_page, which holds the locks only while a page is read, so an iterator that is only partly used doesn't block changes. Turfjes created while iterating are included when they come after the current page in the order.
+
+        Usage:
+            for turfje in db.iter_turfjes(personId, removed = False, order = '-creationDate'):
+                ...
+
+        Args:
+            personId (int, optional): See get_turfje_page. Defaults to None.
+            reasonAbbreviation (str, optional): See get_turfje_page. Defaults to None.
+            removed (bool, optional): See get_turfje_page. Defaults to None.
+            since (float, optional): See get_turfje_page. Defaults to None.
+            until (float, optional): See get_turfje_page. Defaults to None.
+            order (str, optional): See get_turfje_page. Defaults to 'id'.
+            after (optional): Cursor returned by get_turfje_page to start after. Defaults to None.
+            offset (int, optional): Amount of matching turfjes to skip first. Defaults to 0.
+            limit (int, optional): Maximum amount of turfjes to go through. Defaults to None, which goes through all of them.
+            pageSize (int, optional): Amount of turfjes read at once. Defaults to 1000.
+
+        Yields:
+            Turfje: The turfjes, in order.
+        """
+        while limit is None or limit > 0:
+            size = pageSize if limit is None else min(pageSize, limit)
+            turfjes, after = self.get_turfje_page(personId, reasonAbbreviation, removed, since, until, order, after, offset, size)
+            offset = 0
+
+            yield from turfjes
+
+            if limit is not None:
+                limit -= len(turfjes)
+
+            if after is None:
+                return
+
+
+    @locked(reads = ('userSettings', 'people'), writes = ('settings', 'turfjes', 'rollups', 'history'))
     def create_turfje(self, personId: int, reasonAbbreviation: str, creationDate: float = time.time()):
         """Creates a new turfje in the db.
 
@@ -115,16 +649,29 @@ class DataBase():
             personId (int): ID of the person who the turfje is being assigned to.
             reasonAbbreviation (str): Abbreviation of the reason the turfje is given.
             creationDate (float, optional): The time the turfje was handed out. Defaults to time.time().
+
+        Raises:
+            ValueError: Raised when the creation date isn't a valid timestamp, before anything is stored.
         """
+        check_timestamp(creationDate)
+
         newestId = self.settings.get_turfje_ID()
         
         # check if person and reason exist
         self.people.get_person(personId)
         self.userSettings.get_reason(reasonAbbreviation)
 
+        # rollups opened for the first time are rebuilt from the turfjes, which must happen before the new one is added
+        rollups = self.rollups
+
         self.turfjes.create_turfje(newestId, personId, reasonAbbreviation, creationDate)
+        turfje = self.turfjes.get_turfje(newestId)
+        rollups.add_turfjes([turfje])
+
+        self.record_history({'op': 'turfje', 'turfje': serialize_turfje(turfje)})
 
     
+    @locked(reads = ('userSettings', 'people'), writes = ('turfjes', 'rollups', 'history'))
     def remove_turfjes(self, personId: int, reasonAbbreviation: str):
         """Removes a set number of turfjes from a person based on the reason abbreviation. Selecting the oldest active ones.
 
@@ -136,9 +683,13 @@ class DataBase():
         self.people.get_person(personId)
         reason = self.userSettings.get_removal_reason(reasonAbbreviation)
 
-        self.turfjes.remove_turfjes(personId, reason)
+        removedTurfjes = self.turfjes.remove_turfjes(personId, reason)
+        self.rollups.remove_turfjes(removedTurfjes)
+
+        self.record_removal(removedTurfjes)
 
     
+    @locked(reads = ('userSettings', 'people'), writes = ('turfjes', 'rollups', 'history'))
     def remove_turfjes(self, personId: int, reason: RemovalReason):
         """"Removes a set number of turfjes from a person based on the reason object. Selecting the oldest active ones.
 
@@ -150,10 +701,14 @@ class DataBase():
         self.people.get_person(personId)
         self.userSettings.get_removal_reason(reason.abbreviation)
 
-        self.turfjes.remove_turfjes(personId, reason)
+        removedTurfjes = self.turfjes.remove_turfjes(personId, reason)
+        self.rollups.remove_turfjes(removedTurfjes)
+
+        self.record_removal(removedTurfjes)
 
 
     # ----------- Person -----------
+    @locked(reads = ('people',), cached = True)
     def get_person(self, id: int):
         """Gets a person from the db.
 
@@ -166,6 +721,7 @@ class DataBase():
         return self.people.get_person(id)
 
     
+    @locked(writes = ('settings', 'people', 'history'))
     def create_person(self, name: str, position: str):
         """Creates a new person in the db.
 
@@ -177,7 +733,10 @@ class DataBase():
 
         self.people.create_person(id, name, position)
 
+        self.record_history({'op': 'person', 'person': serialize_person(self.people.get_person(id))})
+
     
+    @locked(writes = ('people', 'history'))
     def update_person(self, id: int, name: str = '', position: str = ''):
         """Updates a person in the db.
 
@@ -188,7 +747,10 @@ class DataBase():
         """
         self.people.update_person(id, name, position)
 
+        self.record_history({'op': 'person', 'person': serialize_person(self.people.get_person(id))})
 
+
+    @locked(writes = ('people', 'history'))
     def delete_person(self, id: int):
         """Deletes a person from the db.
 
@@ -197,12 +759,393 @@ class DataBase():
         """
         self.people.delete_person(id)
 
+        self.record_history({'op': 'deletePerson', 'id': id})
+
+
+    # ----------- Rollups -----------
+    @locked(reads = ('turfjes', 'rollups'), cached = True)
+    def get_rollups(self, period: str, start: float = None, end: float = None, personId: int = None, reasonAbbreviation: str = None):
+        """Gets the amount of turfjes given and removed per day or ISO week, per person and reason, for charts. Only the stored counts are read, not the turfjes.
+
+        Args:
+            period (str): Either 'day' or 'week'.
+            start (float, optional): Timestamp in the first bucket. Defaults to None, which starts at the first bucket.
+            end (float, optional): Timestamp in the last bucket. Defaults to None, which ends at the last bucket.
+            personId (int, optional): Only get the counts of this person. Defaults to None.
+            reasonAbbreviation (str, optional): Only get the counts of this reason. Defaults to None.
+
+        Returns:
+            List((str, int, str, int, int)): (bucket, personId, reasonAbbreviation, given, removed), ordered by bucket. Removed turfjes count towards the bucket they were created in.
+        """
+        return self.rollups.get_rollups(period, start, end, personId, reasonAbbreviation)
+
+
+    @locked(reads = ('turfjes',), writes = ('rollups',))
+    def rebuild_rollups(self):
+        """Counts all turfjes again, e.g. after the rollups were lost or a crash left them behind the turfjes.
+        """
+        self.rollups.rebuild(self.turfjes.get_all_turfjes())
+
+
+    # ----------- Analytics -----------
+    @locked(reads = ('turfjes', 'people'))
+    def get_analytics(self):
+        """Takes a snapshot of the whole turfje history for aggregate questions, see TurfjeAnalytics. Needs numpy.
+
+        Returns:
+            TurfjeAnalytics: The snapshot.
+        """
+        return TurfjeAnalytics(self.turfjes.get_columns(), self.people.get_people())
+
+
+    # ----------- Import -----------
+    @locked(writes = MANAGER_NAMES)
+    def import_people(self, people):
+        """Creates many people at once. Every row is checked first, then the IDs for all valid rows are reserved at once and everything is saved with a single write per file. Invalid rows are skipped and reported instead of stopping the import.
+
+        Args:
+            people (iterable of dict): Rows with a 'name' and a 'position'. Empty columns count as missing.
+
+        Returns:
+            (List(int), List(ImportRowError)): The IDs of the created people in row order, and an error for every skipped row. Rows are numbered from 1.
+        """
+        validPeople = []
+        errors = []
+
+        for row, person in enumerate(people, 1):
+            try:
+                validPeople.append((import_column(person, 'name'), import_column(person, 'position')))
+            except KeyError as error:
+                errors.append(ImportRowError(row, f"missing column {error}"))
+            except (TypeError, ValueError) as error:
+                errors.append(ImportRowError(row, str(error)))
+
+        with self.batch():
+            ids = self.settings.get_person_IDs(len(validPeople))
+
+            for id, (name, position) in zip(ids, validPeople):
+                self.people.create_person(id, name, position)
+
+            self.record_history(*({'op': 'person', 'person': serialize_person(self.people.get_person(id))} for id in ids))
+
+        return list(ids), errors
+
+
+    @locked(writes = MANAGER_NAMES)
+    def import_turfjes(self, turfjes):
+        """Creates many turfjes at once. Every row is checked first, then the IDs for all valid rows are reserved at once and everything is saved with a single write per file. Invalid rows are skipped and reported instead of stopping the import.
+
+        Args:
+            turfjes (iterable of dict): Rows with a 'personId', a 'reasonAbbreviation' and optionally a 'creationDate'. Numbers may be given as strings. Rows without a creationDate get the current time, rows with a creationDate that isn't a valid timestamp are skipped.
+
+        Returns:
+            (List(int), List(ImportRowError)): The IDs of the created turfjes in row order, and an error for every skipped row. Rows are numbered from 1.
+        """
+        now = time.time()
+        validTurfjes = []
+        errors = []
+
+        for row, turfje in enumerate(turfjes, 1):
+            try:
+                personId = int(import_column(turfje, 'personId'))
+                reasonAbbreviation = import_column(turfje, 'reasonAbbreviation')
+                creationDate = turfje.get('creationDate')
+                # like import_column, only None and empty values count as missing, 0 is a valid date
+                creationDate = now if creationDate is None or creationDate == '' else float(creationDate)
+                check_timestamp(creationDate)
+
+                # check if person and reason exist
+                self.people.get_person(personId)
+                self.userSettings.get_reason(reasonAbbreviation)
+            except KeyError as error:
+                errors.append(ImportRowError(row, f"missing column {error}"))
+                continue
+            except (TypeError, ValueError, PersonDoesNotExistError, ReasonError) as error:
+                errors.append(ImportRowError(row, str(error)))
+                continue
+
+            validTurfjes.append((personId, reasonAbbreviation, creationDate))
+
+        with self.batch():
+            # see create_turfje
+            rollups = self.rollups
+            ids = self.settings.get_turfje_IDs(len(validTurfjes))
+
+            for id, (personId, reasonAbbreviation, creationDate) in zip(ids, validTurfjes):
+                self.turfjes.create_turfje(id, personId, reasonAbbreviation, creationDate)
+
+            rollups.add_turfjes(self.turfjes.get_turfje(id) for id in ids)
+
+            self.record_history(*({'op': 'turfje', 'turfje': serialize_turfje(self.turfjes.get_turfje(id))} for id in ids))
+
+        return list(ids), errors
+
+
+    @measured
+    def import_people_csv(self, filePath: str):
+        """Imports people from a csv file with a header row containing the columns name and position. See import_people.
+
+        Args:
+            filePath (str): Path of the csv file.
+
+        Returns:
+            (List(int), List(ImportRowError)): See import_people.
+        """
+        with open(filePath, newline = '') as file:
+            return self.import_people(csv.DictReader(file))
+
+
+    @measured
+    def import_turfjes_csv(self, filePath: str):
+        """Imports turfjes from a csv file with a header row containing the columns personId, reasonAbbreviation and optionally creationDate. See import_turfjes.
+
+        Args:
+            filePath (str): Path of the csv file.
+
+        Returns:
+            (List(int), List(ImportRowError)): See import_turfjes.
+        """
+        with open(filePath, newline = '') as file:
+            return self.import_turfjes(csv.DictReader(file))
+
+
+    # ----------- History -----------
+    @locked(reads = ('history',))
+    def as_of(self, timestamp: float):
+        """Gets the db as it was at a moment in the past, see DataBase(history = True). Only replays the changes since the last checkpoint before the moment.
+
+        Args:
+            timestamp (float): The moment. Changes are timed by when they were made, not by the creationDate of turfjes.
+
+        Raises:
+            ValueError: Raised when the db keeps no history, or when the moment is before the history started.
+
+        Returns:
+            HistoryState: The db at that moment, with the read methods of DataBase.
+        """
+        if 'history' not in self.managerFactories:
+            raise ValueError("The db keeps no history, open it with history = True")
+
+        return self.history.state_at(timestamp)
+
+
+    @locked(writes = ('history',))
+    def checkpoint_history(self):
+        """Takes a history checkpoint right away, e.g. before a large import. Does nothing when the db keeps no history.
+        """
+        if 'history' in self.managerFactories:
+            self.history.checkpoint()
+
 
     # ----------- General -----------
+    @contextmanager
+    def batch(self):
+        """Context manager that postpones all file writes until the block ends, so that every file is written at most once. If the block raises an exception all changes made inside it are rolled back instead. Nested batches are part of the outermost one. Other threads can't use the db while a batch is running.
+
+        Usage:
+            with db.batch():
+                db.create_turfje(personId, 'B')
+                db.create_turfje(personId, 'B')
+
+        Yields:
+            DataBase: This db.
+        """
+        with self.lock_managers(writes = MANAGER_NAMES):
+            try:
+                yield from self.run_batch()
+            finally:
+                # a rollback changes the managers as well
+                self.bump_versions(MANAGER_NAMES)
+
+
+    def run_batch(self):
+        """Generator behind batch, expects the caller to hold all write locks.
+
+        Yields:
+            DataBase: This db.
+        """
+        self.batchDepth += 1
+
+        for manager in self.loaded_managers():
+            manager.begin_batch()
+
+        try:
+            yield self
+        except BaseException:
+            self.batchDepth -= 1
+
+            for manager in self.loaded_managers():
+                manager.end_batch(commit = False)
+
+            raise
+
+        self.batchDepth -= 1
+
+        for manager in self.loaded_managers():
+            manager.end_batch()
+
+
+    transaction = batch
+
+
+    def defer_writes(self):
+        """Postpones all writes, also outside of batches, until flush is called. Meant for when another thread takes care of calling flush.
+
+        Raises:
+            ValueError: Raised when the db is shared between processes.
+        """
+        if self.shared:
+            raise ValueError("A shared db can't defer writes")
+
+        with self.managersLock:
+            self.writesDeferred = True
+
+            for manager in self.loaded_managers():
+                manager.defer_writes()
+
+
+    def has_pending_writes(self):
+        """Checks whether any manager has changes that still have to be flushed. Does not take any locks, so the answer can be outdated by the time it is returned.
+
+        Returns:
+            bool: True if a flush would write something.
+        """
+        return any(manager.has_pending() for manager in list(self.managers.values()))
+
+
+    def stats(self):
+        """Gets the metrics recorded so far, see DataBase(metrics = True). Does not take any locks.
+
+        Returns:
+            dict: See Metrics.snapshot. Calls are named after the DataBase method, or after the file and the ManagerBase method, e.g. 'turfjes.write_file'. None when metrics are off.
+        """
+        if self.metrics is None:
+            return None
+
+        return self.metrics.snapshot()
+
+
+    def query_cache_stats(self):
+        """Gets how well the query cache is doing, see DataBase(queryCacheSize). Does not take any locks.
+
+        Returns:
+            dict: See QueryCache.stats. None when there is no query cache.
+        """
+        if self.queryCache is None:
+            return None
+
+        return self.queryCache.stats()
+
+
+    def close(self):
+        """Stops the background flusher and the metrics dumper, if there are any, and writes all postponed changes to disk.
+        """
+        if self.flusher is not None:
+            self.flusher.stop()
+            self.flusher = None
+
+            atexit.unregister(self.close)
+
+        self.flush()
+
+        for fileLock in self.fileLocks.values():
+            fileLock.close()
+
+        if self.metricsDumper is not None:
+            self.metricsDumper.stop()
+            self.metricsDumper = None
+
+            atexit.unregister(self.close)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+    @measured
+    def flush(self):
+        """Writes all postponed changes to disk, settings first. Can be called from any thread: the locks of the managers are only held while their changes are collected, not while they are written.
+
+        The changes of all managers are collected at once, so a change can't slip in between two managers. Otherwise a turfje could reach turfjes.json while the ID block it was taken from is collected too late to be in settings.json, and a crash would hand out its ID again. When a write fails, the changes that weren't written yet are put back as well, so nothing is written before the settings it depends on.
+        """
+        taken = []
+
+        with self.lock_managers(writes = MANAGER_NAMES):
+            try:
+                for manager in self.loaded_managers():
+                    manager.flushLock.acquire()
+
+                    try:
+                        pending = manager.take_pending()
+                    except BaseException:
+                        manager.flushLock.release()
+                        raise
+
+                    taken.append((manager, pending))
+            except BaseException:
+                for manager, pending in taken:
+                    manager.restore_pending(pending)
+                    manager.flushLock.release()
+
+                raise
+
+        written = 0
+
+        try:
+            for manager, pending in taken:
+                written += 1
+                manager.write_pending(pending)
+        except BaseException:
+            # write_pending already put back the changes of the manager that failed
+            for manager, pending in taken[written:]:
+                manager.restore_pending(pending)
+
+            raise
+        finally:
+            for manager, pending in taken:
+                manager.flushLock.release()
+
+
+    @locked(writes = MANAGER_NAMES)
     def reset(self):
-        """Empty out entire database. WARNING IRREVERSIBLE.
+        """Empty out entire database. WARNING IRREVERSIBLE, except through as_of when the db keeps a history.
         """
         self.settings.reset()
         self.userSettings.reset()
         self.turfjes.reset()
         self.people.reset()
+        self.rollups.reset()
+
+        self.record_history({'op': 'reset'})
+
+
+    @locked(writes = ('turfjes',))
+    def compact_partitions(self, before: float = None):
+        """Moves removed turfjes created before `before` out of turfjes.json into the archive of their academic year, and any other archived turfjes back. Only does something when the db is partitioned.
+
+        Args:
+            before (float, optional): Only archive turfjes created before this time, e.g. the start of the current academic year. Defaults to None, which archives every removed turfje.
+        """
+        self.turfjes.compact_partitions(before)
+
+
+    @locked(writes = MANAGER_NAMES)
+    def migrate_files(self):
+        """Rewrites every file that is not in the format of the codec the db was opened with, loading every manager. Without this files are migrated the next time they are written, which for files that rarely change can take long.
+
+        Returns:
+            List(str): Names of the managers whose file was rewritten.
+        """
+        return [name for name in self.managerFactories if self.get_manager(name).migrate()]
+
+
+    @locked(writes = ('turfjes', 'rollups'))
+    def compact(self):
+        """Folds the turfje and rollup journals back into turfjes.json and rollups.json, or the SQLite WAL back into the database file. Worth calling every now and then when running in journal mode.
+        """
+        self.turfjes.compact()
+        self.rollups.compact()
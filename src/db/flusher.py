@@ -0,0 +1,29 @@
+import threading
+
+
+class GroupCommitFlusher(threading.Thread):
+    """Background thread that flushes a DataBase at most once every interval. Changes made in between are written together, so a burst of changes turns into a handful of writes.
+
+    Args:
+        db (DataBase): The db to be flushed. Its writes must be deferred.
+        interval (float): Minimum time between two flushes, in milliseconds.
+    """
+    def __init__(self, db, interval: float):
+        super().__init__(name = 'GroupCommitFlusher', daemon = True)
+
+        self.db = db
+        self.interval = interval / 1000
+        self.stopped = threading.Event()
+
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            if self.db.has_pending_writes():
+                self.db.flush()
+
+
+    def stop(self):
+        """Stops the thread after its current flush, without flushing again. Call DataBase.flush afterwards to write what is left.
+        """
+        self.stopped.set()
+        self.join()
@@ -0,0 +1,609 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter
+from src.db.managerBase import ManagerBase
+from src.db.codecs import detect_codec
+from src.db.turfje import Turfje
+from src.db.person import Person
+from src.db.reasons import Reason, RemovalReason
+from src.exceptions import TurfjeDoesNotExistError, PersonDoesNotExistError, ReasonError
+
+HISTORY_DIRECTORY = './data/history'
+
+# a checkpoint is only taken once the events since the last one are at least this part of its size, which keeps all checkpoints together linear in the amount of events
+CHECKPOINT_GROWTH = 4
+
+
+def serialize_turfje(turfje: Turfje):
+    """Converts a turfje into a dict, as stored in events and checkpoints.
+
+    Args:
+        turfje (Turfje): The turfje.
+
+    Returns:
+        dict: The serializable turfje.
+    """
+    return {
+        'id': turfje.id,
+        'personId': turfje.personId,
+        'reasonAbbreviation': turfje.reasonAbbreviation,
+        'remReasonAbbreviation': turfje.remReasonAbbreviation,
+        'creationDate': turfje.creationDate,
+        'removed': turfje.removed,
+        'removalDate': turfje.removalDate
+    }
+
+
+def serialize_person(person: Person):
+    """Converts a person into a dict, as stored in events and checkpoints.
+
+    Args:
+        person (Person): The person.
+
+    Returns:
+        dict: The serializable person.
+    """
+    return {'id': person.id, 'name': person.name, 'position': person.position}
+
+
+def serialize_reason(reason: Reason):
+    """Converts a reason or removal reason into a dict, as stored in events and checkpoints.
+
+    Args:
+        reason (Reason): The reason.
+
+    Returns:
+        dict: The serializable reason.
+    """
+    if isinstance(reason, RemovalReason):
+        return {'abbreviation': reason.abbreviation, 'description': reason.description, 'turfjeCount': reason.turfjeCount}
+
+    return {'abbreviation': reason.abbreviation, 'description': reason.description}
+
+
+class HistoryState:
+    """The db as it was at a moment in the past, rebuilt from a checkpoint and the events after it, see DataBase.as_of. Only has the read methods of DataBase, changing it does not change the db.
+
+    Args:
+        time (float): The moment.
+    """
+    def __init__(self, time: float):
+        self.time = time
+        self.clear()
+
+
+    def clear(self):
+        """Empties the state, like DataBase.reset does.
+        """
+        self.turfjes = {}
+        self.people = {}
+        self.reasons = {}
+        self.removalReasons = {}
+
+
+    def restore(self, data: dict):
+        """Fills the state from a checkpoint.
+
+        Args:
+            data (dict): The checkpoint, see serialize.
+        """
+        self.clear()
+
+        for turfje in data['turfjes']:
+            self.turfjes[turfje['id']] = Turfje(turfje['id'], turfje['personId'], turfje['reasonAbbreviation'], turfje['remReasonAbbreviation'],
+                turfje['creationDate'], turfje['removed'], turfje['removalDate'])
+
+        for person in data['people']:
+            self.people[person['id']] = Person(person['id'], person['name'], person['position'])
+
+        for reason in data['reasons']:
+            self.reasons[reason['abbreviation']] = Reason(reason['abbreviation'], reason['description'])
+
+        for reason in data['removalReasons']:
+            self.removalReasons[reason['abbreviation']] = RemovalReason(reason['abbreviation'], reason['description'], reason['turfjeCount'])
+
+
+    def serialize(self):
+        """Converts the state into a checkpoint.
+
+        Returns:
+            dict: The turfjes, people, reasons and removal reasons, as lists of dicts.
+        """
+        return {
+            'turfjes': [serialize_turfje(turfje) for turfje in self.turfjes.values()],
+            'people': [serialize_person(person) for person in self.people.values()],
+            'reasons': [serialize_reason(reason) for reason in self.reasons.values()],
+            'removalReasons': [serialize_reason(reason) for reason in self.removalReasons.values()]
+        }
+
+
+    def apply(self, event: dict):
+        """Applies an event, see DataBase.record_history for the kinds of events.
+
+        Args:
+            event (dict): The event.
+        """
+        op = event['op']
+
+        if op == 'turfje':
+            turfje = event['turfje']
+            self.turfjes[turfje['id']] = Turfje(turfje['id'], turfje['personId'], turfje['reasonAbbreviation'], turfje['remReasonAbbreviation'],
+                turfje['creationDate'], turfje['removed'], turfje['removalDate'])
+        elif op == 'removeTurfjes':
+            for id in event['ids']:
+                turfje = self.turfjes.get(id)
+
+                if turfje is not None:
+                    turfje.removed = True
+                    turfje.remReasonAbbreviation = event['remReasonAbbreviation']
+                    turfje.removalDate = event['removalDate']
+        elif op == 'person':
+            person = event['person']
+            self.people[person['id']] = Person(person['id'], person['name'], person['position'])
+        elif op == 'deletePerson':
+            self.people.pop(event['id'], None)
+        elif op == 'reason':
+            reason = event['reason']
+            self.reasons[reason['abbreviation']] = Reason(reason['abbreviation'], reason['description'])
+        elif op == 'deleteReason':
+            self.reasons.pop(event['abbreviation'], None)
+        elif op == 'removalReason':
+            reason = event['reason']
+            self.removalReasons[reason['abbreviation']] = RemovalReason(reason['abbreviation'], reason['description'], reason['turfjeCount'])
+        elif op == 'deleteRemovalReason':
+            self.removalReasons.pop(event['abbreviation'], None)
+        elif op == 'reset':
+            self.clear()
+
+
+    def get_turfje(self, id: int):
+        """Gets a turfje based on its id.
+
+        Args:
+            id (int): ID of the turfje to be gotten.
+
+        Raises:
+            TurfjeDoesNotExistError: Raised when no turfje with id existed.
+
+        Returns:
+            Turfje: Turfje with the given id.
+        """
+        turfje = self.turfjes.get(id)
+
+        if turfje is None:
+            raise TurfjeDoesNotExistError(id)
+
+        return turfje
+
+
+    def get_turfjes(self, personId: int):
+        """Gets all turfjes assigned to a person.
+
+        Args:
+            personId (int): ID of the person whose turfjes are to be gotten.
+
+        Returns:
+            [Turfje]: All turfjes belonging to the person, ordered by id.
+        """
+        return [turfje for turfje in self.turfjes.values() if turfje.personId == personId]
+
+
+    def get_all_turfjes(self):
+        """Gets every turfje.
+
+        Returns:
+            [Turfje]: All turfjes, ordered by id.
+        """
+        return list(self.turfjes.values())
+
+
+    def get_turfje_counts(self, personId: int):
+        """Gets how many turfjes a person had.
+
+        Args:
+            personId (int): ID of the person.
+
+        Returns:
+            (int, int): The amount of active and of removed turfjes.
+        """
+        turfjes = self.get_turfjes(personId)
+        removed = sum(turfje.removed for turfje in turfjes)
+
+        return len(turfjes) - removed, removed
+
+
+    def get_reason_counts(self, removal: bool = False):
+        """Gets how many turfjes had been given for every reason, or removed for every removal reason.
+
+        Args:
+            removal (bool, optional): Count removed turfjes per removal reason instead. Defaults to False.
+
+        Returns:
+            dict: The counts by reason abbreviation, leaving out reasons without any turfjes.
+        """
+        if removal:
+            return dict(Counter(turfje.remReasonAbbreviation for turfje in self.turfjes.values() if turfje.removed))
+
+        return dict(Counter(turfje.reasonAbbreviation for turfje in self.turfjes.values()))
+
+
+    def leaderboard(self, top: int = 10):
+        """Gets the people with the most active turfjes, like DataBase.leaderboard.
+
+        Args:
+            top (int, optional): Amount of people to get. Defaults to 10.
+
+        Returns:
+            List((int, int)): (personId, active count) of the top people, most turfjes first. Ties are ordered by personId.
+        """
+        counts = Counter()
+
+        for turfje in self.turfjes.values():
+            counts[turfje.personId] += not turfje.removed
+
+        return [(personId, -count) for count, personId in sorted((-count, personId) for personId, count in counts.items())[:top]]
+
+
+    def get_person(self, id: int):
+        """Gets a person.
+
+        Args:
+            id (int): ID of the person to be gotten.
+
+        Raises:
+            PersonDoesNotExistError: Raised when no person with ID existed.
+
+        Returns:
+            Person: The person as they were.
+        """
+        person = self.people.get(id)
+
+        if person is None:
+            raise PersonDoesNotExistError(id)
+
+        return person
+
+
+    def get_people(self):
+        """Gets everyone.
+
+        Returns:
+            List(Person): All people.
+        """
+        return list(self.people.values())
+
+
+    def get_reason(self, abbreviation: str):
+        """Gets a reason.
+
+        Args:
+            abbreviation (str): Abbreviation of the reason to be gotten.
+
+        Raises:
+            ReasonError: Raised when the reason didn't exist.
+
+        Returns:
+            Reason: The reason.
+        """
+        reason = self.reasons.get(abbreviation)
+
+        if reason is None:
+            raise ReasonError(abbreviation, "doesntexist")
+
+        return reason
+
+
+    def get_removal_reason(self, abbreviation: str):
+        """Gets a removal reason.
+
+        Args:
+            abbreviation (str): Abbreviation of the reason to be gotten.
+
+        Raises:
+            ReasonError: Raised when the reason didn't exist.
+
+        Returns:
+            RemovalReason: The reason.
+        """
+        reason = self.removalReasons.get(abbreviation)
+
+        if reason is None:
+            raise ReasonError(abbreviation, "doesntexist")
+
+        return reason
+
+
+class HistoryManager(ManagerBase):
+    """Class that keeps the history of the db: every change is appended as an event to history.journal, and every now and then a checkpoint of the whole db is written to the history directory. history.json lists the checkpoints, with when they were taken and where in the journal their events end. The state at any moment is then the checkpoint before it plus the events in between, so going back in time never replays more than the events since one checkpoint.
+
+    Checkpoints are taken by replaying the events since the previous one, so taking one doesn't need the other managers. Unlike other journals, history.journal is never folded into a snapshot.
+
+    Inherits from ManagerBase.
+
+    Args:
+        checkpointInterval (int, optional): Minimum amount of events between two checkpoints. A checkpoint also waits until the events since the last one are a quarter of its size, see CHECKPOINT_GROWTH. None only takes checkpoints through checkpoint. Defaults to 10000.
+        cache (bool, optional): See ManagerBase. Defaults to False.
+        durability (str, optional): See ManagerBase. Defaults to 'fsync'.
+        codec (str, optional): See ManagerBase, also used for the checkpoints. Defaults to 'json'.
+        metrics (Metrics, optional): See ManagerBase. Defaults to None.
+    """
+    def __init__(self, checkpointInterval: int = 10000, cache: bool = False, durability: str = 'fsync', codec: str = 'json', metrics = None):
+        self.checkpointInterval = checkpointInterval
+
+        super().__init__('./data/history.json', cache, durability, codec, metrics)
+
+        # checkpoint takes it as well, also when a flush holding it gets there through write_journal
+        self.flushLock = threading.RLock()
+
+        self.load()
+
+
+    def load(self):
+        """Loads the list of checkpoints and counts the events since the last one.
+        """
+        self.checkpoints = self.read_file()
+        self.eventCount = len(self.read_journal(self.checkpoints[-1]['offset'])) if len(self.checkpoints) > 0 else 0
+
+
+    def apply_journal(self, records):
+        """Counts events appended by another process.
+
+        Args:
+            records (List(dict)): The events.
+        """
+        self.eventCount += len(records)
+
+
+    def is_empty(self):
+        """Checks whether the history has started, which needs a first checkpoint of the db.
+
+        Returns:
+            bool: True if there are no checkpoints.
+        """
+        return len(self.checkpoints) == 0
+
+
+    def record(self, events):
+        """Appends events to the history, timestamped with the current time. Takes a checkpoint when one is due, see write_journal.
+
+        Args:
+            events (List(dict)): The events, see DataBase.record_history.
+        """
+        now = time.time()
+        events = [{'time': now, **event} for event in events]
+
+        if self.writes_postponed():
+            self.pendingJournal += events
+            return
+
+        self.write_journal(events)
+
+
+    def write_journal(self, records):
+        """Adjusted version of ManagerBase.write_journal, which takes a checkpoint once enough events have been written since the last one.
+
+        Args:
+            records (List(dict)): The events to be appended.
+        """
+        super().write_journal(records)
+
+        self.eventCount += len(records)
+
+        if self.checkpointInterval is None or len(self.checkpoints) == 0:
+            return
+
+        if self.eventCount >= max(self.checkpointInterval, self.checkpoints[-1]['records'] // CHECKPOINT_GROWTH):
+            self.checkpoint()
+
+
+    def read_events(self, offset: int, end: float = None):
+        """Reads events from the journal without changing it, stopping at the first event after end. A last event that was only partially written is left out.
+
+        Args:
+            offset (int): Position in the journal to start reading at.
+            end (float, optional): Stop before the first event after this time. Defaults to None, which reads to the end.
+
+        Returns:
+            (List(dict), int): The events, and the position in the journal after the last one read to the end. When stopped early that position is None.
+        """
+        events = []
+
+        if not os.path.exists(self.journalPath):
+            return events, offset
+
+        with open(self.journalPath, 'rb') as file:
+            file.seek(offset)
+
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break
+
+                event = json.loads(line)
+
+                if end is not None and event['time'] > end:
+                    return events, None
+
+                events.append(event)
+                offset += len(line)
+
+        self.count_metric('recordsScanned', len(events))
+
+        return events, offset
+
+
+    def read_checkpoint(self, checkpoint: dict):
+        """Reads the state of a checkpoint.
+
+        Args:
+            checkpoint (dict): The checkpoint, from self.checkpoints.
+
+        Returns:
+            HistoryState: The state when the checkpoint was taken.
+        """
+        with open(f"{HISTORY_DIRECTORY}/{checkpoint['file']}", 'rb') as file:
+            content = file.read()
+
+        self.count_metric('bytesRead', len(content))
+
+        state = HistoryState(checkpoint['time'])
+        state.restore(detect_codec(content).decode(content))
+
+        return state
+
+
+    def state_at(self, timestamp: float):
+        """Rebuilds the db as it was at a moment, from the last checkpoint before it and the events after that checkpoint up to the moment. Changes that are still waiting for a flush are included.
+
+        Args:
+            timestamp (float): The moment.
+
+        Raises:
+            ValueError: Raised when the moment is before the history started.
+
+        Returns:
+            HistoryState: The db at that moment.
+        """
+        index = bisect_right([checkpoint['time'] for checkpoint in self.checkpoints], timestamp) - 1
+
+        if index < 0:
+            raise ValueError(f"The history starts at {self.checkpoints[0]['time'] if len(self.checkpoints) > 0 else time.time()}, not at {timestamp}")
+
+        state = self.read_checkpoint(self.checkpoints[index])
+        events, end = self.read_events(self.checkpoints[index]['offset'], timestamp)
+
+        if end is not None:
+            # events after the journal are only in memory yet
+            events += [event for event in self.pendingJournal if event['time'] <= timestamp]
+
+        for event in events:
+            state.apply(event)
+
+        state.time = timestamp
+
+        return state
+
+
+    def checkpoint(self, state: HistoryState = None):
+        """Writes a checkpoint of the db as it is now, right away, also during a batch. Holds flushLock, so it can't run at the same time as a flush on another thread, which can take a checkpoint as well.
+
+        Args:
+            state (HistoryState, optional): The db as it is now, for the first checkpoint. Defaults to None, which replays the events since the last checkpoint.
+        """
+        with self.flushLock:
+            self.write_checkpoint(state)
+
+
+    def write_checkpoint(self, state: HistoryState):
+        """Writes a checkpoint, expects the caller to hold flushLock. See checkpoint.
+
+        Args:
+            state (HistoryState): The db as it is now, or None to replay the events since the last checkpoint.
+        """
+        if state is None:
+            state = self.read_checkpoint(self.checkpoints[-1])
+            events, offset = self.read_events(self.checkpoints[-1]['offset'])
+
+            for event in events:
+                state.apply(event)
+        else:
+            offset = os.path.getsize(self.journalPath) if os.path.exists(self.journalPath) else 0
+
+        # the offset is unique, unlike the time
+        name = f'checkpoint-{offset}.json'
+        data = state.serialize()
+
+        os.makedirs(HISTORY_DIRECTORY, exist_ok = True)
+        self.write_atomically(f'{HISTORY_DIRECTORY}/{name}', self.codec.encode(data))
+
+        self.checkpoints.append({'time': time.time(), 'offset': offset, 'file': name, 'records': len(data['turfjes']) + len(data['people'])})
+        self.eventCount = 0
+
+        self.write_file(self.checkpoints)
+
+
+    def take_pending(self):
+        """Adjusted version of ManagerBase.take_pending. Writing the list of checkpoints leaves the journal alone, so it doesn't make the postponed events redundant and both are taken.
+
+        Returns:
+            (str, object): Either ('journal', events) or ('history', (checkpoints, events)). None when there is nothing to write.
+        """
+        events = self.pendingJournal
+        pending = super().take_pending()
+
+        if pending is None or pending[0] == 'journal':
+            return pending
+
+        return ('history', (pending[1], events))
+
+
+    def write_pending(self, pending):
+        """Adjusted version of ManagerBase.write_pending, which writes the events before the list of checkpoints when both were taken.
+
+        Args:
+            pending ((str, object)): The result of take_pending.
+        """
+        if pending is None or pending[0] != 'history':
+            super().write_pending(pending)
+            return
+
+        checkpoints, events = pending[1]
+
+        if len(events) > 0:
+            try:
+                super().write_pending(('journal', events))
+            except BaseException:
+                self.dirty = True
+                raise
+
+        super().write_pending(('file', checkpoints))
+
+
+    def restore_pending(self, pending):
+        """Adjusted version of ManagerBase.restore_pending, which also puts back the changes taken together by take_pending.
+
+        Args:
+            pending ((str, object)): The result of take_pending.
+        """
+        if pending is None or pending[0] != 'history':
+            super().restore_pending(pending)
+            return
+
+        checkpoints, events = pending[1]
+
+        self.dirty = True
+        self.pendingJournal[:0] = events
+
+
+    def write_file(self, data):
+        """Adjusted version of ManagerBase.write_file, which keeps the journal: the checkpoints only point into it.
+
+        Args:
+            data (List(dict)): The checkpoints.
+        """
+        self.write_atomically(self.filePath, self.codec.encode(data))
+
+        self.fileStamp = self.file_stamp()
+
+
+    def serialize(self):
+        """Adjusted version of ManagerBase.serialize, specific to HistoryManager.
+
+        Returns:
+            List(dict): The checkpoints.
+        """
+        return self.checkpoints
+
+
+    def reset(self):
+        """Starts a new history without checkpoints, throwing the old one away. DataBase.reset does not call this, it records the reset as an event instead.
+        """
+        self.checkpoints = []
+        self.eventCount = 0
+
+        # postponed events belong to the old history
+        self.pendingJournal = []
+        self.clear_journal()
+        self.save_file()
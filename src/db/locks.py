@@ -0,0 +1,175 @@
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # advisory file locks are only available on unix, elsewhere a data directory can't be shared between processes
+    fcntl = None
+
+
+class ReadWriteLock:
+    """Lock that lets any number of threads read at the same time, while a writing thread has it to itself. Waiting writers go before new readers, so a steady stream of reads can't starve writes.
+
+    Both modes are reentrant. The thread holding the write lock may also take the read lock, but a thread holding only the read lock can't take the write lock, since two threads doing that at once would deadlock.
+    """
+    def __init__(self):
+        self.condition = threading.Condition(threading.Lock())
+        self.readers = {}
+        self.writer = None
+        self.writeDepth = 0
+        self.waitingWriters = 0
+
+
+    def acquire_read(self):
+        """Takes the read lock, waiting for writers to finish first.
+        """
+        me = threading.get_ident()
+
+        with self.condition:
+            if self.writer != me and me not in self.readers:
+                while self.writer is not None or self.waitingWriters > 0:
+                    self.condition.wait()
+
+            self.readers[me] = self.readers.get(me, 0) + 1
+
+
+    def release_read(self):
+        """Releases the read lock taken by this thread.
+        """
+        me = threading.get_ident()
+
+        with self.condition:
+            self.readers[me] -= 1
+
+            if self.readers[me] == 0:
+                del self.readers[me]
+                self.condition.notify_all()
+
+
+    def acquire_write(self):
+        """Takes the write lock, waiting for all other readers and writers to finish first.
+
+        Raises:
+            RuntimeError: Raised when this thread only holds the read lock.
+        """
+        me = threading.get_ident()
+
+        with self.condition:
+            if self.writer == me:
+                self.writeDepth += 1
+                return
+
+            if me in self.readers:
+                raise RuntimeError("Can not take the write lock while holding the read lock.")
+
+            self.waitingWriters += 1
+
+            while self.writer is not None or len(self.readers) > 0:
+                self.condition.wait()
+
+            self.waitingWriters -= 1
+            self.writer = me
+            self.writeDepth = 1
+
+
+    def release_write(self):
+        """Releases the write lock taken by this thread.
+        """
+        with self.condition:
+            self.writeDepth -= 1
+
+            if self.writeDepth == 0:
+                self.writer = None
+                self.condition.notify_all()
+
+
+    @contextmanager
+    def read(self):
+        """Context manager that holds the read lock.
+        """
+        self.acquire_read()
+
+        try:
+            yield
+        finally:
+            self.release_read()
+
+
+    @contextmanager
+    def write(self):
+        """Context manager that holds the write lock.
+        """
+        self.acquire_write()
+
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class FileLock:
+    """Advisory lock on a file, shared between processes: any number of processes can hold it shared, a process holding it exclusive has it to itself. Reentrant, but not meant to be used by several threads at once; DataBase makes sure only the thread holding the managers write lock uses it.
+
+    Args:
+        path (str): Path of the lock file, created when it does not exist.
+
+    Raises:
+        RuntimeError: Raised when file locks are not available on this platform.
+    """
+    def __init__(self, path: str):
+        if fcntl is None:
+            raise RuntimeError("File locks are not available on this platform.")
+
+        self.path = path
+        self.file = None
+        self.depth = 0
+        self.exclusive = False
+
+
+    def acquire(self, exclusive: bool):
+        """Takes the lock, waiting for other processes to release it first.
+
+        Args:
+            exclusive (bool): Take the lock exclusive instead of shared.
+
+        Raises:
+            RuntimeError: Raised when asking for the lock exclusive while only holding it shared.
+
+        Returns:
+            bool: True if the lock was not held yet, meaning other processes may have changed the files since it was last held.
+        """
+        if self.depth > 0:
+            if exclusive and not self.exclusive:
+                raise RuntimeError("Can not take the file lock exclusive while holding it shared.")
+
+            self.depth += 1
+            return False
+
+        if self.file is None:
+            self.file = open(self.path, 'a')
+
+        fcntl.flock(self.file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+        self.depth = 1
+        self.exclusive = exclusive
+
+        return True
+
+
+    def release(self):
+        """Releases the lock once the outermost acquire is released.
+        """
+        self.depth -= 1
+
+        if self.depth == 0:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+
+
+    def close(self):
+        """Closes the lock file, which also releases the lock.
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.depth = 0
@@ -1,39 +1,490 @@
 import json
+import marshal
 import os.path
+import threading
+import time
+from src.db.codecs import get_codec, detect_codec
+from src.db.metrics import measured
+
+# files changed less than this many seconds ago are not cached, since a change within the same mtime tick could go unnoticed
+CACHE_SETTLE_TIME = 2
+
+# 'none' relies on the OS to write files eventually, 'fsync' makes sure file contents are on disk before they replace the old file, 'full' also waits for the rename itself to be on disk
+DURABILITY_LEVELS = ('none', 'fsync', 'full')
 
 class ManagerBase:
     """Base DB manager class that other DB managers inherit from.
+
+    Args:
+        filePath (str): Path of the file the manager stores its data in.
+        cache (bool, optional): Keep a binary cache of the parsed file next to it, which is used instead of parsing the file when it did not change. Defaults to False.
+        durability (str, optional): How sure writes have to be to survive a crash of the machine, one of DURABILITY_LEVELS. Files are always replaced atomically, so a crash of the program never leaves a half written file. Defaults to 'fsync'.
+        codec (str, optional): Format the file is written in, one of codecs.CODECS. Files are read in whatever format they were written in, so switching codecs migrates a file the next time it is written. Defaults to 'json'.
+        metrics (Metrics, optional): Where to record timings of reads and writes, bytes read and written and records scanned, under the name of the file. Defaults to None, which records nothing.
+
+    Raises:
+        ValueError: Raised when an unknown durability level or codec is given.
     """
-    def __init__(self, filePath):
+    def __init__(self, filePath, cache: bool = False, durability: str = 'fsync', codec: str = 'json', metrics = None):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level: {durability}")
+
+        self.codec = get_codec(codec)
+        self.metrics = metrics
+        self.metricsName = os.path.splitext(os.path.basename(filePath))[0]
+        self.metricsPrefix = self.metricsName + '.'
         self.filePath = filePath
+        self.journalPath = os.path.splitext(filePath)[0] + '.journal'
+        self.cachePath = os.path.splitext(filePath)[0] + '.cache'
+        self.cache = cache
+        self.durability = durability
+
+        # state used to postpone writes while a batch is running or while a background thread does the writing
+        self.batchDepth = 0
+        self.writesDeferred = False
+        self.dirty = False
+        self.pendingJournal = []
+        self.flushLock = threading.Lock()
+
+        # what the in memory state was loaded from, so refresh can tell whether another process changed the files
+        self.fileStamp = None
+        self.journalOffset = 0
+
+        # bumped by DataBase on every change, so cached query results of older versions are no longer used
+        self.version = 0
 
         if not os.path.exists(self.filePath):
             self.reset()
 
 
+    def load(self):
+        """Default load method, (re)builds the in memory state from the file. Managers that keep state override this.
+        """
+        pass
+
+
+    def file_stamp(self):
+        """Gets what identifies the current version of the file. Files are replaced atomically on every write, so a different inode also shows a change when the size and mtime happen to match.
+
+        Returns:
+            (int, int, int): The mtime in nanoseconds, size and inode of the file. None when the file does not exist.
+        """
+        try:
+            stat = os.stat(self.filePath)
+        except FileNotFoundError:
+            return None
+
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+    def refresh(self):
+        """Brings the in memory state up to date with changes other processes made to the files. The file is only reloaded when it was replaced; when only the journal grew, just the new records are read and applied. Must be called while holding the file lock, see DataBase(shared = True).
+
+        Returns:
+            bool: True if anything was reloaded.
+        """
+        if self.file_stamp() != self.fileStamp:
+            self.load()
+            return True
+
+        try:
+            journalSize = os.path.getsize(self.journalPath)
+        except FileNotFoundError:
+            journalSize = 0
+
+        if journalSize > self.journalOffset:
+            self.apply_journal(self.read_journal(self.journalOffset))
+            return True
+
+        return False
+
+
+    def get_version(self):
+        """Gets the version of the in memory state, which changes whenever the state changes, see DataBase(queryCacheSize).
+
+        Returns:
+            int: The version.
+        """
+        return self.version
+
+
+    def count_metric(self, counter: str, amount: int):
+        """Adds to a metrics counter of the file, when metrics are recorded.
+
+        Args:
+            counter (str): One of metrics.COUNTERS.
+            amount (int): Amount to add.
+        """
+        if self.metrics is not None:
+            self.metrics.add(counter, self.metricsName, amount)
+
+
+    def apply_journal(self, records):
+        """Default apply journal method, applies journal records on top of the in memory state. Only managers that write a journal override this.
+
+        Args:
+            records (List(dict)): The records to be applied, in order.
+        """
+        pass
+
+
+    @measured
     def read_file(self):
-        """Default read file method that returns file contents as a dict.
+        """Default read file method that returns file contents as a dict. Uses the binary cache when it is enabled and still matches the file.
+
+        Returns:
+            dict: Dictionary containing the files contents.
+        """
+        self.fileStamp = self.file_stamp()
+
+        # anything still in the journal belongs to this version of the file
+        self.journalOffset = 0
+
+        if not self.cache:
+            return self.count_records(self.parse_file())
+
+        stat = os.stat(self.filePath)
+        key = (marshal.version, stat.st_mtime_ns, stat.st_size)
+
+        try:
+            # marshal.load reads file objects in tiny chunks, reading everything at once is many times faster
+            with open(self.cachePath, 'rb') as file:
+                content = file.read()
+
+            self.count_metric('bytesRead', len(content))
+            cachedKey, data = marshal.loads(content)
+
+            if cachedKey == key:
+                return self.count_records(data)
+        except (OSError, EOFError, ValueError, TypeError):
+            # a missing or unreadable cache is simply rebuilt
+            pass
+
+        data = self.parse_file()
+
+        if time.time() - stat.st_mtime > CACHE_SETTLE_TIME:
+            # the cache can always be rebuilt, so it doesn't need to be synced
+            self.write_atomically(self.cachePath, marshal.dumps((key, data)), sync = False)
+
+        return self.count_records(data)
+
+
+    def count_records(self, data):
+        """Counts the records in data that was read as scanned, when metrics are recorded.
+
+        Args:
+            data (dict or List): The data that was read.
+
+        Returns:
+            dict or List: The same data.
+        """
+        if isinstance(data, list):
+            self.count_metric('recordsScanned', len(data))
+
+        return data
+
+
+    def parse_file(self):
+        """Parses the file with the codec it was written with, without using the cache.
+
+        Returns:
+            dict: Dictionary containing the files contents.
+        """
+        with open(self.filePath, 'rb') as file:
+            content = file.read()
+
+        self.count_metric('bytesRead', len(content))
+
+        return detect_codec(content).decode(content)
+
+
+    def migrate(self):
+        """Rewrites the file right away when it was written with another codec than the one the manager uses, instead of waiting for the next write.
+
+        Returns:
+            bool: True if the file was rewritten.
+        """
+        with open(self.filePath, 'rb') as file:
+            # the header is enough to recognize the codec
+            codec = detect_codec(file.read(16))
+
+        if codec is self.codec:
+            return False
+
+        with self.flushLock:
+            # a full write contains all postponed changes
+            self.dirty = True
+            self.write_pending(self.take_pending())
+
+        return True
+
+
+    def serialize(self):
+        """Default serialize method, converts the in memory state to something the codec can store. Managers that keep state override this.
+
+        Returns:
+            dict or List(dict): The serializable state.
+        """
+        return {}
+
+
+    @measured
+    def save_file(self, data = None):
+        """Default save file method that saves whatever data it was given, in the format of the managers codec. While writes are postponed the manager is only marked dirty and the file is written on the next flush.
+
+        Args:
+            data (dict or List(dict), optional): data to be saved. Must be given as a dict or list of dicts. Defaults to the result of serialize().
+        """
+        if self.writes_postponed():
+            self.dirty = True
+            return
+
+        self.write_file(self.serialize() if data is None else data)
+
+
+    @measured
+    def write_file(self, data):
+        """Writes data to the file immediately. The written file is a full snapshot, so any journal is cleared afterwards.
+
+        Args:
+            data (dict or List(dict)): data to be saved.
+        """
+        self.write_atomically(self.filePath, self.codec.encode(data))
+
+        self.clear_journal()
+
+        self.fileStamp = self.file_stamp()
+
+
+    def write_atomically(self, path: str, content: bytes, sync: bool = True):
+        """Replaces a file by writing a temporary file next to it and renaming that over the original, so the file is never seen half written.
+
+        Args:
+            path (str): Path of the file to be replaced.
+            content (bytes): The new contents.
+            sync (bool, optional): Follow the durability level. If False the file is never synced. Defaults to True.
+        """
+        tempPath = path + '.tmp'
+
+        self.count_metric('bytesWritten', len(content))
+
+        with open(tempPath, 'wb') as file:
+            file.write(content)
+
+            if sync and self.durability != 'none':
+                file.flush()
+                os.fsync(file.fileno())
+
+        os.replace(tempPath, path)
+
+        if sync and self.durability == 'full' and os.name == 'posix':
+            directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+
+
+    def read_journal(self, offset: int = 0):
+        """Reads the records appended to the journal next to the file. A last record that was only partially written (e.g. because of a crash) is dropped from the journal.
+
+        Args:
+            offset (int, optional): Position in the journal to start reading at, to only read records appended since an earlier read. Defaults to 0.
+
+        Returns:
+            List(dict): The journal records in the order they were appended. Empty if there is no journal.
+        """
+        if not os.path.exists(self.journalPath):
+            return []
+
+        with open(self.journalPath, 'rb+') as file:
+            file.seek(offset)
+            content = file.read()
+            end = content.rfind(b'\n') + 1
+
+            if end != len(content):
+                file.truncate(offset + end)
+
+        self.journalOffset = offset + end
+        records = [json.loads(line) for line in content[:end].splitlines()]
+
+        self.count_metric('bytesRead', len(content))
+        self.count_metric('recordsScanned', len(records))
+
+        return records
+
+
+    def append_journal(self, record):
+        """Appends a single record to the journal, without touching the main file. While writes are postponed the record is kept in memory until the next flush.
+
+        Args:
+            record (dict): The record to be appended.
+        """
+        if self.writes_postponed():
+            self.pendingJournal.append(record)
+            return
+
+        self.write_journal([record])
+
+
+    @measured
+    def write_journal(self, records):
+        """Appends records to the journal immediately, using a single write.
+
+        Args:
+            records (List(dict)): The records to be appended.
+        """
+        content = ''.join(json.dumps(record) + '\n' for record in records).encode()
+
+        self.count_metric('bytesWritten', len(content))
+
+        with open(self.journalPath, 'ab') as file:
+            file.write(content)
+
+            if self.durability != 'none':
+                file.flush()
+                os.fsync(file.fileno())
+
+            self.journalOffset = file.tell()
+
+
+    def clear_journal(self):
+        """Removes the journal. Only call this after its records have been folded into the main file.
+        """
+        if os.path.exists(self.journalPath):
+            os.remove(self.journalPath)
+
+        self.journalOffset = 0
+
+
+    def writes_postponed(self):
+        """Checks whether writes currently have to wait for a flush.
 
         Returns:
-            dict: Dictionary containing the json files contents.
+            bool: True during a batch or when writes are deferred.
+        """
+        return self.batchDepth > 0 or self.writesDeferred
+
+
+    def defer_writes(self):
+        """Postpones all writes until flush is called, also outside of batches. Used when writing is done by a background thread.
+        """
+        self.writesDeferred = True
+
+
+    def begin_batch(self):
+        """Starts postponing writes until the matching end_batch. Batches can be nested, only the outermost one writes.
         """
-        with open(self.filePath) as file:
-            return json.load(file)
-    
+        if self.batchDepth == 0 and self.writesDeferred:
+            # a rollback reloads from disk, so the state from before the batch has to be on disk
+            self.flush()
+
+        self.batchDepth += 1
 
-    def save_file(self, data):
-        """Default save file method that saves whatever data it was given as a json file.
+
+    def end_batch(self, commit: bool = True):
+        """Ends a batch started with begin_batch. When the outermost batch ends, postponed changes are either written to disk (or left to the next flush when writes are deferred) or thrown away.
 
         Args:
-            data (dict or List(dict)): data to be saved. Must be given as a dict or list of dicts. 
+            commit (bool, optional): Write the postponed changes if True, roll back the in memory state to what is on disk if False. Defaults to True.
         """
-        with open(self.filePath, 'w') as file:
-            json.dump(data, file)
+        self.batchDepth -= 1
+
+        if self.batchDepth > 0:
+            return
+
+        if not commit:
+            self.rollback()
+        elif not self.writesDeferred:
+            self.flush()
+
+
+    def flush(self):
+        """Writes all postponed changes to disk. The caller must make sure nothing changes the manager while it runs.
+        """
+        with self.flushLock:
+            self.write_pending(self.take_pending())
+
+
+    def has_pending(self):
+        """Checks whether there are postponed changes.
+
+        Returns:
+            bool: True if a flush would write something.
+        """
+        return self.dirty or len(self.pendingJournal) > 0
+
+
+    def take_pending(self):
+        """Takes the postponed changes out of the manager, so they can be written by write_pending without blocking changes to the manager. A full write makes pending journal records redundant, so only one of the two is taken. The caller must hold flushLock until write_pending is done, so writes happen in the order the changes were taken.
+
+        Returns:
+            (str, object): Either ('file', data) or ('journal', records). None when there is nothing to write.
+        """
+        if self.dirty:
+            pending = ('file', self.serialize())
+        elif len(self.pendingJournal) > 0:
+            pending = ('journal', self.pendingJournal)
+        else:
+            pending = None
+
+        self.dirty = False
+        self.pendingJournal = []
+
+        return pending
+
+
+    def write_pending(self, pending):
+        """Writes changes taken by take_pending. If writing fails the changes are put back, so the next flush tries again.
+
+        Args:
+            pending ((str, object)): The result of take_pending.
+        """
+        if pending is None:
+            return
+
+        kind, data = pending
+
+        try:
+            if kind == 'file':
+                self.write_file(data)
+            else:
+                self.write_journal(data)
+        except BaseException:
+            self.restore_pending(pending)
+            raise
+
+
+    def restore_pending(self, pending):
+        """Puts changes taken by take_pending back into the manager, so the next flush writes them.
+
+        Args:
+            pending ((str, object)): The result of take_pending.
+        """
+        if pending is None:
+            return
+
+        kind, data = pending
+
+        if kind == 'file':
+            self.dirty = True
+        else:
+            self.pendingJournal[:0] = data
+
+
+    def rollback(self):
+        """Throws away all postponed changes and reloads the in memory state from disk.
+        """
+        self.dirty = False
+        self.pendingJournal = []
+
+        self.load()
 
 
     def reset(self):
-        """Default reset method, unused but here for backup. Will write an empty json file.
+        """Default reset method, unused but here for backup. Will write an empty file.
         """
         defaultReset = {}
 
-        self.save_file(defaultReset)
\ No newline at end of file
+        self.save_file(defaultReset)
@@ -0,0 +1,205 @@
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# upper bounds of the latency histogram buckets in seconds, a last bucket catches everything slower
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# counters kept per file, with their description
+COUNTERS = {
+    'bytesRead': 'Bytes read from the file, its cache and its journal.',
+    'bytesWritten': 'Bytes written to the file, its cache and its journal.',
+    'recordsScanned': 'Records looked at to load the file or answer queries.'
+}
+
+PROMETHEUS_PREFIX = 'turfgunmaverick'
+
+
+def measured(method):
+    """Decorator that records how long every call of a method takes, when the object it belongs to has metrics. Without metrics it only costs an attribute lookup.
+
+    The call is recorded as metricsPrefix + the name of the method, where metricsPrefix is an attribute of the object as well.
+
+    Args:
+        method (function): The method to be measured.
+
+    Returns:
+        function: The measured method.
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        metrics = self.metrics
+
+        if metrics is None:
+            return method(self, *args, **kwargs)
+
+        start = time.perf_counter()
+
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            metrics.observe(self.metricsPrefix + name, time.perf_counter() - start)
+
+    return wrapper
+
+
+class Metrics:
+    """Collects call counts and latency histograms per method, and counters per file, see COUNTERS. Can be shared between threads.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+
+    def reset(self):
+        """Sets everything back to zero.
+        """
+        with self.lock:
+            # [count, total seconds, count per bucket] by method
+            self.calls = {}
+            self.counters = {name: {} for name in COUNTERS}
+
+
+    def observe(self, name: str, seconds: float):
+        """Records a call.
+
+        Args:
+            name (str): Name of the method.
+            seconds (float): Time the call took.
+        """
+        bucket = bisect_left(LATENCY_BUCKETS, seconds)
+
+        with self.lock:
+            call = self.calls.get(name)
+
+            if call is None:
+                call = self.calls[name] = [0, 0.0, [0] * (len(LATENCY_BUCKETS) + 1)]
+
+            call[0] += 1
+            call[1] += seconds
+            call[2][bucket] += 1
+
+
+    def add(self, counter: str, file: str, amount: int):
+        """Adds to a counter.
+
+        Args:
+            counter (str): One of COUNTERS.
+            file (str): Name of the file the amount is about.
+            amount (int): Amount to add.
+        """
+        with self.lock:
+            counts = self.counters[counter]
+            counts[file] = counts.get(file, 0) + amount
+
+
+    def snapshot(self):
+        """Gets a copy of everything collected so far.
+
+        Returns:
+            dict: 'calls' with the count, total seconds and cumulative histogram ({upper bound: count}, the last bound being '+Inf') by method, and every counter in COUNTERS by file.
+        """
+        with self.lock:
+            calls = {name: (count, seconds, list(buckets)) for name, (count, seconds, buckets) in self.calls.items()}
+            snapshot = {counter: dict(counts) for counter, counts in self.counters.items()}
+
+        snapshot['calls'] = {}
+
+        for name, (count, seconds, buckets) in sorted(calls.items()):
+            histogram = {}
+            total = 0
+
+            for bound, bucketCount in zip(LATENCY_BUCKETS + ('+Inf',), buckets):
+                total += bucketCount
+                histogram[str(bound)] = total
+
+            snapshot['calls'][name] = {'count': count, 'seconds': seconds, 'histogram': histogram}
+
+        return snapshot
+
+
+    def prometheus(self):
+        """Gets everything collected so far in the Prometheus text format, e.g. for the textfile collector of node_exporter.
+
+        Returns:
+            str: The metrics.
+        """
+        snapshot = self.snapshot()
+        name = f'{PROMETHEUS_PREFIX}_call_duration_seconds'
+        lines = [
+            f'# HELP {name} Time spent in DataBase and manager methods.',
+            f'# TYPE {name} histogram'
+        ]
+
+        for method, call in snapshot['calls'].items():
+            for bound, count in call['histogram'].items():
+                lines.append(f'{name}_bucket{{method="{method}",le="{bound}"}} {count}')
+
+            lines.append(f'{name}_sum{{method="{method}"}} {call["seconds"]}')
+            lines.append(f'{name}_count{{method="{method}"}} {call["count"]}')
+
+        for counter, description in COUNTERS.items():
+            # bytesRead becomes bytes_read_total
+            name = PROMETHEUS_PREFIX + '_' + ''.join('_' + character.lower() if character.isupper() else character for character in counter) + '_total'
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} counter')
+
+            for file, count in sorted(snapshot[counter].items()):
+                lines.append(f'{name}{{file="{file}"}} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+    def dump(self, path: str):
+        """Writes everything collected so far to a file, replacing it atomically so readers never see half of it. Files ending in .prom get the Prometheus text format, others json.
+
+        Args:
+            path (str): Path of the file.
+        """
+        if path.endswith('.prom'):
+            content = self.prometheus()
+        else:
+            content = json.dumps(self.snapshot(), indent = 2)
+
+        tempPath = path + '.tmp'
+
+        with open(tempPath, 'w') as file:
+            file.write(content)
+
+        os.replace(tempPath, path)
+
+
+class MetricsDumper(threading.Thread):
+    """Background thread that dumps metrics to a file every interval, see Metrics.dump.
+
+    Args:
+        metrics (Metrics): The metrics to be dumped.
+        path (str): Path of the file.
+        interval (float): Time between two dumps, in milliseconds.
+    """
+    def __init__(self, metrics: Metrics, path: str, interval: float):
+        super().__init__(name = 'MetricsDumper', daemon = True)
+
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval / 1000
+        self.stopped = threading.Event()
+
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.metrics.dump(self.path)
+
+
+    def stop(self):
+        """Stops the thread and dumps one last time, so the file ends up complete.
+        """
+        self.stopped.set()
+        self.join()
+
+        self.metrics.dump(self.path)
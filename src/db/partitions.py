@@ -0,0 +1,417 @@
+import glob
+import json
+import os
+import threading
+from collections import Counter
+from datetime import datetime
+from src.db.turfje import TurfjeManager, turfje_key
+from src.db.reasoncodes import reasonCodes
+from src.exceptions import TurfjeDoesNotExistError
+
+ARCHIVE_DIRECTORY = './data/archive'
+MANIFEST_PATH = ARCHIVE_DIRECTORY + '/manifest.json'
+
+
+def academic_year(timestamp: float):
+    """Gets the academic year a timestamp falls in. Academic years start on the first of September, in local time.
+
+    Args:
+        timestamp (float): The timestamp.
+
+    Returns:
+        int: The calendar year the academic year starts in.
+    """
+    day = datetime.fromtimestamp(timestamp)
+
+    return day.year if day.month >= 9 else day.year - 1
+
+
+def academic_year_bounds(year: int):
+    """Gets the time range of an academic year.
+
+    Args:
+        year (int): The calendar year the academic year starts in.
+
+    Returns:
+        (float, float): Timestamps of its start (included) and end (excluded).
+    """
+    return datetime(year, 9, 1).timestamp(), datetime(year + 1, 9, 1).timestamp()
+
+
+class PartitionedTurfjeManager(TurfjeManager):
+    """TurfjeManager that only keeps the turfjes needed day to day in turfjes.json. compact_partitions moves removed turfjes into an archive file per academic year, which is only loaded once a query needs turfjes from that year. A manifest next to the archives keeps their counts, so get_turfje_counts and get_reason_counts are right without loading any archive.
+
+    Removed turfjes stay in turfjes.json until compact_partitions runs. Archived turfjes can't be removed again.
+
+    Inherits from TurfjeManager.
+
+    Args:
+        journal (bool, optional): See TurfjeManager. Defaults to False.
+        columnar (bool, optional): See TurfjeManager. Defaults to False.
+        cache (bool, optional): See ManagerBase. Defaults to False.
+        durability (str, optional): See ManagerBase. Defaults to 'fsync'.
+        codec (str, optional): See ManagerBase, also used for the archives. Defaults to 'json'.
+        metrics (Metrics, optional): See ManagerBase, also used for the archives. Defaults to None.
+    """
+    def __init__(self, journal: bool = False, columnar: bool = False, cache: bool = False, durability: str = 'fsync', codec: str = 'json', metrics = None):
+        # archives are loaded by queries, which only hold the read lock
+        self.archiveLock = threading.Lock()
+
+        # set by a reset whose empty turfjes.json hasn't been written yet, the archives are removed once it is
+        self.archivesReset = False
+
+        super().__init__(journal, columnar, cache, durability, codec = codec, metrics = metrics)
+
+
+    def load(self):
+        """Loads the turfjes in turfjes.json and the manifest of the archives, adding the archived turfjes to the counts. The archives themselves are loaded when they are first needed.
+        """
+        super().load()
+
+        self.archives = {}
+        self.manifest = self.read_manifest()
+
+        # a rolled back reset keeps the archives
+        self.archivesReset = False
+
+        for counts in self.manifest.values():
+            for personId, count in counts['removedCounts'].items():
+                self.removedCounts[personId] += count
+
+                # see TurfjeManager.add_turfje
+                if personId not in self.activeCounts:
+                    self.activeCounts[personId] = 0
+
+            for abbreviation, count in counts['reasonCounts'].items():
+                self.reasonCounts[reasonCodes.encode(abbreviation)] += count
+
+            for abbreviation, count in counts['removalReasonCounts'].items():
+                self.removalReasonCounts[reasonCodes.encode(abbreviation)] += count
+
+
+    def read_manifest(self):
+        """Reads the manifest of the archives.
+
+        Returns:
+            dict: The counts of removed turfjes per person, of turfjes per reason and of turfjes per removal reason, by academic year. Empty if nothing has been archived.
+        """
+        if not os.path.exists(MANIFEST_PATH):
+            return {}
+
+        with open(MANIFEST_PATH) as file:
+            manifest = json.load(file)
+
+        # json only has string keys
+        return {int(year): {
+            'removedCounts': {int(personId): count for personId, count in counts['removedCounts'].items()},
+            'reasonCounts': counts['reasonCounts'],
+            'removalReasonCounts': counts['removalReasonCounts']
+        } for year, counts in manifest.items()}
+
+
+    def write_manifest(self, manifest: dict):
+        """Writes the manifest of the archives, replacing the old one at once.
+
+        Args:
+            manifest (dict): The counts by academic year, see read_manifest.
+        """
+        self.write_atomically(MANIFEST_PATH, json.dumps(manifest).encode())
+
+
+    def archive_path(self, year: int):
+        """Gets the path of the archive of an academic year.
+
+        Args:
+            year (int): The calendar year the academic year starts in.
+
+        Returns:
+            str: The path.
+        """
+        return f'{ARCHIVE_DIRECTORY}/turfjes-{year}-{year + 1}.json'
+
+
+    def get_archive(self, year: int):
+        """Gets the archive of an academic year, loading it first if this is the first time it is used.
+
+        Args:
+            year (int): The calendar year the academic year starts in.
+
+        Returns:
+            TurfjeManager: The archived turfjes.
+        """
+        archive = self.archives.get(year)
+
+        if archive is None:
+            with self.archiveLock:
+                archive = self.archives.get(year)
+
+                # another thread might have loaded it while this one waited
+                if archive is None:
+                    archive = TurfjeManager(False, self.columnar, self.cache, self.durability, self.archive_path(year), self.codec.name, self.metrics)
+                    self.archives[year] = archive
+
+        return archive
+
+
+    def archived(self, turfjes):
+        """Leaves out turfjes that are in turfjes.json as well, which a crash during compact_partitions can cause. turfjes.json is always right.
+
+        Args:
+            turfjes (iterable of Turfje): Turfjes from an archive.
+
+        Returns:
+            [Turfje]: The turfjes that are only archived.
+        """
+        return [turfje for turfje in turfjes if turfje.id not in self.rowsById]
+
+
+    def get_turfje(self, id: int):
+        """Gets a turfje based on its id, loading archives (newest first) until it is found when it is not in turfjes.json.
+
+        Args:
+            id (int): ID of the turfje to be gotten.
+
+        Raises:
+            TurfjeDoesNotExistError: Raised when no turfje with id found.
+
+        Returns:
+            Turfje: Turfje with the given id.
+        """
+        row = self.rowsById.get(id)
+
+        if row is not None:
+            return self.turfjes[row]
+
+        for year in sorted(self.manifest, reverse = True):
+            archive = self.get_archive(year)
+            row = archive.rowsById.get(id)
+
+            if row is not None:
+                return archive.turfjes[row]
+
+        raise TurfjeDoesNotExistError(id)
+
+
+    def get_turfjes(self, personId: int):
+        """Gets all turfjes assigned to a person, only loading the archives of years the person has archived turfjes in.
+
+        Args:
+            personId (int): ID of the person whose turfjes are to be gotten.
+
+        Returns:
+            [Turfje]: All turfjes belonging to a person, ordered by id.
+        """
+        turfjes = super().get_turfjes(personId)
+        years = [year for year in sorted(self.manifest) if self.manifest[year]['removedCounts'].get(personId, 0) > 0]
+
+        if len(years) == 0:
+            return turfjes
+
+        for year in years:
+            turfjes += self.archived(self.get_archive(year).get_turfjes(personId))
+
+        return sorted(turfjes, key = lambda turfje: turfje.id)
+
+
+    def get_all_turfjes(self):
+        """Gets every turfje, loading all archives.
+
+        Returns:
+            [Turfje]: All turfjes, archived ones after the ones in turfjes.json.
+        """
+        turfjes = super().get_all_turfjes()
+
+        for year in sorted(self.manifest):
+            turfjes += self.archived(self.get_archive(year).turfjes)
+
+        return turfjes
+
+
+    def get_columns(self):
+        """Gets a copy of all turfjes as a TurfjeColumns store, loading all archives.
+
+        Returns:
+            TurfjeColumns: The copy.
+        """
+        columns = super().get_columns()
+
+        for year in sorted(self.manifest):
+            for turfje in self.archived(self.get_archive(year).turfjes):
+                columns.append(turfje)
+
+        return columns
+
+
+    def get_turfjes_between(self, start: float, end: float, personId: int = None, reasonAbbreviation: str = None, activeOnly: bool = False):
+        """Gets all turfjes created in a time range, see TurfjeManager.get_turfjes_between. Only the archives of academic years overlapping the range are loaded, and none when only active turfjes are asked for.
+
+        Args:
+            start (float): Start of the range, included.
+            end (float): End of the range, excluded.
+            personId (int, optional): Only get the turfjes of this person. Defaults to None.
+            reasonAbbreviation (str, optional): Only get the turfjes given for this reason. Defaults to None.
+            activeOnly (bool, optional): Leave out removed turfjes. Defaults to False.
+
+        Returns:
+            [Turfje]: The turfjes, ordered by creationDate and then by id.
+        """
+        turfjes = super().get_turfjes_between(start, end, personId, reasonAbbreviation, activeOnly)
+
+        # archives only hold removed turfjes
+        if activeOnly:
+            return turfjes
+
+        archivedTurfjes = []
+
+        for year in sorted(self.manifest):
+            yearStart, yearEnd = academic_year_bounds(year)
+
+            if yearStart >= end or yearEnd <= start:
+                continue
+
+            if personId is not None and self.manifest[year]['removedCounts'].get(personId, 0) == 0:
+                continue
+
+            archivedTurfjes += self.archived(self.get_archive(year).get_turfjes_between(start, end, personId, reasonAbbreviation))
+
+        if len(archivedTurfjes) == 0:
+            return turfjes
+
+        return sorted(archivedTurfjes + turfjes, key = lambda turfje: turfje_key(turfje, 'creationDate'))
+
+
+    def get_turfje_page(self, personId: int = None, reasonAbbreviation: str = None, removed: bool = None, since: float = None, until: float = None, order: str = 'id', after = None, offset: int = 0, limit: int = 100):
+        """Gets a page of turfjes, see TurfjeManager.get_turfje_page. A page is taken from turfjes.json and from every archive that can hold matching turfjes, and these are merged. Only the archives of academic years overlapping since and until are loaded, only those the person has turfjes in, and none when only active turfjes are asked for.
+
+        Args:
+            personId (int, optional): Only get the turfjes of this person. Defaults to None.
+            reasonAbbreviation (str, optional): Only get the turfjes given for this reason. Defaults to None.
+            removed (bool, optional): Only get removed turfjes if True, only active ones if False. Defaults to None.
+            since (float, optional): Only get turfjes created at or after this time. Defaults to None.
+            until (float, optional): Only get turfjes created before this time. Defaults to None.
+            order (str, optional): One of TURFJE_ORDERS. Defaults to 'id'.
+            after (int or (float, int), optional): turfje_key of the last turfje of the previous page. Defaults to None.
+            offset (int, optional): Amount of matching turfjes to skip first. Defaults to 0.
+            limit (int, optional): Maximum amount of turfjes to get. Defaults to 100.
+
+        Returns:
+            [Turfje]: The turfjes, in order.
+        """
+        # the skipped turfjes can come from any of the files
+        turfjes = super().get_turfje_page(personId, reasonAbbreviation, removed, since, until, order, after, 0, offset + limit)
+
+        # archives only hold removed turfjes
+        if removed is False:
+            return turfjes[offset:]
+
+        archivedTurfjes = []
+
+        for year in sorted(self.manifest):
+            yearStart, yearEnd = academic_year_bounds(year)
+
+            if (since is not None and yearEnd <= since) or (until is not None and yearStart >= until):
+                continue
+
+            if personId is not None and self.manifest[year]['removedCounts'].get(personId, 0) == 0:
+                continue
+
+            archivedTurfjes += self.archived(self.get_archive(year).get_turfje_page(personId, reasonAbbreviation, removed, since, until, order, after, 0, offset + limit))
+
+        if len(archivedTurfjes) > 0:
+            turfjes = sorted(archivedTurfjes + turfjes, key = lambda turfje: turfje_key(turfje, order), reverse = order.startswith('-'))
+
+        return turfjes[offset:offset + limit]
+
+
+    def compact_partitions(self, before: float = None):
+        """Moves turfjes between turfjes.json and the archives: removed turfjes created before `before` go to the archive of their academic year, all others (e.g. after an earlier compaction with a later `before`) go to turfjes.json. All archives are loaded and rewritten. Everything is written right away, also during a batch.
+
+        A turfje is always written to its new file, and the manifest lists that file, before the turfje is left out of its old one, so a crash never loses turfjes. The counts can be off after such a crash until compact_partitions runs again, and an archive that is no longer needed can be left behind unlisted; its turfjes are all in turfjes.json.
+
+        Args:
+            before (float, optional): Only archive turfjes created before this time. Defaults to None, which archives every removed turfje.
+        """
+        hot = []
+        archived = {}
+        returning = False
+
+        for turfje in self.get_all_turfjes():
+            if turfje.removed and (before is None or turfje.creationDate < before):
+                archived.setdefault(academic_year(turfje.creationDate), []).append(self.serialize_turfje(turfje))
+            else:
+                hot.append(self.serialize_turfje(turfje))
+                returning = returning or turfje.id not in self.rowsById
+
+        manifest = {}
+
+        for year, turfjes in archived.items():
+            manifest[year] = {
+                'removedCounts': Counter(turfje['personId'] for turfje in turfjes),
+                'reasonCounts': Counter(turfje['reasonAbbreviation'] for turfje in turfjes),
+                'removalReasonCounts': Counter(turfje['remReasonAbbreviation'] for turfje in turfjes)
+            }
+
+        os.makedirs(ARCHIVE_DIRECTORY, exist_ok = True)
+
+        with self.flushLock:
+            # the snapshots written below contain all postponed changes
+            self.take_pending()
+
+            # the archives of a postponed reset can't wait for turfjes.json, the new archives are written below
+            if self.archivesReset:
+                self.remove_archives()
+
+            if returning:
+                # turfjes moving out of an archive first have to be in turfjes.json, next to the ones that still have to be archived
+                self.write_file(self.serialize() + [turfje for turfje in hot if turfje['id'] not in self.rowsById])
+
+            for year, turfjes in archived.items():
+                self.write_atomically(self.archive_path(year), self.codec.encode(turfjes))
+
+            # the new archives have to be listed before their turfjes leave turfjes.json, the old ones stay listed until then
+            self.write_manifest({**self.manifest, **manifest})
+            self.write_file(hot)
+            self.write_manifest(manifest)
+
+            for year in set(self.manifest) - set(archived):
+                if os.path.exists(self.archive_path(year)):
+                    os.remove(self.archive_path(year))
+
+        self.load()
+
+
+    def write_file(self, data):
+        """Adjusted version of ManagerBase.write_file, which also removes the archives after a reset once its empty turfjes.json is written.
+
+        Args:
+            data (List(dict)): The turfjes.
+        """
+        super().write_file(data)
+
+        if self.archivesReset:
+            self.remove_archives()
+
+
+    def remove_archives(self):
+        """Removes the manifest and every archive file right away.
+        """
+        # without the manifest the archives aren't used anymore
+        for path in [MANIFEST_PATH] + glob.glob(ARCHIVE_DIRECTORY + '/turfjes-*'):
+            if os.path.exists(path):
+                os.remove(path)
+
+        self.archivesReset = False
+
+
+    def reset(self):
+        """Empty out turfje list and the archives and reset to no data. WARNING: REMOVES ALL CURRENTLY STORED TURFJES IMMEDIATELY. During a batch, or when writes are deferred, the archive files are only removed once the empty turfjes.json is written, so a rollback gets them back.
+        """
+        super().reset()
+
+        self.archives = {}
+        self.manifest = {}
+
+        if self.writes_postponed():
+            self.archivesReset = True
+        else:
+            self.remove_archives()
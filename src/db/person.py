@@ -4,6 +4,8 @@ from src.exceptions import PersonDoesNotExistError
 class Person():
     """Model class for people.
     """
+    __slots__ = ('id', 'name', 'position')
+
     def __init__(self, id: int, name: str, position: str):
         self.id = id
         self.name = name
@@ -15,17 +17,28 @@ class PersonManager(ManagerBase):
 
     Args:
         Inherits from ManagerBase.
+        cache (bool, optional): See ManagerBase. Defaults to False.
+        durability (str, optional): See ManagerBase. Defaults to 'fsync'.
+        codec (str, optional): See ManagerBase. Defaults to 'json'.
+        metrics (Metrics, optional): See ManagerBase. Defaults to None.
     """
-    def __init__(self):
-        super().__init__('./data/people.json')
+    def __init__(self, cache: bool = False, durability: str = 'fsync', codec: str = 'json', metrics = None):
+        super().__init__('./data/people.json', cache, durability, codec, metrics)
+
+        self.load()
 
+
+    def load(self):
+        """Loads the people from people.json.
+        """
         self.people = self.read_file()
 
-        self.people = [Person(
+        # indexed by id
+        self.people = {person['id']: Person(
             person['id'], 
             person['name'], 
             person['position'])
-            for person in self.people]
+            for person in self.people}
 
 
     def create_person(self, id: int, name: str, position: str):
@@ -38,7 +51,7 @@ class PersonManager(ManagerBase):
         """
         newPerson = Person(id, name, position)
 
-        self.people.append(newPerson)
+        self.people[id] = newPerson
 
         self.save_file()
 
@@ -55,11 +68,23 @@ class PersonManager(ManagerBase):
         Returns:
             Person: Person with the given ID.
         """
-        for person in self.people:
-            if id == person.id:
-                return person
+        person = self.people.get(id)
 
-        raise PersonDoesNotExistError(id)
+        if person is None:
+            raise PersonDoesNotExistError(id)
+
+        return person
+
+
+    def get_people(self):
+        """Gets everyone.
+
+        Returns:
+            List(Person): All people.
+        """
+        self.count_metric('recordsScanned', len(self.people))
+
+        return list(self.people.values())
 
 
     def update_person(self, id: int, name: str, position: str):
@@ -77,8 +102,7 @@ class PersonManager(ManagerBase):
             person.name if name == '' else name,
             person.position if position == '' else position)
 
-        self.people.remove(person)
-        self.people.append(updatedPerson)
+        self.people[id] = updatedPerson
 
         self.save_file()
 
@@ -89,28 +113,29 @@ class PersonManager(ManagerBase):
         Args:
             id (int): ID of the person to be deleted.
         """
-        person = self.get_person(id)
+        self.get_person(id)
 
-        self.people.remove(person)
+        del self.people[id]
 
         self.save_file()
 
     
-    def save_file(self):
-        """Adjusted version of ManagerBase.save_file, specific to PersonManager. Called without providing data
+    def serialize(self):
+        """Adjusted version of ManagerBase.serialize, specific to PersonManager.
+
+        Returns:
+            List(dict): The serializable list of people.
         """
-        serializedList = [{
+        return [{
             'id': person.id,
             'name': person.name,
             'position': person.position
-        } for person in self.people]
-
-        super().save_file(serializedList)
+        } for person in self.people.values()]
 
 
     def reset(self):
         """Empty out person list and reset to no data. WARNING: REMOVES ALL CURRENTLY STORED PEOPLE IMMEDIATELY.
         """
-        self.people = []
+        self.people = {}
 
         self.save_file()
\ No newline at end of file
@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+
+
+class QueryCache:
+    """Least recently used cache of query results, see DataBase(queryCacheSize). Results are stored under the query, its arguments and the versions of the managers it read, so a change to one of those managers makes the old results unreachable; they are evicted as the cache fills up. Can be shared between threads.
+
+    Args:
+        maxSize (int): Maximum amount of results kept.
+    """
+    def __init__(self, maxSize: int):
+        self.maxSize = maxSize
+        self.lock = threading.Lock()
+        self.results = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    def get(self, key):
+        """Gets a stored result, counting a hit or a miss.
+
+        Args:
+            key (tuple): The query, its arguments and the versions of the managers it reads.
+
+        Returns:
+            (bool, object): Whether the result was stored, and the result. The result is None when it wasn't.
+        """
+        with self.lock:
+            try:
+                result = self.results[key]
+            except KeyError:
+                self.misses += 1
+                return False, None
+
+            self.results.move_to_end(key)
+            self.hits += 1
+
+            return True, result
+
+
+    def put(self, key, result):
+        """Stores a result, evicting the least recently used ones when the cache is full.
+
+        Args:
+            key (tuple): See get.
+            result (object): The result of the query.
+        """
+        with self.lock:
+            self.results[key] = result
+            self.results.move_to_end(key)
+
+            while len(self.results) > self.maxSize:
+                self.results.popitem(last = False)
+                self.evictions += 1
+
+
+    def clear(self):
+        """Removes every stored result. The stats are kept.
+        """
+        with self.lock:
+            self.results.clear()
+
+
+    def stats(self):
+        """Gets how well the cache is doing.
+
+        Returns:
+            dict: The amount of hits, misses and evictions, the part of the lookups that were hits, and the current and maximum amount of stored results.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRate': self.hits / lookups if lookups > 0 else 0.0,
+                'size': len(self.results),
+                'maxSize': self.maxSize
+            }
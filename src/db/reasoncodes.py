@@ -0,0 +1,46 @@
+import sys
+
+
+class ReasonCodes:
+    """Code table that maps every reason abbreviation to a small integer, so turfjes can store (and be grouped on) an int instead of their own copy of the abbreviation. Codes are only used in memory, on disk the abbreviations are stored.
+    """
+    def __init__(self):
+        # code 0 is the empty abbreviation used by turfjes that have not been removed
+        self.abbreviations = ['']
+        self.codes = {'': 0}
+
+
+    def encode(self, abbreviation: str):
+        """Gets the code of an abbreviation, giving it a new code if it doesn't have one yet.
+
+        Args:
+            abbreviation (str): The abbreviation to be encoded.
+
+        Returns:
+            int: The code of the abbreviation.
+        """
+        code = self.codes.get(abbreviation)
+
+        if code is None:
+            code = len(self.abbreviations)
+
+            self.abbreviations.append(sys.intern(abbreviation))
+            self.codes[self.abbreviations[code]] = code
+
+        return code
+
+
+    def decode(self, code: int):
+        """Gets the abbreviation belonging to a code.
+
+        Args:
+            code (int): The code to be decoded.
+
+        Returns:
+            str: The abbreviation.
+        """
+        return self.abbreviations[code]
+
+
+# shared by all turfjes, so that codes can be compared between managers and column stores
+reasonCodes = ReasonCodes()
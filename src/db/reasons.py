@@ -1,6 +1,8 @@
 class Reason():
     """Model class for reasons.
     """
+    __slots__ = ('abbreviation', 'description')
+
     def __init__(self, abbreviation: str, description: str):
         self.abbreviation = abbreviation
         self.description = description
@@ -10,6 +12,8 @@ class RemovalReason(Reason):
 
     Inherits from Reason.
     """
+    __slots__ = ('turfjeCount',)
+
     def __init__(self, abbreviation: str, description: str, turfjeCount: int):
         super().__init__(abbreviation, description)
 
@@ -0,0 +1,291 @@
+import math
+from datetime import date
+from bisect import bisect_left, bisect_right
+from src.db.managerBase import ManagerBase
+
+# the periods turfjes are bucketed by, in local time
+PERIODS = ('day', 'week')
+
+
+def bucket_key(period: str, timestamp: float):
+    """Gets the bucket a timestamp falls in. Keys sort in time order.
+
+    Args:
+        period (str): One of PERIODS.
+        timestamp (float): The timestamp.
+
+    Raises:
+        ValueError: Raised when an unknown period is given.
+
+    Returns:
+        str: 'YYYY-MM-DD' for a day, 'YYYY-Www' for an ISO week.
+    """
+    day = date.fromtimestamp(timestamp)
+
+    if period == 'day':
+        return day.isoformat()
+    elif period == 'week':
+        year, week, weekday = day.isocalendar()
+        return f'{year}-W{week:02}'
+
+    raise ValueError(f"Unknown period: {period}")
+
+
+def check_timestamp(timestamp: float):
+    """Checks a timestamp can be bucketed, so a turfje can be stored knowing bucket_key won't fail on it halfway through an update.
+
+    Args:
+        timestamp (float): The timestamp.
+
+    Raises:
+        ValueError: Raised when the timestamp isn't finite or falls outside the dates Python can represent (e.g. milliseconds instead of seconds).
+    """
+    try:
+        if math.isfinite(timestamp):
+            date.fromtimestamp(timestamp)
+            return
+    except (OverflowError, OSError, ValueError):
+        pass
+
+    raise ValueError(f"Invalid timestamp: {timestamp}")
+
+
+class RollupManager(ManagerBase):
+    """Class that manages the rollups: per day and per ISO week, for every person and reason, how many turfjes created in that bucket were given and how many of those have been removed since. Removals count towards the bucket the turfje was created in, not the one it was removed in, so a bucket shows what became of the turfjes given in it. This also keeps turfjes removed before removal dates were stored countable; use the history (DataBase.as_of) to see when turfjes were removed.
+
+    The rollups are updated along with every change to the turfjes and stored in rollups.json, so charts don't have to go through every turfje. They can always be rebuilt from the turfjes with rebuild.
+
+    In journal mode a change appends the new values of the counts it touched to rollups.journal instead of rewriting rollups.json. Replaying a record sets counts rather than adding to them, so a record that already made it into rollups.json (e.g. after an interrupted compaction) can be replayed without counting twice.
+
+    Inherits from ManagerBase.
+
+    Args:
+        journal (bool, optional): Append changes to a journal instead of rewriting rollups.json on every change. Defaults to False.
+        cache (bool, optional): See ManagerBase. Defaults to False.
+        durability (str, optional): See ManagerBase. Defaults to 'fsync'.
+        codec (str, optional): See ManagerBase. Defaults to 'json'.
+        metrics (Metrics, optional): See ManagerBase. Defaults to None.
+    """
+    def __init__(self, journal: bool = False, cache: bool = False, durability: str = 'fsync', codec: str = 'json', metrics = None):
+        self.journal = journal
+
+        super().__init__('./data/rollups.json', cache, durability, codec, metrics)
+
+        self.load()
+
+
+    def load(self):
+        """Loads the rollups from rollups.json and replays the journal on top of it.
+        """
+        self.clear_rollups()
+
+        self.set_counts(self.read_file())
+
+        self.apply_journal(self.read_journal())
+
+
+    def set_counts(self, rows):
+        """Sets counts in memory, without saving.
+
+        Args:
+            rows (iterable of list): [period, bucket, personId, reasonAbbreviation, given, removed] rows, see serialize.
+        """
+        for period, bucket, personId, reasonAbbreviation, given, removed in rows:
+            self.bucket(period, bucket)[personId, reasonAbbreviation] = [given, removed]
+
+
+    def apply_journal(self, records):
+        """Applies changes recorded in the journal on top of the rollups in memory, see ManagerBase.apply_journal.
+
+        Args:
+            records (List(dict)): The journal records, in order.
+        """
+        for record in records:
+            self.set_counts(record['rows'])
+
+
+    def clear_rollups(self):
+        """Empties the rollups in memory. Per period the buckets are kept by key, next to a sorted list of the keys for range queries.
+        """
+        self.rollups = {period: {} for period in PERIODS}
+        self.bucketKeys = {period: [] for period in PERIODS}
+
+
+    def bucket(self, period: str, key: str):
+        """Gets a bucket, adding it when it doesn't exist yet.
+
+        Args:
+            period (str): One of PERIODS.
+            key (str): Key of the bucket, see bucket_key.
+
+        Returns:
+            dict: The counts in the bucket as [given, removed], by (personId, reasonAbbreviation).
+        """
+        buckets = self.rollups[period]
+        bucket = buckets.get(key)
+
+        if bucket is None:
+            bucket = buckets[key] = {}
+
+            keys = self.bucketKeys[period]
+
+            # new buckets are nearly always the latest one
+            if len(keys) == 0 or key > keys[-1]:
+                keys.append(key)
+            else:
+                keys.insert(bisect_left(keys, key), key)
+
+        return bucket
+
+
+    def is_empty(self):
+        """Checks whether there are any rollups.
+
+        Returns:
+            bool: True if no turfjes are counted.
+        """
+        return len(self.rollups['day']) == 0
+
+
+    def count(self, personId: int, reasonAbbreviation: str, creationDate: float, given: int, removed: int, touched: set = None):
+        """Adds to the counts of every bucket a turfje falls in, without saving.
+
+        Args:
+            personId (int): ID of the person the turfje belongs to.
+            reasonAbbreviation (str): Abbreviation of the reason the turfje was given.
+            creationDate (float): Time the turfje was handed out.
+            given (int): Amount to add to the given count.
+            removed (int): Amount to add to the removed count.
+            touched (set, optional): Gets the (period, bucket, personId, reasonAbbreviation) of every changed count added. Defaults to None.
+        """
+        for period in PERIODS:
+            key = bucket_key(period, creationDate)
+            counts = self.bucket(period, key).setdefault((personId, reasonAbbreviation), [0, 0])
+            counts[0] += given
+            counts[1] += removed
+
+            if touched is not None:
+                touched.add((period, key, personId, reasonAbbreviation))
+
+
+    def save_counts(self, touched: set):
+        """Saves changed counts, by appending their new values to the journal in journal mode and by saving the whole file otherwise.
+
+        Args:
+            touched (set): (period, bucket, personId, reasonAbbreviation) of the changed counts.
+        """
+        if not self.journal:
+            self.save_file()
+            return
+
+        if len(touched) > 0:
+            self.append_journal({'op': 'set', 'rows': [[period, key, personId, reasonAbbreviation, *self.rollups[period][key][personId, reasonAbbreviation]]
+                for period, key, personId, reasonAbbreviation in sorted(touched)]})
+
+
+    def add_turfjes(self, turfjes):
+        """Counts new turfjes.
+
+        Args:
+            turfjes (iterable of Turfje): The new turfjes.
+        """
+        touched = set()
+
+        for turfje in turfjes:
+            self.count(turfje.personId, turfje.reasonAbbreviation, turfje.creationDate, 1, 1 if turfje.removed else 0, touched)
+
+        self.save_counts(touched)
+
+
+    def remove_turfjes(self, turfjes):
+        """Counts turfjes that have just been removed.
+
+        Args:
+            turfjes (iterable of Turfje): The removed turfjes.
+        """
+        touched = set()
+
+        for turfje in turfjes:
+            self.count(turfje.personId, turfje.reasonAbbreviation, turfje.creationDate, 0, 1, touched)
+
+        self.save_counts(touched)
+
+
+    def rebuild(self, turfjes):
+        """Throws the rollups away and counts all turfjes again. Always rewrites rollups.json, since every count changes.
+
+        Args:
+            turfjes (iterable of Turfje): All turfjes.
+        """
+        self.clear_rollups()
+
+        for turfje in turfjes:
+            self.count(turfje.personId, turfje.reasonAbbreviation, turfje.creationDate, 1, 1 if turfje.removed else 0)
+
+        self.save_file()
+
+
+    def compact(self):
+        """Folds the journal back into the rollups.json snapshot, so the next load does not have to replay it.
+        """
+        self.save_file()
+
+
+    def get_rollups(self, period: str, start: float = None, end: float = None, personId: int = None, reasonAbbreviation: str = None):
+        """Gets the counts per bucket, only going through the buckets in the range.
+
+        Args:
+            period (str): One of PERIODS.
+            start (float, optional): Timestamp in the first bucket. Defaults to None, which starts at the first bucket.
+            end (float, optional): Timestamp in the last bucket. Defaults to None, which ends at the last bucket.
+            personId (int, optional): Only get the counts of this person. Defaults to None.
+            reasonAbbreviation (str, optional): Only get the counts of this reason. Defaults to None.
+
+        Raises:
+            ValueError: Raised when an unknown period is given.
+
+        Returns:
+            List((str, int, str, int, int)): (bucket, personId, reasonAbbreviation, given, removed), ordered by bucket.
+        """
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period: {period}")
+
+        keys = self.bucketKeys[period]
+        first = 0 if start is None else bisect_left(keys, bucket_key(period, start))
+        last = len(keys) if end is None else bisect_right(keys, bucket_key(period, end))
+
+        rows = []
+
+        for key in keys[first:last]:
+            self.count_metric('recordsScanned', len(self.rollups[period][key]))
+
+            for (bucketPersonId, bucketReason), (given, removed) in sorted(self.rollups[period][key].items()):
+                if personId is not None and bucketPersonId != personId:
+                    continue
+
+                if reasonAbbreviation is not None and bucketReason != reasonAbbreviation:
+                    continue
+
+                rows.append((key, bucketPersonId, bucketReason, given, removed))
+
+        return rows
+
+
+    def serialize(self):
+        """Adjusted version of ManagerBase.serialize, specific to RollupManager.
+
+        Returns:
+            List(list): A [period, bucket, personId, reasonAbbreviation, given, removed] row per count.
+        """
+        return [[period, key, personId, reasonAbbreviation, given, removed]
+            for period in PERIODS
+            for key, bucket in self.rollups[period].items()
+            for (personId, reasonAbbreviation), (given, removed) in bucket.items()]
+
+
+    def reset(self):
+        """Removes all rollups. WARNING: REMOVES ALL CURRENTLY STORED ROLLUPS IMMEDIATELY.
+        """
+        self.clear_rollups()
+
+        self.save_file()
@@ -4,38 +4,118 @@ from src.db.managerBase import ManagerBase
 class Settings(ManagerBase):
     """Class that manages the most recent ID for turfjes and people. Any other future DB specific internal settings go in here as well.
 
+    IDs are reserved in blocks of idBlockSize: settings.json stores the highest reserved ID, and IDs are handed out from memory until the block runs out. After a restart handing out continues after the reserved block, so a crash can leave gaps in the IDs but never hands out an ID twice.
+
     Inherits from ManagerBase.
+
+    Args:
+        cache (bool, optional): See ManagerBase. Defaults to False.
+        idBlockSize (int, optional): Amount of IDs reserved with a single write to settings.json. Defaults to 1, which writes for every ID.
+        durability (str, optional): See ManagerBase. Defaults to 'fsync'.
+        codec (str, optional): See ManagerBase. Defaults to 'json'.
+        metrics (Metrics, optional): See ManagerBase. Defaults to None.
     """
-    def __init__(self):
-        super().__init__('./data/settings.json')
-        
+    ID_NAMES = ('currentTurfjeID', 'currentPersonID')
+
+    def __init__(self, cache: bool = False, idBlockSize: int = 1, durability: str = 'fsync', codec: str = 'json', metrics = None):
+        self.idBlockSize = idBlockSize
+
+        super().__init__('./data/settings.json', cache, durability, codec, metrics)
+
+        self.load()
+
+
+    def load(self):
+        """Loads the settings from settings.json. Any IDs that were reserved but not handed out yet are skipped.
+        """
         self.settings = self.read_file()
 
+        self.lastIDs = {name: self.settings[name] for name in self.ID_NAMES}
+
+
+    def get_IDs(self, name: str, count: int):
+        """Hands out a range of new IDs, reserving a new block of IDs in settings.json when the current block has run out.
+
+        Args:
+            name (str): Name of the ID, one of Settings.ID_NAMES.
+            count (int): Amount of IDs to hand out.
+
+        Returns:
+            range: The new IDs.
+        """
+        first = self.lastIDs[name] + 1
+        self.lastIDs[name] += count
+
+        if self.lastIDs[name] > self.settings[name]:
+            self.settings[name] = self.lastIDs[name] + self.idBlockSize - 1
+            self.save_file()
+
+        return range(first, first + count)
+
+
+    def get_ID(self, name: str):
+        """Hands out the next ID, see get_IDs.
+
+        Args:
+            name (str): Name of the ID, one of Settings.ID_NAMES.
+
+        Returns:
+            int: The new ID.
+        """
+        return self.get_IDs(name, 1)[0]
+
 
     def get_turfje_ID(self):
-        """Gets the next turfjes ID and increases the latest used ID stored in settings.json.
+        """Gets the next turfjes ID and increases the latest used ID stored in settings.json when needed.
 
         Returns:
             int: The new ID.
         """
-        self.settings['currentTurfjeID'] += 1
-        self.save_file(self.settings)
+        return self.get_ID('currentTurfjeID')
+
+
+    def get_turfje_IDs(self, count: int):
+        """Gets a range of new turfje IDs with at most a single write to settings.json.
 
-        return self.settings['currentTurfjeID']
+        Args:
+            count (int): Amount of IDs.
+
+        Returns:
+            range: The new IDs.
+        """
+        return self.get_IDs('currentTurfjeID', count)
 
 
     def get_person_ID(self):
-        """Gets the next persons ID and increases the latest used ID stored in settings.json
+        """Gets the next persons ID and increases the latest used ID stored in settings.json when needed.
 
         Returns:
             int: The new ID.
         """
-        self.settings['currentPersonID'] += 1
-        self.save_file(self.settings)
+        return self.get_ID('currentPersonID')
+
+
+    def get_person_IDs(self, count: int):
+        """Gets a range of new person IDs with at most a single write to settings.json.
+
+        Args:
+            count (int): Amount of IDs.
+
+        Returns:
+            range: The new IDs.
+        """
+        return self.get_IDs('currentPersonID', count)
+
+
+    def serialize(self):
+        """Adjusted version of ManagerBase.serialize, the settings dict is already serializable but is copied so it can be written while IDs are handed out.
+
+        Returns:
+            dict: The settings.
+        """
+        return dict(self.settings)
 
-        return self.settings['currentPersonID']
 
-    
     def reset(self):
         """Resets both IDs to -1 to restart at 0 when next called. DO NOT DO THIS IF DATA ALREADY EXISTS.
         """
@@ -44,4 +124,6 @@ class Settings(ManagerBase):
             'currentPersonID': -1
         }
 
-        self.save_file(self.settings)
+        self.lastIDs = dict(self.settings)
+
+        self.save_file()
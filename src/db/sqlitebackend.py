@@ -0,0 +1,979 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from src.db.turfje import Turfje
+from src.db.turfjecolumns import TurfjeColumns
+from src.db.person import Person
+from src.db.reasons import Reason, RemovalReason
+from src.db.rollups import PERIODS, bucket_key
+from src.exceptions import TurfjeDoesNotExistError, PersonDoesNotExistError, ReasonError
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS people (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    position TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS reasons (
+    abbreviation TEXT PRIMARY KEY,
+    description TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS removal_reasons (
+    abbreviation TEXT PRIMARY KEY,
+    description TEXT NOT NULL,
+    turfjeCount INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS turfjes (
+    id INTEGER PRIMARY KEY,
+    personId INTEGER NOT NULL,
+    reasonAbbreviation TEXT NOT NULL,
+    remReasonAbbreviation TEXT NOT NULL,
+    creationDate REAL NOT NULL,
+    removed INTEGER NOT NULL,
+    removalDate REAL
+);
+
+CREATE INDEX IF NOT EXISTS turfjes_person ON turfjes (personId, removed, creationDate, id);
+
+CREATE INDEX IF NOT EXISTS turfjes_creationDate ON turfjes (creationDate, id);
+
+CREATE TABLE IF NOT EXISTS rollups (
+    period TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    personId INTEGER NOT NULL,
+    reasonAbbreviation TEXT NOT NULL,
+    given INTEGER NOT NULL,
+    removed INTEGER NOT NULL,
+    PRIMARY KEY (period, bucket, personId, reasonAbbreviation)
+) WITHOUT ROWID;
+'''
+
+TURFJE_COLUMNS = 'id, personId, reasonAbbreviation, remReasonAbbreviation, creationDate, removed, removalDate'
+
+
+class SqliteStore:
+    """Owns the connection to the SQLite database file that is shared by all SQLite managers.
+
+    Args:
+        filePath (str, optional): Path of the database file. Defaults to './data/turfgunmaverick.db'.
+        durability (str, optional): 'none', 'fsync' or 'full', mapped onto SQLite's synchronous setting. Defaults to 'fsync'.
+
+    Raises:
+        ValueError: Raised when an unknown durability level is given.
+    """
+    SYNCHRONOUS = {'none': 'OFF', 'fsync': 'NORMAL', 'full': 'FULL'}
+
+    def __init__(self, filePath: str = './data/turfgunmaverick.db', durability: str = 'fsync'):
+        if durability not in self.SYNCHRONOUS:
+            raise ValueError(f"Unknown durability level: {durability}")
+
+        self.filePath = filePath
+        self.batchDepth = 0
+
+        # autocommit mode, transactions are started explicitly by begin_batch. DataBase makes sure threads take turns writing
+        self.connection = sqlite3.connect(filePath, isolation_level = None, check_same_thread = False)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute(f'PRAGMA synchronous = {self.SYNCHRONOUS[durability]}')
+        self.connection.executescript(SCHEMA)
+
+        # databases from before removal dates were kept
+        turfjeColumns = [column[1] for column in self.connection.execute('PRAGMA table_info(turfjes)')]
+
+        if 'removalDate' not in turfjeColumns:
+            self.connection.execute('ALTER TABLE turfjes ADD COLUMN removalDate REAL')
+
+
+    def execute(self, query: str, parameters = ()):
+        """Executes a single query.
+
+        Args:
+            query (str): The SQL query.
+            parameters (tuple, optional): Values for the placeholders in the query. Defaults to ().
+
+        Returns:
+            sqlite3.Cursor: Cursor over the results of the query.
+        """
+        return self.connection.execute(query, parameters)
+
+
+    def data_version(self):
+        """Gets SQLite's data_version, which changes whenever another connection commits a change to the database.
+
+        Returns:
+            int: The data_version.
+        """
+        return self.connection.execute('PRAGMA data_version').fetchone()[0]
+
+
+    def begin_batch(self):
+        """Starts a transaction, or joins the running one.
+        """
+        if self.batchDepth == 0:
+            self.connection.execute('BEGIN')
+
+        self.batchDepth += 1
+
+
+    def end_batch(self, commit: bool = True):
+        """Ends a transaction started with begin_batch. Only the outermost one commits or rolls back.
+
+        Args:
+            commit (bool, optional): Commit if True, roll back if False. Defaults to True.
+        """
+        self.batchDepth -= 1
+
+        if self.batchDepth > 0:
+            return
+
+        self.connection.execute('COMMIT' if commit else 'ROLLBACK')
+
+
+    @contextmanager
+    def transaction(self):
+        """Context manager around begin_batch and end_batch, rolls back when an exception is raised.
+        """
+        self.begin_batch()
+
+        try:
+            yield
+        except BaseException:
+            self.end_batch(commit = False)
+            raise
+
+        self.end_batch()
+
+
+class SqliteManagerBase:
+    """Base class for the SQLite managers. Implements the same life cycle methods as ManagerBase, on top of a shared SqliteStore.
+
+    Args:
+        store (SqliteStore): The store the manager reads from and writes to.
+    """
+    def __init__(self, store: SqliteStore):
+        self.store = store
+        self.flushLock = threading.Lock()
+
+        # bumped by DataBase on every change, see ManagerBase
+        self.version = 0
+
+
+    def load(self):
+        """Nothing is kept in memory, so there is nothing to load.
+        """
+        pass
+
+
+    def get_version(self):
+        """Gets the version of the data, see ManagerBase.get_version. Other processes can change the database as well, which SQLite's data_version shows.
+
+        Returns:
+            (int, int): The version of the manager and the data_version of the store.
+        """
+        return self.version, self.store.data_version()
+
+
+    def begin_batch(self):
+        """Joins the transaction of the store, see SqliteStore.begin_batch.
+        """
+        self.store.begin_batch()
+
+
+    def end_batch(self, commit: bool = True):
+        """See SqliteStore.end_batch.
+
+        Args:
+            commit (bool, optional): Commit if True, roll back if False. Defaults to True.
+        """
+        self.store.end_batch(commit)
+
+
+    def defer_writes(self):
+        """SQLite writes are cheap enough to not need a background thread, so writes are never deferred.
+        """
+        pass
+
+
+    def flush(self):
+        """Every change is written to the database immediately, so there is nothing to flush.
+        """
+        pass
+
+
+    def has_pending(self):
+        """See ManagerBase.has_pending, there is never anything pending.
+
+        Returns:
+            bool: Always False.
+        """
+        return False
+
+
+    def take_pending(self):
+        """See ManagerBase.take_pending, there is never anything pending.
+
+        Returns:
+            None: Nothing to write.
+        """
+        return None
+
+
+    def write_pending(self, pending):
+        """See ManagerBase.write_pending, there is never anything to write.
+
+        Args:
+            pending (None): The result of take_pending.
+        """
+        pass
+
+
+    def restore_pending(self, pending):
+        """See ManagerBase.restore_pending, there is never anything to put back.
+
+        Args:
+            pending (None): The result of take_pending.
+        """
+        pass
+
+
+    def rollback(self):
+        """Changes are only postponed inside a transaction, which rolls back on its own.
+        """
+        pass
+
+
+    def migrate(self):
+        """SQLite has its own file format, so there is nothing to migrate.
+
+        Returns:
+            bool: Always False.
+        """
+        return False
+
+
+class SqliteSettings(SqliteManagerBase):
+    """SQLite version of Settings. The latest used IDs are stored in the counters table.
+
+    Inherits from SqliteManagerBase.
+    """
+    def __init__(self, store: SqliteStore):
+        super().__init__(store)
+
+        self.store.execute("INSERT OR IGNORE INTO counters VALUES ('currentTurfjeID', -1), ('currentPersonID', -1)")
+
+
+    def next_IDs(self, name: str, count: int):
+        """Increases a counter by count and returns the IDs in between.
+
+        Args:
+            name (str): Name of the counter.
+            count (int): Amount of IDs.
+
+        Returns:
+            range: The new IDs.
+        """
+        with self.store.transaction():
+            self.store.execute('UPDATE counters SET value = value + ? WHERE name = ?', (count, name))
+
+            last = self.store.execute('SELECT value FROM counters WHERE name = ?', (name,)).fetchone()[0]
+
+        return range(last - count + 1, last + 1)
+
+
+    def get_turfje_ID(self):
+        """Gets the next turfjes ID and increases the latest used ID.
+
+        Returns:
+            int: The new ID.
+        """
+        return self.next_IDs('currentTurfjeID', 1)[0]
+
+
+    def get_turfje_IDs(self, count: int):
+        """Gets a range of new turfje IDs.
+
+        Args:
+            count (int): Amount of IDs.
+
+        Returns:
+            range: The new IDs.
+        """
+        return self.next_IDs('currentTurfjeID', count)
+
+
+    def get_person_ID(self):
+        """Gets the next persons ID and increases the latest used ID.
+
+        Returns:
+            int: The new ID.
+        """
+        return self.next_IDs('currentPersonID', 1)[0]
+
+
+    def get_person_IDs(self, count: int):
+        """Gets a range of new person IDs.
+
+        Args:
+            count (int): Amount of IDs.
+
+        Returns:
+            range: The new IDs.
+        """
+        return self.next_IDs('currentPersonID', count)
+
+
+    def reset(self):
+        """Resets both IDs to -1 to restart at 0 when next called. DO NOT DO THIS IF DATA ALREADY EXISTS.
+        """
+        self.store.execute('UPDATE counters SET value = -1')
+
+
+class SqliteUserSettings(SqliteManagerBase):
+    """SQLite version of UserSettings, manages reasons and removal reasons.
+
+    Inherits from SqliteManagerBase.
+    """
+    def get_reason(self, abbreviation: str):
+        """Gets a reason based on its abbreviation.
+
+        Args:
+            abbreviation (str): Abbreviation of the reason to be gotten.
+
+        Raises:
+            ReasonError: Thrown if the reason doesn't exist
+
+        Returns:
+            Reason: The desired reason.
+        """
+        row = self.store.execute('SELECT abbreviation, description FROM reasons WHERE abbreviation = ?', (abbreviation,)).fetchone()
+
+        if row is None:
+            raise ReasonError(abbreviation, "doesntexist")
+
+        return Reason(*row)
+
+
+    def create_reason(self, abbreviation: str, description: str):
+        """Creates a new reason.
+
+        Args:
+            abbreviation (str): The abbreviation for the new reason.
+            description (str): The description for the new reason.
+
+        Raises:
+            ReasonError: Thrown if a reason with this abbreviation already exists.
+
+        Returns:
+            Reason: Returns the reason that was just created.
+        """
+        try:
+            self.store.execute('INSERT INTO reasons VALUES (?, ?)', (abbreviation, description))
+        except sqlite3.IntegrityError:
+            raise ReasonError(abbreviation, "exists")
+
+        return Reason(abbreviation, description)
+
+
+    def delete_reason(self, abbreviation: str):
+        """Deletes a reason based on its abbreviation.
+
+        Args:
+            abbreviation (str): Abbreviation of the reason to be deleted.
+
+        Raises:
+            ReasonError: Raised if no reason with given abbreviation found.
+
+        Returns:
+            Reason: The reason that was just deleted.
+        """
+        with self.store.transaction():
+            reason = self.get_reason(abbreviation)
+
+            self.store.execute('DELETE FROM reasons WHERE abbreviation = ?', (abbreviation,))
+
+        return reason
+
+
+    def get_removal_reason(self, abbreviation: str):
+        """Gets a removal reason based on its abbreviation.
+
+        Args:
+            abbreviation (str): Abbreviation of the reason to be gotten.
+
+        Raises:
+            ReasonError: Thrown if the reason doesn't exist
+
+        Returns:
+            RemovalReason: The desired reason.
+        """
+        row = self.store.execute('SELECT abbreviation, description, turfjeCount FROM removal_reasons WHERE abbreviation = ?', (abbreviation,)).fetchone()
+
+        if row is None:
+            raise ReasonError(abbreviation, "doesntexist")
+
+        return RemovalReason(*row)
+
+
+    def get_reasons(self):
+        """Gets every reason.
+
+        Returns:
+            List(Reason): All reasons.
+        """
+        return [Reason(*row) for row in self.store.execute('SELECT abbreviation, description FROM reasons')]
+
+
+    def get_removal_reasons(self):
+        """Gets every removal reason.
+
+        Returns:
+            List(RemovalReason): All removal reasons.
+        """
+        return [RemovalReason(*row) for row in self.store.execute('SELECT abbreviation, description, turfjeCount FROM removal_reasons')]
+
+
+    def create_removal_reason(self, abbreviation: str, description: str, turfjeCount: int):
+        """Creates a new removal reason.
+
+        Args:
+            abbreviation (str): The abbreviation for the new reason.
+            description (str): The description for the new reason.
+            turfjeCount (int): The amount of turfjes the new reason should remove.
+
+        Raises:
+            ReasonError: Thrown if a reason with this abbreviation already exists.
+
+        Returns:
+            RemovalReason: Returns the reason that was just created.
+        """
+        try:
+            self.store.execute('INSERT INTO removal_reasons VALUES (?, ?, ?)', (abbreviation, description, turfjeCount))
+        except sqlite3.IntegrityError:
+            raise ReasonError(abbreviation, "exists")
+
+        return RemovalReason(abbreviation, description, turfjeCount)
+
+
+    def delete_removal_reason(self, abbreviation: str):
+        """Deletes a removal reason based on its abbreviation.
+
+        Args:
+            abbreviation (str): Abbreviation of the reason to be deleted.
+
+        Raises:
+            ReasonError: Raised if no reason with given abbreviation found.
+
+        Returns:
+            RemovalReason: The reason that was just deleted.
+        """
+        with self.store.transaction():
+            reason = self.get_removal_reason(abbreviation)
+
+            self.store.execute('DELETE FROM removal_reasons WHERE abbreviation = ?', (abbreviation,))
+
+        return reason
+
+
+    def reset(self):
+        """Removes all reasons and removal reasons. WARNING: REMOVES ALL CURRENTLY STORED REASONS IMMEDIATELY.
+        """
+        with self.store.transaction():
+            self.store.execute('DELETE FROM reasons')
+            self.store.execute('DELETE FROM removal_reasons')
+
+
+class SqliteTurfjeManager(SqliteManagerBase):
+    """SQLite version of TurfjeManager. Input validation is not handled here.
+
+    Inherits from SqliteManagerBase.
+    """
+    def row_to_turfje(self, row: tuple):
+        """Converts a row of the turfjes table into a Turfje object.
+
+        Args:
+            row (tuple): The row, with the columns in the order of TURFJE_COLUMNS.
+
+        Returns:
+            Turfje: The converted turfje.
+        """
+        id, personId, reasonAbbreviation, remReasonAbbreviation, creationDate, removed, removalDate = row
+
+        return Turfje(id, personId, reasonAbbreviation, remReasonAbbreviation, creationDate, bool(removed), removalDate)
+
+
+    def create_turfje(self, id: int, personId: int, reasonAbbreviation: str, creationDate: float):
+        """Creates new turfje. Does NOT check if valid Id and abbreviation were entered.
+
+        Args:
+            id (int): The turfjes ID.
+            personId (int): ID of person turfje is assigned to.
+            reasonAbbreviation (str): Abbreviation of the reason the turfje was given.
+            creationDate (float): Time the turfje was handed out.
+        """
+        self.store.execute(f'INSERT INTO turfjes ({TURFJE_COLUMNS}) VALUES (?, ?, ?, ?, ?, 0, NULL)', (id, personId, reasonAbbreviation, '', creationDate))
+
+
+    def get_turfje(self, id: int):
+        """Gets a turfje based on its id.
+
+        Args:
+            id (int): ID of the turfje to be gotten.
+
+        Raises:
+            TurfjeDoesNotExistError: Raised when no turfje with id found.
+
+        Returns:
+            Turfje: Turfje with the given id.
+        """
+        row = self.store.execute(f'SELECT {TURFJE_COLUMNS} FROM turfjes WHERE id = ?', (id,)).fetchone()
+
+        if row is None:
+            raise TurfjeDoesNotExistError(id)
+
+        return self.row_to_turfje(row)
+
+
+    def get_turfjes(self, personId: int):
+        """Gets all turfjes assigned to a person.
+
+        Args:
+            personId (int): ID of the person whose turfjes are to be gotten.
+
+        Returns:
+            [Turfje]: All turfjes belonging to a person.
+        """
+        rows = self.store.execute(f'SELECT {TURFJE_COLUMNS} FROM turfjes WHERE personId = ? ORDER BY id', (personId,))
+
+        return [self.row_to_turfje(row) for row in rows]
+
+
+    def get_columns(self):
+        """Gets all turfjes as a TurfjeColumns store, e.g. for analytics.
+
+        Returns:
+            TurfjeColumns: The turfjes.
+        """
+        columns = TurfjeColumns()
+
+        for row in self.store.execute(f'SELECT {TURFJE_COLUMNS} FROM turfjes ORDER BY id'):
+            columns.append(self.row_to_turfje(row))
+
+        return columns
+
+
+    def get_turfjes_between(self, start: float, end: float, personId: int = None, reasonAbbreviation: str = None, activeOnly: bool = False):
+        """Gets all turfjes created in a time range, see TurfjeManager.get_turfjes_between.
+
+        Args:
+            start (float): Start of the range, included.
+            end (float): End of the range, excluded.
+            personId (int, optional): Only get the turfjes of this person. Defaults to None.
+            reasonAbbreviation (str, optional): Only get the turfjes given for this reason. Defaults to None.
+            activeOnly (bool, optional): Leave out removed turfjes. Defaults to False.
+
+        Returns:
+            [Turfje]: The turfjes, ordered by creationDate and then by id.
+        """
+        conditions = ['creationDate >= ?', 'creationDate < ?']
+        parameters = [start, end]
+
+        if personId is not None:
+            conditions.append('personId = ?')
+            parameters.append(personId)
+
+        if reasonAbbreviation is not None:
+            conditions.append('reasonAbbreviation = ?')
+            parameters.append(reasonAbbreviation)
+
+        if activeOnly:
+            conditions.append('removed = 0')
+
+        rows = self.store.execute(f'SELECT {TURFJE_COLUMNS} FROM turfjes WHERE {" AND ".join(conditions)} ORDER BY creationDate, id', parameters)
+
+        return [self.row_to_turfje(row) for row in rows]
+
+
+    def get_turfje_page(self, personId: int = None, reasonAbbreviation: str = None, removed: bool = None, since: float = None, until: float = None, order: str = 'id', after = None, offset: int = 0, limit: int = 100):
+        """Gets a page of turfjes, see TurfjeManager.get_turfje_page. The cursor becomes part of the query, so SQLite starts reading the index at the cursor.
+
+        Args:
+            personId (int, optional): Only get the turfjes of this person. Defaults to None.
+            reasonAbbreviation (str, optional): Only get the turfjes given for this reason. Defaults to None.
+            removed (bool, optional): Only get removed turfjes if True, only active ones if False. Defaults to None.
+            since (float, optional): Only get turfjes created at or after this time. Defaults to None.
+            until (float, optional): Only get turfjes created before this time. Defaults to None.
+            order (str, optional): One of TURFJE_ORDERS. Defaults to 'id'.
+            after (int or (float, int), optional): turfje_key of the last turfje of the previous page. Defaults to None.
+            offset (int, optional): Amount of matching turfjes to skip first. Defaults to 0.
+            limit (int, optional): Maximum amount of turfjes to get. Defaults to 100.
+
+        Returns:
+            [Turfje]: The turfjes, in order.
+        """
+        # SQLite reads a negative LIMIT as no limit at all
+        if limit <= 0:
+            return []
+
+        conditions = []
+        parameters = []
+
+        for condition, value in (('personId = ?', personId), ('reasonAbbreviation = ?', reasonAbbreviation), ('removed = ?', removed),
+                ('creationDate >= ?', since), ('creationDate < ?', until)):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+
+        descending = order.startswith('-')
+        direction = ' DESC' if descending else ''
+
+        if order.endswith('creationDate'):
+            orderBy = f'creationDate{direction}, id{direction}'
+            cursor = '(creationDate, id) {} (?, ?)'
+        else:
+            orderBy = f'id{direction}'
+            cursor = 'id {} ?'
+            after = None if after is None else (after,)
+
+        if after is not None:
+            conditions.append(cursor.format('<' if descending else '>'))
+            parameters += after
+
+        where = f'WHERE {" AND ".join(conditions)}' if len(conditions) > 0 else ''
+
+        rows = self.store.execute(f'SELECT {TURFJE_COLUMNS} FROM turfjes {where} ORDER BY {orderBy} LIMIT ? OFFSET ?', parameters + [limit, offset])
+
+        return [self.row_to_turfje(row) for row in rows]
+
+
+    def remove_turfje_by_id(self, id: int, remReasonAbbreviation: str, removalDate: float = None):
+        """Remove a turfje by its id.
+
+        Args:
+            id (int): Id of the turfje to be removed.
+            remReasonAbbreviation (str): Abbreviation of the reason the turfje is removed.
+            removalDate (float, optional): Time the turfje is removed. Defaults to time.time().
+
+        Raises:
+            TurfjeDoesNotExistError: Raised when no turfje with id found.
+        """
+        if removalDate is None:
+            removalDate = time.time()
+
+        cursor = self.store.execute('UPDATE turfjes SET removed = 1, remReasonAbbreviation = ?, removalDate = ? WHERE id = ?', (remReasonAbbreviation, removalDate, id))
+
+        if cursor.rowcount == 0:
+            raise TurfjeDoesNotExistError(id)
+
+
+    def remove_turfjes(self, personId: int, reason: RemovalReason):
+        """Removes a persons oldest active turfjes, as many as the reason removes. Turfjes with the same creationDate are removed in order of id.
+
+        Args:
+            personId (int): The id of the person whose turfje is to be removed.
+            reason (RemovalReason): The reason the turfjes are removed.
+
+        Returns:
+            [Turfje]: The removed turfjes.
+        """
+        rows = self.store.execute(f'''
+            UPDATE turfjes SET removed = 1, remReasonAbbreviation = ?, removalDate = ?
+            WHERE id IN (
+                SELECT id FROM turfjes
+                WHERE personId = ? AND removed = 0
+                ORDER BY creationDate, id
+                LIMIT ?)
+            RETURNING {TURFJE_COLUMNS}''', (reason.abbreviation, time.time(), personId, reason.turfjeCount))
+
+        return [self.row_to_turfje(row) for row in rows]
+
+
+    def get_all_turfjes(self):
+        """Gets every turfje.
+
+        Returns:
+            [Turfje]: All turfjes, ordered by id.
+        """
+        rows = self.store.execute(f'SELECT {TURFJE_COLUMNS} FROM turfjes ORDER BY id')
+
+        return [self.row_to_turfje(row) for row in rows]
+
+
+    def get_turfje_counts(self, personId: int):
+        """Gets how many turfjes a person has. Counted by SQLite from the person index, see TurfjeManager.get_turfje_counts.
+
+        Args:
+            personId (int): ID of the person.
+
+        Returns:
+            (int, int): The amount of active and of removed turfjes.
+        """
+        active, removed = self.store.execute('SELECT TOTAL(removed = 0), TOTAL(removed) FROM turfjes WHERE personId = ?', (personId,)).fetchone()
+
+        return int(active), int(removed)
+
+
+    def get_reason_counts(self, removal: bool = False):
+        """Gets how many turfjes were given for every reason, or removed for every removal reason.
+
+        Args:
+            removal (bool, optional): Count removed turfjes per removal reason instead. Defaults to False.
+
+        Returns:
+            dict: The counts by reason abbreviation, leaving out reasons without any turfjes.
+        """
+        if removal:
+            rows = self.store.execute('SELECT remReasonAbbreviation, COUNT(*) FROM turfjes WHERE removed = 1 GROUP BY remReasonAbbreviation')
+        else:
+            rows = self.store.execute('SELECT reasonAbbreviation, COUNT(*) FROM turfjes GROUP BY reasonAbbreviation')
+
+        return dict(rows)
+
+
+    def leaderboard(self, top: int):
+        """Gets the people with the most active turfjes, see TurfjeManager.leaderboard. SQLite counts them from the person index.
+
+        Args:
+            top (int): Amount of people to get.
+
+        Returns:
+            List((int, int)): (personId, active count) of the top people, most turfjes first. Ties are ordered by personId.
+        """
+        rows = self.store.execute('''
+            SELECT personId, TOTAL(removed = 0) AS active FROM turfjes
+            GROUP BY personId
+            ORDER BY active DESC, personId
+            LIMIT ?''', (top,))
+
+        return [(personId, int(active)) for personId, active in rows]
+
+
+    def compact_partitions(self, before: float = None):
+        """SQLite only reads the rows a query needs, so turfjes are never partitioned.
+
+        Args:
+            before (float, optional): Unused. Defaults to None.
+        """
+        pass
+
+
+    def compact(self):
+        """Folds the WAL back into the database file.
+        """
+        self.store.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+
+    def reset(self):
+        """Removes all turfjes. WARNING: REMOVES ALL CURRENTLY STORED TURFJES IMMEDIATELY.
+        """
+        self.store.execute('DELETE FROM turfjes')
+
+
+class SqlitePersonManager(SqliteManagerBase):
+    """SQLite version of PersonManager.
+
+    Inherits from SqliteManagerBase.
+    """
+    def create_person(self, id: int, name: str, position: str):
+        """Creates new person. DOES NOT check if Id is valid.
+
+        Args:
+            id (int): The persons ID.
+            name (str): The name of the person.
+            position (str): The position of the person in the committe.
+        """
+        self.store.execute('INSERT INTO people VALUES (?, ?, ?)', (id, name, position))
+
+
+    def get_person(self, id: int):
+        """Gets a person based on their ID.
+
+        Args:
+            id (int): The ID of the person to be gotten.
+
+        Raises:
+            PersonDoesNotExistError: Raised when no person with ID is found.
+
+        Returns:
+            Person: Person with the given ID.
+        """
+        row = self.store.execute('SELECT id, name, position FROM people WHERE id = ?', (id,)).fetchone()
+
+        if row is None:
+            raise PersonDoesNotExistError(id)
+
+        return Person(*row)
+
+
+    def get_people(self):
+        """Gets everyone.
+
+        Returns:
+            List(Person): All people.
+        """
+        return [Person(*row) for row in self.store.execute('SELECT id, name, position FROM people ORDER BY id')]
+
+
+    def update_person(self, id: int, name: str, position: str):
+        """Updates a person based on their ID.
+
+        Args:
+            id (int): The ID of the person to be updated.
+            name (str): New name for the person. '' is processed as original name.
+            position (str): New position for the person. '' is processed as original position.
+
+        Raises:
+            PersonDoesNotExistError: Raised when no person with ID is found.
+        """
+        cursor = self.store.execute('''
+            UPDATE people SET
+                name = CASE WHEN ? = '' THEN name ELSE ? END,
+                position = CASE WHEN ? = '' THEN position ELSE ? END
+            WHERE id = ?''', (name, name, position, position, id))
+
+        if cursor.rowcount == 0:
+            raise PersonDoesNotExistError(id)
+
+
+    def delete_person(self, id: int):
+        """Deletes a person.
+
+        Args:
+            id (int): ID of the person to be deleted.
+
+        Raises:
+            PersonDoesNotExistError: Raised when no person with ID is found.
+        """
+        cursor = self.store.execute('DELETE FROM people WHERE id = ?', (id,))
+
+        if cursor.rowcount == 0:
+            raise PersonDoesNotExistError(id)
+
+
+    def reset(self):
+        """Removes all people. WARNING: REMOVES ALL CURRENTLY STORED PEOPLE IMMEDIATELY.
+        """
+        self.store.execute('DELETE FROM people')
+
+
+class SqliteRollupManager(SqliteManagerBase):
+    """SQLite version of RollupManager, keeping the counts in the rollups table.
+
+    Inherits from SqliteManagerBase.
+    """
+    def is_empty(self):
+        """Checks whether there are any rollups.
+
+        Returns:
+            bool: True if no turfjes are counted.
+        """
+        return self.store.execute('SELECT 1 FROM rollups LIMIT 1').fetchone() is None
+
+
+    def count(self, rows):
+        """Adds to the counts of the buckets.
+
+        Args:
+            rows (iterable of tuple): (personId, reasonAbbreviation, creationDate, given, removed) per turfje.
+        """
+        for personId, reasonAbbreviation, creationDate, given, removed in rows:
+            for period in PERIODS:
+                self.store.execute('''
+                    INSERT INTO rollups VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT DO UPDATE SET given = given + excluded.given, removed = removed + excluded.removed''',
+                    (period, bucket_key(period, creationDate), personId, reasonAbbreviation, given, removed))
+
+
+    def add_turfjes(self, turfjes):
+        """Counts new turfjes, see RollupManager.add_turfjes.
+
+        Args:
+            turfjes (iterable of Turfje): The new turfjes.
+        """
+        with self.store.transaction():
+            self.count((turfje.personId, turfje.reasonAbbreviation, turfje.creationDate, 1, 1 if turfje.removed else 0) for turfje in turfjes)
+
+
+    def remove_turfjes(self, turfjes):
+        """Counts turfjes that have just been removed, see RollupManager.remove_turfjes.
+
+        Args:
+            turfjes (iterable of Turfje): The removed turfjes.
+        """
+        with self.store.transaction():
+            self.count((turfje.personId, turfje.reasonAbbreviation, turfje.creationDate, 0, 1) for turfje in turfjes)
+
+
+    def rebuild(self, turfjes):
+        """Throws the rollups away and counts all turfjes again.
+
+        Args:
+            turfjes (iterable of Turfje): All turfjes.
+        """
+        with self.store.transaction():
+            self.store.execute('DELETE FROM rollups')
+
+            self.add_turfjes(turfjes)
+
+
+    def compact(self):
+        """The rollups share the WAL with the turfjes, which SqliteTurfjeManager.compact folds back.
+        """
+        pass
+
+
+    def get_rollups(self, period: str, start: float = None, end: float = None, personId: int = None, reasonAbbreviation: str = None):
+        """Gets the counts per bucket, see RollupManager.get_rollups.
+
+        Args:
+            period (str): One of PERIODS.
+            start (float, optional): Timestamp in the first bucket. Defaults to None.
+            end (float, optional): Timestamp in the last bucket. Defaults to None.
+            personId (int, optional): Only get the counts of this person. Defaults to None.
+            reasonAbbreviation (str, optional): Only get the counts of this reason. Defaults to None.
+
+        Raises:
+            ValueError: Raised when an unknown period is given.
+
+        Returns:
+            List((str, int, str, int, int)): (bucket, personId, reasonAbbreviation, given, removed), ordered by bucket.
+        """
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period: {period}")
+
+        conditions = ['period = ?']
+        parameters = [period]
+
+        if start is not None:
+            conditions.append('bucket >= ?')
+            parameters.append(bucket_key(period, start))
+
+        if end is not None:
+            conditions.append('bucket <= ?')
+            parameters.append(bucket_key(period, end))
+
+        if personId is not None:
+            conditions.append('personId = ?')
+            parameters.append(personId)
+
+        if reasonAbbreviation is not None:
+            conditions.append('reasonAbbreviation = ?')
+            parameters.append(reasonAbbreviation)
+
+        rows = self.store.execute(f'SELECT bucket, personId, reasonAbbreviation, given, removed FROM rollups WHERE {" AND ".join(conditions)} ORDER BY bucket, personId, reasonAbbreviation', parameters)
+
+        return rows.fetchall()
+
+
+    def reset(self):
+        """Removes all rollups. WARNING: REMOVES ALL CURRENTLY STORED ROLLUPS IMMEDIATELY.
+        """
+        self.store.execute('DELETE FROM rollups')
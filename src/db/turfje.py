@@ -1,39 +1,359 @@
 from src.db.managerBase import ManagerBase
 from src.exceptions import TurfjeDoesNotExistError
 from src.db.reasons import RemovalReason
+from src.db.turfjecolumns import TurfjeColumns
+from src.db.reasoncodes import reasonCodes
+from array import array
+from bisect import bisect_left
+from collections import Counter
+import heapq
+import math
 import time
 import os.path
 
+# orders turfjes can be paged through in, a leading - reverses the order. Turfjes with the same creationDate are ordered by id
+TURFJE_ORDERS = ('id', '-id', 'creationDate', '-creationDate')
+
+
+def turfje_key(turfje, order: str):
+    """Gets what a turfje is sorted on in an order, which is also the cursor that pages start after.
+
+    Args:
+        turfje (Turfje): The turfje.
+        order (str): One of TURFJE_ORDERS.
+
+    Returns:
+        int or (float, int): The id, or the creationDate and id.
+    """
+    if order.endswith('creationDate'):
+        return (turfje.creationDate, turfje.id)
+
+    return turfje.id
+
+
+def bisect_rows(rows, key, value, right: bool = False):
+    """Finds where value would go in rows, which are sorted by key. Like bisect with a key, which older Pythons don't have.
+
+    Args:
+        rows (sequence of int): The rows.
+        key (function): Gets what a row is sorted on.
+        value: The value to look for.
+        right (bool, optional): Go past rows whose key equals value. Defaults to False.
+
+    Returns:
+        int: The position.
+    """
+    low = 0
+    high = len(rows)
+
+    while low < high:
+        middle = (low + high) // 2
+        middleKey = key(rows[middle])
+
+        if middleKey < value or (right and middleKey == value):
+            low = middle + 1
+        else:
+            high = middle
+
+    return low
+
+
 class Turfje:
-    """Model class for turfjes.
+    """Model class for turfjes. The reason abbreviations are stored as codes from the shared reason code table.
     """
-    def __init__(self, id: int, personId: int, reasonAbbreviation: str, remReasonAbbreviation: str, creationDate: float, removed: bool = False):
+    __slots__ = ('id', 'personId', 'reasonCode', 'remReasonCode', 'creationDate', 'removed', 'removalDate')
+
+    def __init__(self, id: int, personId: int, reasonAbbreviation: str, remReasonAbbreviation: str, creationDate: float, removed: bool = False, removalDate: float = None):
         self.id = id
         self.personId = personId
-        self.reasonAbbreviation = reasonAbbreviation
-        self.remReasonAbbreviation = remReasonAbbreviation
+        self.reasonCode = reasonCodes.encode(reasonAbbreviation)
+        self.remReasonCode = reasonCodes.encode(remReasonAbbreviation)
         self.creationDate = creationDate
         self.removed = removed
+        # None for active turfjes, and for turfjes removed before removal dates were kept
+        self.removalDate = removalDate
+
+    @property
+    def reasonAbbreviation(self):
+        return reasonCodes.decode(self.reasonCode)
+
+    @reasonAbbreviation.setter
+    def reasonAbbreviation(self, abbreviation: str):
+        self.reasonCode = reasonCodes.encode(abbreviation)
+
+    @property
+    def remReasonAbbreviation(self):
+        return reasonCodes.decode(self.remReasonCode)
+
+    @remReasonAbbreviation.setter
+    def remReasonAbbreviation(self, abbreviation: str):
+        self.remReasonCode = reasonCodes.encode(abbreviation)
 
 
 class TurfjeManager(ManagerBase):
     """Class that manages the addition of turfjes to the database and facilitates communication with the file. Input validation is not handled here.
 
     Inherits from ManagerBase.
+
+    Args:
+        journal (bool, optional): Append changes to a journal instead of rewriting turfjes.json on every change. Defaults to False.
+        columnar (bool, optional): Keep the turfjes in a compact TurfjeColumns store instead of a list of Turfje objects. Defaults to False.
+        cache (bool, optional): See ManagerBase. Defaults to False.
+        durability (str, optional): See ManagerBase. Defaults to 'fsync'.
+        filePath (str, optional): The file the turfjes are stored in. Defaults to './data/turfjes.json'.
+        codec (str, optional): See ManagerBase. Defaults to 'json'.
+        metrics (Metrics, optional): See ManagerBase. Defaults to None.
     """
-    def __init__(self):
-        super().__init__('./data/turfjes.json')
+    def __init__(self, journal: bool = False, columnar: bool = False, cache: bool = False, durability: str = 'fsync', filePath: str = './data/turfjes.json', codec: str = 'json', metrics = None):
+        self.journal = journal
+        self.columnar = columnar
+
+        super().__init__(filePath, cache, durability, codec, metrics)
+
+        self.load()
+
+
+    def load(self):
+        """Loads the turfjes from the turfjes.json snapshot and replays the journal on top of it.
+        """
+        self.clear_turfjes()
+
+        for turfje in self.read_file():
+            self.add_turfje(self.deserialize_turfje(turfje))
+
+        self.apply_journal(self.read_journal())
+
+        self.build_active_heaps()
+
+
+    def clear_turfjes(self):
+        """Empties the in memory turfje list and its indexes. The indexes refer to turfjes by their row in the turfje list.
+        """
+        self.turfjes = TurfjeColumns() if self.columnar else []
+        self.rowsById = {}
+        self.rowsByPerson = {}
+        self.activeTurfjes = {}
+
+        # time index, built on the first range query
+        self.sortedDates = None
+        self.sortedRows = None
+
+        # rows of a person sorted by creationDate, built per person on their first page in that order
+        self.personTimeRows = {}
+
+        # rows are in id order as long as turfjes are added with increasing ids, otherwise rows sorted by id are built on the first page in id order
+        self.idOrdered = True
+        self.idRows = None
+
+        # counts kept up to date on every change, reasons by their code
+        self.activeCounts = Counter()
+        self.removedCounts = Counter()
+        self.reasonCounts = Counter()
+        self.removalReasonCounts = Counter()
+
+        # heap of (-active count, personId), built on the first leaderboard query. Changed counts are pushed as new entries, the outdated ones stay in the heap until it is rebuilt
+        self.ranking = None
+
+
+    def add_turfje(self, turfje: Turfje):
+        """Adds a turfje to the in memory turfje list and its indexes, without saving.
+
+        Args:
+            turfje (Turfje): The turfje to be added.
+        """
+        row = len(self.turfjes)
+
+        if row > 0 and self.idOrdered and turfje.id < self.turfjes[row - 1].id:
+            self.idOrdered = False
+
+        self.turfjes.append(turfje)
+        self.rowsById[turfje.id] = row
+
+        if turfje.personId not in self.rowsByPerson:
+            self.rowsByPerson[turfje.personId] = array('q')
+
+        self.rowsByPerson[turfje.personId].append(row)
+
+        self.reasonCounts[turfje.reasonCode] += 1
+
+        if turfje.removed:
+            self.removedCounts[turfje.personId] += 1
+            self.removalReasonCounts[turfje.remReasonCode] += 1
+
+            # people whose turfjes are all removed are still on the leaderboard, like after removing them one by one
+            if turfje.personId not in self.activeCounts:
+                self.change_active_count(turfje.personId, 0)
+        else:
+            self.change_active_count(turfje.personId, 1)
+
+        personTimeRows = self.personTimeRows.get(turfje.personId)
+
+        if personTimeRows is not None:
+            if len(personTimeRows) == 0 or (turfje.creationDate, turfje.id) > turfje_key(self.turfjes[personTimeRows[-1]], 'creationDate'):
+                personTimeRows.append(row)
+            else:
+                del self.personTimeRows[turfje.personId]
+
+        self.idRows = None
+
+        if self.sortedRows is not None:
+            if len(self.sortedDates) == 0 or (turfje.creationDate, turfje.id) > turfje_key(self.turfjes[self.sortedRows[-1]], 'creationDate'):
+                self.sortedDates.append(turfje.creationDate)
+                self.sortedRows.append(row)
+            else:
+                # inserting in the middle moves the whole index, for a batch of old turfjes (e.g. an import) rebuilding it once is cheaper
+                self.sortedDates = None
+                self.sortedRows = None
+
+
+    def build_active_heaps(self):
+        """Builds a min-heap of (creationDate, id) per person of all their active turfjes, so the oldest one can be found without sorting.
+        """
+        self.activeTurfjes = {}
+
+        for personId, rows in self.rowsByPerson.items():
+            turfjes = (self.turfjes[row] for row in rows)
+            heap = [(turfje.creationDate, turfje.id) for turfje in turfjes if not turfje.removed]
+            heapq.heapify(heap)
+
+            self.activeTurfjes[personId] = heap
 
-        self.turfjes = self.read_file()
 
-        self.turfjes = [Turfje(
+    def build_time_index(self):
+        """Builds the time index: the rows of all turfjes sorted by creationDate, next to their creationDates, so a time range can be found with a bisect. Turfjes with the same creationDate are ordered by id.
+        """
+        if self.columnar:
+            dates = self.turfjes.creationDates
+        else:
+            dates = array('d', (turfje.creationDate for turfje in self.turfjes))
+
+        if self.idOrdered:
+            # the sort is stable, so ties keep the id order of the rows
+            key = dates.__getitem__
+        else:
+            key = lambda row: (dates[row], self.turfjes[row].id)
+
+        self.sortedRows = array('q', sorted(range(len(dates)), key = key))
+        self.sortedDates = array('d', (dates[row] for row in self.sortedRows))
+
+
+    def deserialize_turfje(self, turfje: dict):
+        """Converts a turfje as stored on disk into a Turfje object.
+
+        Args:
+            turfje (dict): The stored turfje.
+
+        Returns:
+            Turfje: The converted turfje.
+        """
+        return Turfje(
             turfje['id'],
             turfje['personId'], 
             turfje['reasonAbbreviation'],
             turfje['remReasonAbbreviation'],
             turfje['creationDate'],
-            turfje['removed'])
-            for turfje in self.turfjes]
+            turfje['removed'],
+            turfje.get('removalDate'))
+
+
+    def serialize_turfje(self, turfje: Turfje):
+        """Converts a Turfje object into a dict that can be stored on disk.
+
+        Args:
+            turfje (Turfje): The turfje to be converted.
+
+        Returns:
+            dict: The serializable turfje.
+        """
+        return {
+            'id': turfje.id,
+            'personId': turfje.personId,
+            'reasonAbbreviation': turfje.reasonAbbreviation,
+            'remReasonAbbreviation': turfje.remReasonAbbreviation,
+            'creationDate': turfje.creationDate,
+            'removed': turfje.removed,
+            'removalDate': turfje.removalDate
+        }
+
+
+    def apply_journal(self, records):
+        """Applies changes recorded in the journal on top of the turfjes in memory, either all of them after loading the snapshot or only the new ones appended by another process. Records that are already applied (e.g. after an interrupted compaction) are skipped.
+
+        Args:
+            records (List(dict)): The journal records, in order.
+        """
+        for record in records:
+            if record['op'] == 'create':
+                if record['turfje']['id'] in self.rowsById:
+                    continue
+
+                self.insert_turfje(self.deserialize_turfje(record['turfje']))
+
+            elif record['op'] == 'remove':
+                row = self.rowsById.get(record['id'])
+
+                if row is not None:
+                    self.mark_removed(self.turfjes[row], record['remReasonAbbreviation'], record.get('removalDate'))
+
+
+    def insert_turfje(self, turfje: Turfje):
+        """Adds a new turfje to the in memory turfje list, its indexes and the active heap of its person, without saving.
+
+        Args:
+            turfje (Turfje): The turfje to be added.
+        """
+        self.add_turfje(turfje)
+
+        if not turfje.removed:
+            heapq.heappush(self.activeTurfjes.setdefault(turfje.personId, []), (turfje.creationDate, turfje.id))
+
+
+    def mark_removed(self, turfje: Turfje, remReasonAbbreviation: str, removalDate: float):
+        """Marks a turfje in memory as removed and updates the counts, without saving. It stays on the active heap of its person until it is popped.
+
+        Args:
+            turfje (Turfje): The turfje to be removed.
+            remReasonAbbreviation (str): Abbreviation of the reason it is removed.
+            removalDate (float): Time it is removed.
+        """
+        if turfje.removed:
+            self.removalReasonCounts[turfje.remReasonCode] -= 1
+        else:
+            self.change_active_count(turfje.personId, -1)
+            self.removedCounts[turfje.personId] += 1
+
+        turfje.removed = True
+        turfje.remReasonAbbreviation = remReasonAbbreviation
+        turfje.removalDate = removalDate
+
+        self.removalReasonCounts[turfje.remReasonCode] += 1
+
+
+    def change_active_count(self, personId: int, change: int):
+        """Changes the amount of active turfjes of a person, pushing the new count onto the ranking when it is built, in O(log P) for P people.
+
+        Args:
+            personId (int): ID of the person.
+            change (int): Amount the count changes by.
+        """
+        count = self.activeCounts[personId] + change
+        self.activeCounts[personId] = count
+
+        if self.ranking is not None:
+            heapq.heappush(self.ranking, (-count, personId))
+
+            # rebuilding once most entries are outdated keeps the heap within a few times the amount of people
+            if len(self.ranking) > 2 * len(self.activeCounts) + 16:
+                self.build_ranking()
+
+
+    def build_ranking(self):
+        """Builds the ranking heap from the active counts, without outdated entries.
+        """
+        ranking = [(-count, personId) for personId, count in self.activeCounts.items()]
+        heapq.heapify(ranking)
+
+        self.ranking = ranking
 
 
     def create_turfje(self, id: int, personId: int, reasonAbbreviation: str, creationDate: float):        
@@ -47,9 +367,12 @@ class TurfjeManager(ManagerBase):
         """
         newTurfje = Turfje(id, personId, reasonAbbreviation, '', creationDate)
 
-        self.turfjes.append(newTurfje)
+        self.insert_turfje(newTurfje)
 
-        self.save_file()
+        if self.journal:
+            self.append_journal({'op': 'create', 'turfje': self.serialize_turfje(newTurfje)})
+        else:
+            self.save_file()
     
 
     def get_turfje(self, id: int):
@@ -64,12 +387,12 @@ class TurfjeManager(ManagerBase):
         Returns:
             Turfje: Turfje with the given id.
         """
+        row = self.rowsById.get(id)
 
-        for turfje in self.turfjes:
-            if turfje.id == id:
-                return turfje
+        if row is None:
+            raise TurfjeDoesNotExistError(id)
 
-        raise TurfjeDoesNotExistError(id)
+        return self.turfjes[row]
 
 
     def get_turfjes(self, personId: int):
@@ -81,73 +404,339 @@ class TurfjeManager(ManagerBase):
         Returns:
             [Turfje]: All turfjes belonging to a person. 
         """
-        turfjes = []
-        
+        rows = self.rowsByPerson.get(personId, [])
+
+        self.count_metric('recordsScanned', len(rows))
+
+        return [self.turfjes[row] for row in rows]
+
+
+    def get_all_turfjes(self):
+        """Gets every turfje.
+
+        Returns:
+            [Turfje]: All turfjes, in the order they were added.
+        """
+        self.count_metric('recordsScanned', len(self.turfjes))
+
+        return list(self.turfjes)
+
+
+    def get_columns(self):
+        """Gets a copy of all turfjes as a TurfjeColumns store, e.g. for analytics.
+
+        Returns:
+            TurfjeColumns: The copy.
+        """
+        self.count_metric('recordsScanned', len(self.turfjes))
+
+        if self.columnar:
+            return self.turfjes.copy()
+
+        columns = TurfjeColumns()
+
         for turfje in self.turfjes:
-            if turfje.personId == personId:
-                turfjes.append(turfje)
+            columns.append(turfje)
+
+        return columns
+
+
+    def get_turfjes_between(self, start: float, end: float, personId: int = None, reasonAbbreviation: str = None, activeOnly: bool = False):
+        """Gets all turfjes created in a time range, using the time index. When filtering on a person with fewer turfjes than the range holds, only that persons turfjes are looked at instead.
+
+        Args:
+            start (float): Start of the range, included.
+            end (float): End of the range, excluded.
+            personId (int, optional): Only get the turfjes of this person. Defaults to None, which gets them for everyone.
+            reasonAbbreviation (str, optional): Only get the turfjes given for this reason. Defaults to None, which gets them for every reason.
+            activeOnly (bool, optional): Leave out removed turfjes. Defaults to False.
+
+        Returns:
+            [Turfje]: The turfjes, ordered by creationDate and then by id.
+        """
+        if self.sortedRows is None:
+            self.build_time_index()
+
+        first = bisect_left(self.sortedDates, start)
+        last = bisect_left(self.sortedDates, end)
+        rows = self.sortedRows[first:last]
+
+        if personId is not None:
+            personRows = self.rowsByPerson.get(personId, ())
+
+            if len(personRows) < len(rows):
+                rows = personRows
+                turfjes = (self.turfjes[row] for row in personRows)
+                turfjes = sorted((turfje for turfje in turfjes if start <= turfje.creationDate < end), key = lambda turfje: turfje_key(turfje, 'creationDate'))
+            else:
+                turfjes = (self.turfjes[row] for row in rows)
+                turfjes = [turfje for turfje in turfjes if turfje.personId == personId]
+        else:
+            turfjes = [self.turfjes[row] for row in rows]
+
+        self.count_metric('recordsScanned', len(rows))
+
+        if reasonAbbreviation is not None:
+            # a reason without a code has never been given
+            code = reasonCodes.codes.get(reasonAbbreviation)
+            turfjes = [turfje for turfje in turfjes if turfje.reasonCode == code]
+
+        if activeOnly:
+            turfjes = [turfje for turfje in turfjes if not turfje.removed]
 
         return turfjes
 
 
-    def remove_turfje_by_id(self, id: int, remReasonAbbreviation: str):
+    def ordered_rows(self, personId: int, since: float, until: float, order: str):
+        """Picks the index to page through turfjes in an order with: the time index or the rows of a person sorted by creationDate, or the rows themselves (of a person) for id order.
+
+        Args:
+            personId (int): Only the turfjes of this person have to be in the rows, None for everyone.
+            since (float): Only turfjes created at or after this time have to be in the rows, None for no limit. Only used for creationDate order.
+            until (float): Only turfjes created before this time have to be in the rows, None for no limit. Only used for creationDate order.
+            order (str): One of TURFJE_ORDERS.
+
+        Returns:
+            (sequence of int, int, int, function): The rows sorted on turfje_key, the first and last (excluded) position to look at and a function getting the key of a row.
+        """
+        if order.endswith('creationDate'):
+            key = lambda row: turfje_key(self.turfjes[row], 'creationDate')
+
+            if personId is None:
+                if self.sortedRows is None:
+                    self.build_time_index()
+
+                rows = self.sortedRows
+                first = 0 if since is None else bisect_left(self.sortedDates, since)
+                last = len(rows) if until is None else bisect_left(self.sortedDates, until)
+
+                return rows, first, last, key
+
+            rows = self.personTimeRows.get(personId)
+
+            if rows is None:
+                rows = self.personTimeRows[personId] = array('q', sorted(self.rowsByPerson.get(personId, ()), key = key))
+
+            # (since, -inf) comes before every turfje created at since
+            first = 0 if since is None else bisect_rows(rows, key, (since, -math.inf))
+            last = len(rows) if until is None else bisect_rows(rows, key, (until, -math.inf))
+
+            return rows, first, last, key
+
+        key = lambda row: self.turfjes[row].id
+
+        if not self.idOrdered:
+            if self.idRows is None:
+                self.idRows = array('q', sorted(range(len(self.turfjes)), key = key))
+
+            rows = self.idRows
+        elif personId is not None:
+            rows = self.rowsByPerson.get(personId, ())
+        else:
+            rows = range(len(self.turfjes))
+
+        return rows, 0, len(rows), key
+
+
+    def get_turfje_page(self, personId: int = None, reasonAbbreviation: str = None, removed: bool = None, since: float = None, until: float = None, order: str = 'id', after = None, offset: int = 0, limit: int = 100):
+        """Gets the turfjes matching the filters that come after a cursor in an order, at most limit of them. The index of the person or the time index is used to only look at turfjes that can match, starting at the cursor, so paging through all turfjes looks at every one of them once.
+
+        Args:
+            personId (int, optional): Only get the turfjes of this person. Defaults to None.
+            reasonAbbreviation (str, optional): Only get the turfjes given for this reason. Defaults to None.
+            removed (bool, optional): Only get removed turfjes if True, only active ones if False. Defaults to None, which gets both.
+            since (float, optional): Only get turfjes created at or after this time. Defaults to None.
+            until (float, optional): Only get turfjes created before this time. Defaults to None.
+            order (str, optional): One of TURFJE_ORDERS. Defaults to 'id'.
+            after (int or (float, int), optional): turfje_key of the last turfje of the previous page. Defaults to None, which starts at the beginning.
+            offset (int, optional): Amount of matching turfjes to skip first. Defaults to 0.
+            limit (int, optional): Maximum amount of turfjes to get. Defaults to 100.
+
+        Returns:
+            [Turfje]: The turfjes, in order.
+        """
+        # the loop below only stops once it has found a turfje
+        if limit <= 0:
+            return []
+
+        rows, first, last, key = self.ordered_rows(personId, since, until, order)
+        descending = order.startswith('-')
+
+        if after is not None:
+            if descending:
+                last = min(last, bisect_rows(rows, key, after))
+            else:
+                first = max(first, bisect_rows(rows, key, after, right = True))
+
+        # a reason without a code has never been given
+        code = None if reasonAbbreviation is None else reasonCodes.codes.get(reasonAbbreviation, -1)
+        turfjes = []
+        scanned = 0
+
+        for position in (range(last - 1, first - 1, -1) if descending else range(first, last)):
+            turfje = self.turfjes[rows[position]]
+            scanned += 1
+
+            if ((personId is not None and turfje.personId != personId) or (code is not None and turfje.reasonCode != code)
+                    or (removed is not None and turfje.removed != removed)
+                    or (since is not None and turfje.creationDate < since) or (until is not None and turfje.creationDate >= until)):
+                continue
+
+            if offset > 0:
+                offset -= 1
+                continue
+
+            turfjes.append(turfje)
+
+            if len(turfjes) == limit:
+                break
+
+        self.count_metric('recordsScanned', scanned)
+
+        return turfjes
+
+
+    def get_turfje_counts(self, personId: int):
+        """Gets how many turfjes a person has, without going through their turfjes.
+
+        Args:
+            personId (int): ID of the person.
+
+        Returns:
+            (int, int): The amount of active and of removed turfjes.
+        """
+        return self.activeCounts[personId], self.removedCounts[personId]
+
+
+    def get_reason_counts(self, removal: bool = False):
+        """Gets how many turfjes were given for every reason, or removed for every removal reason.
+
+        Args:
+            removal (bool, optional): Count removed turfjes per removal reason instead. Defaults to False.
+
+        Returns:
+            dict: The counts by reason abbreviation, leaving out reasons without any turfjes.
+        """
+        counts = self.removalReasonCounts if removal else self.reasonCounts
+
+        return {reasonCodes.decode(code): count for code, count in counts.items() if count > 0}
+
+
+    def leaderboard(self, top: int):
+        """Gets the people with the most active turfjes. The ranking heap is walked from its root in order, skipping outdated entries, without changing it, so queries can run at the same time.
+
+        Args:
+            top (int): Amount of people to get.
+
+        Returns:
+            List((int, int)): (personId, active count) of the top people, most turfjes first. Ties are ordered by personId.
+        """
+        if self.ranking is None:
+            self.build_ranking()
+
+        ranking = self.ranking
+        leaders = []
+        # positions in the heap whose entries can come next, by their entry
+        candidates = [(ranking[0], 0)] if len(ranking) > 0 else []
+
+        while len(candidates) > 0 and len(leaders) < top:
+            entry, position = heapq.heappop(candidates)
+            negativeCount, personId = entry
+
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(ranking):
+                    heapq.heappush(candidates, (ranking[child], child))
+
+            # entries come out in order, so a count pushed twice comes out twice in a row
+            if self.activeCounts[personId] == -negativeCount and (len(leaders) == 0 or leaders[-1] != entry):
+                leaders.append(entry)
+
+        return [(personId, -negativeCount) for negativeCount, personId in leaders]
+
+
+    def remove_turfje_by_id(self, id: int, remReasonAbbreviation: str, removalDate: float = None):
         """Remove a turfje by its id. This is used internally by TurfjeManager.remove_turfje_by_person.
 
         Args:
             id (int): Id of the turfje to be removed.
+            remReasonAbbreviation (str): Abbreviation of the reason the turfje is removed.
+            removalDate (float, optional): Time the turfje is removed. Defaults to time.time().
         """
-        # check if the turfje exists
-        self.get_turfje(id)
+        if removalDate is None:
+            removalDate = time.time()
 
-        for turfje in self.turfjes:
-            if turfje.id == id:
-                turfje.removed = True
-                turfje.remReasonAbbreviation = remReasonAbbreviation
+        row = self.rowsById.get(id)
 
-        self.save_file()
+        if row is None:
+            raise TurfjeDoesNotExistError(id)
+
+        self.mark_removed(self.turfjes[row], remReasonAbbreviation, removalDate)
+
+        if self.journal:
+            self.append_journal({'op': 'remove', 'id': id, 'remReasonAbbreviation': remReasonAbbreviation, 'removalDate': removalDate})
+        else:
+            self.save_file()
 
 
     def remove_turfjes(self, personId: int, reason: RemovalReason):
-        """Removes a persons oldest turfje.
+        """Removes a persons oldest active turfjes, as many as the reason removes. Turfjes with the same creationDate are removed in order of id.
 
         Args:
             personId (int): The id of the person whose turfje is to be removed.
+            reason (RemovalReason): The reason the turfjes are removed.
+
+        Returns:
+            [Turfje]: The removed turfjes.
         """
-        personsTurfjes = []
+        activeTurfjes = self.activeTurfjes.get(personId, [])
+        heapSize = len(activeTurfjes)
+        removedTurfjes = []
+        removalDate = time.time()
 
-        for turfje in self.turfjes:
-            if turfje.personId == personId and not turfje.removed:
-                personsTurfjes.append(turfje)
+        # end removal early if no turfjes left
+        while len(removedTurfjes) < reason.turfjeCount and len(activeTurfjes) > 0:
+            creationDate, id = heapq.heappop(activeTurfjes)
+            turfje = self.get_turfje(id)
+
+            # turfjes removed directly through remove_turfje_by_id are still on the heap
+            if turfje.removed:
+                continue
 
-        personsTurfjes.sort(key = lambda turfje: turfje.creationDate, reverse = True)
+            self.remove_turfje_by_id(id, reason.abbreviation, removalDate)
+            removedTurfjes.append(turfje)
 
-        for i in range(reason.turfjeCount):
-            # end removal early if no turfjes left
-            if len(personsTurfjes) == 0:
-                return
+        self.count_metric('recordsScanned', heapSize - len(activeTurfjes))
 
-            turfje = personsTurfjes.pop()
-            self.remove_turfje_by_id(turfje.id, reason.abbreviation)
+        return removedTurfjes
 
 
-    def save_file(self):
-        """Adjusted version of ManagerBase.save_file, specific to TurfjeManager. Called without providing data.
+    def compact(self):
+        """Folds the journal back into the turfjes.json snapshot, so the next load does not have to replay it.
         """
-        serializedList = [{
-            'id': turfje.id,
-            'personId': turfje.personId,
-            'reasonAbbreviation': turfje.reasonAbbreviation,
-            'remReasonAbbreviation': turfje.remReasonAbbreviation,
-            'creationDate': turfje.creationDate,
-            'removed': turfje.removed
-        } for turfje in self.turfjes]
+        self.save_file()
+
+
+    def compact_partitions(self, before: float = None):
+        """All turfjes are kept in a single file, so there are no partitions to move turfjes between. See PartitionedTurfjeManager.
 
-        super().save_file(serializedList)
+        Args:
+            before (float, optional): Unused. Defaults to None.
+        """
+        pass
+
+
+    def serialize(self):
+        """Adjusted version of ManagerBase.serialize, specific to TurfjeManager.
+
+        Returns:
+            List(dict): The serializable list of turfjes.
+        """
+        return [self.serialize_turfje(turfje) for turfje in self.turfjes]
 
 
     def reset(self):
         """Empty out turfje list and reset to no data. WARNING: REMOVES ALL CURRENTLY STORED TURFJES IMMEDIATELY.
         """
-        self.turfjes = []
+        self.clear_turfjes()
 
         self.save_file()
\ No newline at end of file
@@ -0,0 +1,127 @@
+import math
+from array import array
+from src.db.reasoncodes import reasonCodes
+
+
+class TurfjeView:
+    """Lightweight stand-in for a Turfje that is stored in a TurfjeColumns store. Reads and writes go straight to the columns, so views are cheap to hand out and don't have to be kept around.
+    """
+    __slots__ = ('columns', 'row')
+
+    def __init__(self, columns, row: int):
+        self.columns = columns
+        self.row = row
+
+    @property
+    def id(self):
+        return self.columns.ids[self.row]
+
+    @property
+    def personId(self):
+        return self.columns.personIds[self.row]
+
+    @property
+    def reasonCode(self):
+        return self.columns.reasonCodes[self.row]
+
+    @property
+    def remReasonCode(self):
+        return self.columns.remReasonCodes[self.row]
+
+    @remReasonCode.setter
+    def remReasonCode(self, code: int):
+        self.columns.remReasonCodes[self.row] = code
+
+    @property
+    def reasonAbbreviation(self):
+        return reasonCodes.decode(self.reasonCode)
+
+    @property
+    def remReasonAbbreviation(self):
+        return reasonCodes.decode(self.remReasonCode)
+
+    @remReasonAbbreviation.setter
+    def remReasonAbbreviation(self, abbreviation: str):
+        self.remReasonCode = reasonCodes.encode(abbreviation)
+
+    @property
+    def creationDate(self):
+        return self.columns.creationDates[self.row]
+
+    @property
+    def removed(self):
+        return bool(self.columns.removed[self.row])
+
+    @removed.setter
+    def removed(self, removed: bool):
+        self.columns.removed[self.row] = removed
+
+    @property
+    def removalDate(self):
+        removalDate = self.columns.removalDates[self.row]
+        return None if math.isnan(removalDate) else removalDate
+
+    @removalDate.setter
+    def removalDate(self, removalDate: float):
+        self.columns.removalDates[self.row] = math.nan if removalDate is None else removalDate
+
+
+class TurfjeColumns:
+    """Column store for turfjes. Keeps every field in its own typed array instead of keeping a Python object per turfje, which takes roughly a tenth of the memory. Reason abbreviations are stored as codes from the shared reason code table.
+
+    Behaves like the list of turfjes TurfjeManager normally uses: it can be appended to, indexed by row and iterated over, handing out TurfjeView objects.
+    """
+    def __init__(self):
+        self.ids = array('q')
+        self.personIds = array('q')
+        self.reasonCodes = array('H')
+        self.remReasonCodes = array('H')
+        self.creationDates = array('d')
+        self.removed = array('b')
+        # NaN where the turfje has no removal date
+        self.removalDates = array('d')
+
+
+    def append(self, turfje):
+        """Adds a turfje as a new row.
+
+        Args:
+            turfje (Turfje): The turfje to be added, only its fields are stored.
+        """
+        self.ids.append(turfje.id)
+        self.personIds.append(turfje.personId)
+        self.reasonCodes.append(turfje.reasonCode)
+        self.remReasonCodes.append(turfje.remReasonCode)
+        self.creationDates.append(turfje.creationDate)
+        self.removed.append(turfje.removed)
+        self.removalDates.append(math.nan if turfje.removalDate is None else turfje.removalDate)
+
+
+    def copy(self):
+        """Copies the store, which only copies the arrays.
+
+        Returns:
+            TurfjeColumns: The copy.
+        """
+        copy = TurfjeColumns()
+
+        for name in ('ids', 'personIds', 'reasonCodes', 'remReasonCodes', 'creationDates', 'removed', 'removalDates'):
+            setattr(copy, name, getattr(self, name)[:])
+
+        return copy
+
+
+    def __len__(self):
+        return len(self.ids)
+
+
+    def __getitem__(self, row: int):
+        if row < 0 or row >= len(self.ids):
+            raise IndexError(row)
+
+        return TurfjeView(self, row)
+
+
+    def __iter__(self):
+        for row in range(len(self.ids)):
+            yield TurfjeView(self, row)
@@ -7,23 +7,35 @@ class UserSettings(ManagerBase):
     """Class to manage user specific database settings like reasons and removal reasons. 
 
     Inherits from ManagerBase.
+
+    Args:
+        cache (bool, optional): See ManagerBase. Defaults to False.
+        durability (str, optional): See ManagerBase. Defaults to 'fsync'.
+        codec (str, optional): See ManagerBase. Defaults to 'json'.
+        metrics (Metrics, optional): See ManagerBase. Defaults to None.
     """
-    def __init__(self):
-        super().__init__('./data/usersettings.json')
+    def __init__(self, cache: bool = False, durability: str = 'fsync', codec: str = 'json', metrics = None):
+        super().__init__('./data/usersettings.json', cache, durability, codec, metrics)
+
+        self.load()
 
+
+    def load(self):
+        """Loads the reasons and removal reasons from usersettings.json.
+        """
         self.settings = self.read_file()
         
-        # convert dictionaries into objects for easier manipulation
-        self.reasons = [Reason(
+        # convert dictionaries into objects for easier manipulation, indexed by abbreviation
+        self.reasons = {reason['abbreviation']: Reason(
             reason['abbreviation'], 
             reason['description'])
-            for reason in self.settings['reasons']]
+            for reason in self.settings['reasons']}
         
-        self.removalReasons = [RemovalReason(
+        self.removalReasons = {reason['abbreviation']: RemovalReason(
             reason['abbreviation'],
             reason['description'], 
             reason['turfjeCount'])
-            for reason in self.settings['removalReasons']]
+            for reason in self.settings['removalReasons']}
     
 
     def does_reason_exist(self, abbreviation: str):
@@ -35,11 +47,7 @@ class UserSettings(ManagerBase):
         Returns:
             bool: True if the reason exists, else false.
         """
-        for reason in self.reasons:
-            if reason.abbreviation == abbreviation:
-                return True
-        
-        return False
+        return abbreviation in self.reasons
 
     def get_reason(self, abbreviation: str):
         """Gets a reason based on its abbreviation. 
@@ -53,11 +61,12 @@ class UserSettings(ManagerBase):
         Returns:
             Reason: The desired reason.
         """
-        for reason in self.reasons:
-            if reason.abbreviation == abbreviation:
-                return reason
-        
-        raise ReasonError(abbreviation, "doesntexist")
+        reason = self.reasons.get(abbreviation)
+
+        if reason is None:
+            raise ReasonError(abbreviation, "doesntexist")
+
+        return reason
 
     def create_reason(self, abbreviation: str, description: str):
         """Creates a new reason.
@@ -77,7 +86,7 @@ class UserSettings(ManagerBase):
                 "exists")
 
         reason = Reason(abbreviation, description)
-        self.reasons.append(reason)
+        self.reasons[abbreviation] = reason
 
         self.save_file()
 
@@ -95,15 +104,13 @@ class UserSettings(ManagerBase):
         Returns:
             Reason: The reason that was just deleted.
         """
-        for reason in self.reasons:
-            if reason.abbreviation == abbreviation:
-                self.reasons.remove(reason)
+        reason = self.get_reason(abbreviation)
 
-                self.save_file()
+        del self.reasons[abbreviation]
 
-                return(reason)
-        
-        raise ReasonError(abbreviation, "doesntexist")
+        self.save_file()
+
+        return reason
 
     
     def does_removal_reason_exist(self, abbreviation: str):
@@ -115,11 +122,7 @@ class UserSettings(ManagerBase):
         Returns:
             bool: True if the reason exists, else false.
         """
-        for reason in self.removalReasons:
-            if reason.abbreviation == abbreviation:
-                return True
-        
-        return False
+        return abbreviation in self.removalReasons
         
     def get_removal_reason(self, abbreviation: str):
         """Gets a reason based on its abbreviation. 
@@ -133,12 +136,28 @@ class UserSettings(ManagerBase):
         Returns:
             RemovalReason: The desired reason.
         """
-        for reason in self.removalReasons:
-            if reason.abbreviation == abbreviation:
-                return reason
+        reason = self.removalReasons.get(abbreviation)
 
-        raise ReasonError(abbreviation, 
-            "doesntexist")
+        if reason is None:
+            raise ReasonError(abbreviation, "doesntexist")
+
+        return reason
+
+    def get_reasons(self):
+        """Gets every reason.
+
+        Returns:
+            List(Reason): All reasons.
+        """
+        return list(self.reasons.values())
+
+    def get_removal_reasons(self):
+        """Gets every removal reason.
+
+        Returns:
+            List(RemovalReason): All removal reasons.
+        """
+        return list(self.removalReasons.values())
 
     def create_removal_reason(self, abbreviation: str, description: str, turfjeCount: int):
         """Creates a new reason.
@@ -159,7 +178,7 @@ class UserSettings(ManagerBase):
                 "exists")
 
         reason = RemovalReason(abbreviation, description, turfjeCount)
-        self.removalReasons.append(reason)
+        self.removalReasons[abbreviation] = reason
 
         self.save_file()
 
@@ -177,18 +196,19 @@ class UserSettings(ManagerBase):
         Returns:
             RemovalReason: The reason that was just deleted.
         """
-        for reason in self.removalReasons:
-            if reason.abbreviation == abbreviation:
-                self.removalReasons.remove(reason)
+        reason = self.get_removal_reason(abbreviation)
 
-                self.save_file()
+        del self.removalReasons[abbreviation]
 
-                return reason
+        self.save_file()
 
-        raise ReasonError(abbreviation, "doesntexist")
+        return reason
+
+    def serialize(self):
+        """Adjusted version of ManagerBase.serialize(), specific to UserSettings.
 
-    def save_file(self):
-        """Adjusted version of ManagerBase.save_file(), does not need to be provided data.
+        Returns:
+            dict: The serializable reasons and removal reasons.
         """
         # convert objects into dicts to make settings serializable
         serializedSettings = {
@@ -199,15 +219,15 @@ class UserSettings(ManagerBase):
         serializedSettings['reasons'] = [{
             'abbreviation': reason.abbreviation,
             'description': reason.description
-        } for reason in self.reasons]
+        } for reason in self.reasons.values()]
 
         serializedSettings['removalReasons'] = [{
             'abbreviation': reason.abbreviation,
             'description': reason.description,
             'turfjeCount': reason.turfjeCount
-        } for reason in self.removalReasons]
+        } for reason in self.removalReasons.values()]
 
-        super().save_file(serializedSettings)
+        return serializedSettings
 
     def reset(self):
         """Empty out reason and removal reason lists and reset to no data. WARNING: REMOVES ALL CURRENTLY STORED REASONS IMMEDIATELY.
@@ -217,7 +237,7 @@ class UserSettings(ManagerBase):
             'removalReasons': []
         }
 
-        self.reasons = []
-        self.removalReasons = []
+        self.reasons = {}
+        self.removalReasons = {}
 
         self.save_file()
@@ -27,4 +27,16 @@ class PersonDoesNotExistError(Exception):
     Inherits from Exception
     """
     def __init__(self, id):
-        super().__init__(f"Person with id {id} does not exist.")
\ No newline at end of file
+        super().__init__(f"Person with id {id} does not exist.")
+
+
+class ImportRowError(Exception):
+    """Exception describing why a single row of a bulk import was skipped.
+
+    Inherits from Exception
+    """
+    def __init__(self, row, reason):
+        self.row = row
+        self.reason = reason
+
+        super().__init__(f"Row {row} was not imported: {reason}")